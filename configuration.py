@@ -15,6 +15,12 @@ def getenv(key, default=None, func=None):
         val = func(val)
     return val
 
+
+def boolean(val):
+    """Parse boolean environment variable, only 1, true, yes and on are True"""
+    return str(val).lower() in ("1", "true", "yes", "on")
+
+
 class SoccerConfig(object):
     """Soccer Configuration"""
     # flask debug configuration
@@ -24,6 +30,69 @@ class SoccerConfig(object):
     STATIC_URL = "http://127.0.0.1:5000/file"
     STORAGE_PATH = getenv("STORAGE_PATH", "/var/www/html/file")
 
+    # jumlah process image worker per worker uwsgi, 0 untuk proses avatar di dalam request
+    IMAGE_WORKERS = getenv("IMAGE_WORKERS", 2, int)
+    # url avatar yang ditampilkan selama avatar masih diproses, kosong jika tidak ada
+    AVATAR_PLACEHOLDER = getenv("AVATAR_PLACEHOLDER", "")
+    # avatar yang pending lebih lama dari ini (detik) dianggap gagal, worker mati atau restart
+    AVATAR_PENDING_TIMEOUT = getenv("AVATAR_PENDING_TIMEOUT", 10 * 60, int)
+
+    # cache variant image yang dibuat /file?w=&h=&fmt=, dibatasi total ukuran (byte)
+    IMAGE_CACHE_PATH = getenv("IMAGE_CACHE_PATH", "/var/www/html/file_variants")
+    IMAGE_CACHE_MAX_BYTES = getenv("IMAGE_CACHE_MAX_BYTES", 1024 * 1024 * 1024, int)
+    # cara kirim file /file: wsgi, x-accel (nginx), x-sendfile, uwsgi. lihat soccer.libs.file.send
+    FILE_SERVE_MODE = getenv("FILE_SERVE_MODE", "wsgi")
+    # location internal nginx untuk STORAGE_PATH dan IMAGE_CACHE_PATH
+    FILE_ACCEL_PREFIX = getenv("FILE_ACCEL_PREFIX", "/_storage")
+    FILE_ACCEL_VARIANT_PREFIX = getenv("FILE_ACCEL_VARIANT_PREFIX", "/_variants")
+    # storage file upload: local (STORAGE_PATH, dikirim /file) atau s3 (AWS S3, MinIO)
+    STORAGE_BACKEND = getenv("STORAGE_BACKEND", "local")
+    S3_ENDPOINT = getenv("S3_ENDPOINT", "http://127.0.0.1:9000")
+    S3_BUCKET = getenv("S3_BUCKET", "bola-app")
+    S3_ACCESS_KEY = getenv("S3_ACCESS_KEY", "")
+    S3_SECRET_KEY = getenv("S3_SECRET_KEY", "")
+    S3_REGION = getenv("S3_REGION", "us-east-1")
+    # url publik file (CDN), default <S3_ENDPOINT>/<S3_BUCKET>
+    S3_PUBLIC_URL = getenv("S3_PUBLIC_URL", "")
+    S3_PART_SIZE = getenv("S3_PART_SIZE", 8 * 1024 * 1024, int)
+    S3_CONCURRENCY = getenv("S3_CONCURRENCY", 4, int)
+
+    # nama file dari sha256 isi file, upload yang sama hanya disimpan sekali
+    FILE_CONTENT_HASH = getenv("FILE_CONTENT_HASH", True, boolean)
+
+    # cache stat file untuk ETag (detik), max-age file dengan nama acak dan nama biasa
+    FILE_STAT_TTL = getenv("FILE_STAT_TTL", 10, int)
+    FILE_STAT_CACHE_SIZE = getenv("FILE_STAT_CACHE_SIZE", 4096, int)
+    FILE_IMMUTABLE_MAX_AGE = getenv("FILE_IMMUTABLE_MAX_AGE", 365 * 24 * 60 * 60, int)
+    FILE_MAX_AGE = getenv("FILE_MAX_AGE", 300, int)
+    # upload hanya menyimpan image terbesar, thumb dan icon dibuat on demand oleh /file
+    IMAGE_ON_DEMAND = getenv("IMAGE_ON_DEMAND", False, boolean)
+
+    # kompresi response json (gzip, brotli jika module brotli terpasang), lihat soccer.libs.compress
+    COMPRESS_ENABLED = getenv("COMPRESS_ENABLED", True, boolean)
+    COMPRESS_MIN_SIZE = getenv("COMPRESS_MIN_SIZE", 1024, int)
+    COMPRESS_LEVEL = getenv("COMPRESS_LEVEL", 6, int)
+    COMPRESS_BROTLI = getenv("COMPRESS_BROTLI", True, boolean)
+    COMPRESS_BROTLI_LEVEL = getenv("COMPRESS_BROTLI_LEVEL", 5, int)
+    # cache hasil kompresi response GET, body lebih besar dari slot tidak di-cache
+    COMPRESS_CACHE_SIZE = getenv("COMPRESS_CACHE_SIZE", 1024, int)
+    COMPRESS_CACHE_TTL = getenv("COMPRESS_CACHE_TTL", 300, int)
+    COMPRESS_CACHE_SLOT_SIZE = getenv("COMPRESS_CACHE_SLOT_SIZE", 16 * 1024, int)
+
+    # blueprint yang menjawab 304 dari ETag versi data, lihat soccer.libs.conditional
+    ETAG_BLUEPRINTS = [
+        name for name in getenv("ETAG_BLUEPRINTS", "soccer.routes.player,soccer.routes.team").split(",") if name
+    ]
+
+    # cache response GET anonymous (detik), response stale dikirim selama dirender ulang
+    RESPONSE_CACHE_ENABLED = getenv("RESPONSE_CACHE_ENABLED", True, boolean)
+    RESPONSE_CACHE_TTL = getenv("RESPONSE_CACHE_TTL", 30, int)
+    RESPONSE_CACHE_STALE = getenv("RESPONSE_CACHE_STALE", 60, int)
+    # maksimal menunggu request lain yang merender key yang sama (detik)
+    RESPONSE_CACHE_WAIT = getenv("RESPONSE_CACHE_WAIT", 1.0, float)
+    RESPONSE_CACHE_SIZE = getenv("RESPONSE_CACHE_SIZE", 1024, int)
+    RESPONSE_CACHE_SLOT_SIZE = getenv("RESPONSE_CACHE_SLOT_SIZE", 64 * 1024, int)
+
     # uglify
     JSONIFY_PRETTYPRINT_REGULAR = getenv("JSONIFY_PRETTYPRINT_REGULAR", False, bool)
 
@@ -46,12 +115,53 @@ class SoccerConfig(object):
     SQLALCHEMY_POOL_RECYCLE = 60
     SQLALCHEMY_MAX_OVERFLOW = 20
 
+    # read replica, dipisah koma. SELECT dari request read only dikirim ke replica
+    # contoh: mysql://root:@10.0.0.2:3306/soccer,mysql://root:@10.0.0.3:3306/soccer
+    SQLALCHEMY_REPLICA_URIS = [uri for uri in getenv("DB_REPLICA_URIS", "").split(",") if uri]
+    REPLICA_EJECT_SECONDS = getenv("REPLICA_EJECT_SECONDS", 30, int)
+    REPLICA_STICKY_SECONDS = getenv("REPLICA_STICKY_SECONDS", 5, int)
+
+    # backend cache (local, shm). shm dibagi ke semua worker uwsgi dalam satu host
+    CACHE_BACKEND = getenv("CACHE_BACKEND", "local")
+    CACHE_SHM_DIR = getenv("CACHE_SHM_DIR", "/dev/shm")
+
+    # rate limit, storage: memory, shm, redis. algoritma: fixed, sliding, token
+    RATELIMIT_STORAGE = getenv("RATELIMIT_STORAGE", "memory")
+    RATELIMIT_ALGORITHM = getenv("RATELIMIT_ALGORITHM", "sliding")
+    RATELIMIT_REDIS_URL = getenv("RATELIMIT_REDIS_URL", "redis://127.0.0.1:6379/0")
+
+    # umur maksimal index search in-memory (detik) sebelum dibangun ulang dari database
+    SEARCH_INDEX_TTL = getenv("SEARCH_INDEX_TTL", 300, int)
+
+    # mode total pagination (exact, cached, estimate), lihat soccer.models.base
+    PAGINATION_TOTAL_MODE = getenv("PAGINATION_TOTAL_MODE", "exact")
+    COUNT_CACHE_TTL = getenv("COUNT_CACHE_TTL", 60, int)
+    COUNT_CACHE_SIZE = getenv("COUNT_CACHE_SIZE", 1024, int)
+
+    # cache entity player dan team by id (detik)
+    ENTITY_CACHE_TTL = getenv("ENTITY_CACHE_TTL", 300, int)
+    ENTITY_CACHE_NEGATIVE_TTL = getenv("ENTITY_CACHE_NEGATIVE_TTL", 30, int)
+    ENTITY_CACHE_SIZE = getenv("ENTITY_CACHE_SIZE", 10000, int)
+    # umur versi entity (detik), versi yang hilang diganti versi baru. tidak lebih dari ENTITY_CACHE_TTL
+    ENTITY_VERSION_TTL = min(getenv("ENTITY_VERSION_TTL", ENTITY_CACHE_TTL, int), ENTITY_CACHE_TTL)
+
+    # encoder json response: auto (orjson, simplejson, json), orjson, simplejson, json
+    JSON_ENCODER = getenv("JSON_ENCODER", "auto")
+    # cache json entity yang sudah di-encode per (id, versi), lihat soccer.libs.serializer
+    JSON_FRAGMENT_CACHE_SIZE = getenv("JSON_FRAGMENT_CACHE_SIZE", 20000, int)
+
     # token secret key
     SECRET_KEY = getenv("SECRET_KEY", "soccerappnyoba")
 
     # max file upload 100mb
     MAX_CONTENT_LENGTH = getenv("MAX_CONTENT_LENGTH", 100 * 1024 * 1024, int)
 
+    # upload image divalidasi saat diterima, lihat soccer.libs.upload
+    UPLOAD_MAX_BYTES = getenv("UPLOAD_MAX_BYTES", 10 * 1024 * 1024, int)
+    UPLOAD_MAX_PIXELS = getenv("UPLOAD_MAX_PIXELS", 40 * 1000 * 1000, int)
+    # byte upload yang disimpan di memory sebelum dipindah ke temporary file
+    UPLOAD_SPOOL_SIZE = getenv("UPLOAD_SPOOL_SIZE", 256 * 1024, int)
+
     # WEB frontend configuration
     WEB_URL = getenv("WEB_URL", "http://localhost:5000")
 
@@ -0,0 +1,20 @@
+import click
+
+from soccer.controllers import player as player_ctrl
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+@click.command()
+def sweep_avatars():
+    """mark avatar pending longer than AVATAR_PENDING_TIMEOUT as failed, run it from cron"""
+    # app is created on import, see reprocess_images
+    from soccer.http import app
+
+    with app.app_context():
+        failed = player_ctrl.sweep_pending_avatars()
+
+    click.echo("%i avatar pending lebih dari %i detik ditandai gagal" % (
+        failed, SoccerConfig.AVATAR_PENDING_TIMEOUT
+    ))
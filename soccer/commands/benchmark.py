@@ -0,0 +1,77 @@
+import multiprocessing
+import resource
+import tempfile
+import time
+
+import click
+from PIL import Image, ImageOps
+
+from soccer.libs import avatar, file
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+def legacy_variants(source: str, filename: str, variants=avatar.PLAYER_VARIANTS) -> dict:
+    """Avatar pipeline before variant engine, every variant resized from full source"""
+    result = {}
+    img = avatar.prepare(Image.open(source))
+    for column, subdir, size in variants:
+        im = ImageOps.fit(img, size, Image.ANTIALIAS)
+        result[column] = file.save(im, subdir, filename)
+
+    return result
+
+
+PIPELINES = (
+    ("before", legacy_variants),
+    ("after", avatar.render_variants),
+)
+
+
+def _measure(func, source: str, repeat: int, conn):
+    """Run pipeline in child process, send cpu seconds and peak rss (KB) per upload"""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.process_time()
+    for _ in range(repeat):
+        func(source, "benchmark.jpg")
+
+    cpu = (time.process_time() - start) / repeat
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    conn.send((cpu, peak))
+    conn.close()
+
+
+def _sample(path: str, size: tuple):
+    """Create sample photo with detail, flat image is too easy to resize"""
+    img = Image.effect_mandelbrot(size, (-2.0, -1.5, 1.0, 1.5), 100).convert("RGB")
+    img.save(path, quality=90)
+
+
+@click.command()
+@click.option("--source", help="image yang dipakai, default foto sample 4032x3024")
+@click.option("--repeat", default=5, help="jumlah upload per pipeline")
+def benchmark_avatar(source, repeat):
+    """benchmark avatar variant, cpu time and peak memory per upload"""
+    workdir = tempfile.mkdtemp(prefix="bola-benchmark-")
+
+    # variant disimpan ke direktori sementara
+    SoccerConfig.STORAGE_PATH = workdir
+
+    if not source:
+        source = workdir + "/sample.jpg"
+        _sample(source, (4032, 3024))
+
+    with Image.open(source) as img:
+        click.echo("source: %s %ix%i %s, %i upload" % (source, img.size[0], img.size[1], img.format, repeat))
+
+    # fork per pipeline so peak memory is not shared between them
+    context = multiprocessing.get_context("fork")
+    for name, func in PIPELINES:
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_measure, args=(func, source, repeat, sender))
+        process.start()
+        cpu, peak = receiver.recv()
+        process.join()
+
+        click.echo("%-6s cpu %8.1f ms/upload   peak rss +%8.1f MB" % (name, cpu * 1000, peak / 1024))
@@ -0,0 +1,152 @@
+import json
+import multiprocessing
+import os
+import time
+
+import click
+from PIL import Image
+
+from soccer.libs import avatar, storage
+from soccer.models import db, Player, Team
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+# model yang diproses: (model, variants)
+MODELS = {
+    "player": (Player, avatar.PLAYER_VARIANTS),
+    "team": (Team, avatar.TEAM_VARIANTS),
+}
+
+
+def reprocess_image(task):
+    """Regenerate variants of one row in worker process
+
+    The biggest stored variant is the source, upload original is not kept.
+    It is only re-encoded if the biggest size changed.
+
+    Args:
+        task: tuple (entity id, image filename, variants)
+
+    Returns:
+        tuple (entity id, dict of column and filename or None, error message)
+    """
+    entity_id, image, variants = task
+    subdir = variants[0][1]
+    try:
+        with storage.get_storage().open(subdir, image) as source:
+            with Image.open(source) as img:
+                size = img.size
+
+            source.seek(0)
+            return entity_id, _render(source, image, variants, size), None
+    except Exception as e:
+        return entity_id, None, repr(e)
+
+
+def _render(source, image: str, variants, size: tuple) -> dict:
+    """Render variants, keep the biggest variant if its size is not changed"""
+    column, _, biggest = variants[0]
+    if size != biggest:
+        return avatar.render_variants(source, image, variants)
+
+    if SoccerConfig.IMAGE_ON_DEMAND:
+        return {variant[0]: image for variant in variants}
+
+    result = avatar.render_variants(source, image, variants[1:])
+    result[column] = image
+    return result
+
+
+def load_checkpoint(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    temp = path + ".tmp"
+    with open(temp, "w") as f:
+        json.dump(checkpoint, f)
+
+    os.replace(temp, path)
+
+
+@click.command()
+@click.option("--model", "models", multiple=True, type=click.Choice(sorted(MODELS)),
+              help="model yang diproses, default semua")
+@click.option("--workers", default=os.cpu_count(), help="jumlah process")
+@click.option("--batch", default=200, help="jumlah row per batch, batas memory")
+@click.option("--checkpoint", default="reprocess_images.json", help="file checkpoint id terakhir")
+@click.option("--restart", is_flag=True, help="abaikan checkpoint, mulai dari awal")
+def reprocess_images(models, workers, batch, checkpoint, restart):
+    """regenerate image variants of player and team, resumable"""
+    state = {} if restart else load_checkpoint(checkpoint)
+
+    # importing soccer.http create the app and connect to database (search
+    # index). worker never use the database, forkserver is started before the
+    # import so worker replaced after maxtasksperchild does not inherit the
+    # connections either
+    pool = multiprocessing.get_context("forkserver").Pool(workers, maxtasksperchild=500)
+    try:
+        from soccer.http import app as app_instance
+
+        with app_instance.app_context():
+            for name in models or sorted(MODELS):
+                model, variants = MODELS[name]
+                _reprocess_model(pool, name, model, variants, batch, checkpoint, state)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _reprocess_model(pool, name, model, variants, batch, checkpoint, state):
+    last_id = state.get(name, 0)
+    processed = failed = images = 0
+    start = time.time()
+
+    click.echo("%s: mulai dari id %i" % (name, last_id))
+    while True:
+        # keyset by id, only one batch in memory
+        rows = model.query.filter(
+            model.id > last_id,
+            model.image.isnot(None),
+        ).order_by(
+            model.id.asc()
+        ).limit(batch).all()
+
+        if not rows:
+            break
+
+        entities = {row.id: row for row in rows}
+        batch_last_id = rows[-1].id
+        tasks = [(row.id, row.image, variants) for row in rows]
+
+        for entity_id, result, error in pool.imap_unordered(reprocess_image, tasks):
+            if error is not None:
+                failed += 1
+                click.echo("%s %i gagal: %s" % (name, entity_id, error), err=True)
+                continue
+
+            for column, filename in result.items():
+                setattr(entities[entity_id], column, filename)
+
+            processed += 1
+            images += len(variants)
+
+        # entity cache is invalidated by the orm events
+        db.session.commit()
+        db.session.expunge_all()
+
+        last_id = batch_last_id
+        state[name] = last_id
+        save_checkpoint(checkpoint, state)
+
+        elapsed = time.time() - start
+        click.echo("%s: id %i, %i row, %i gagal, %.1f images/sec" % (
+            name, last_id, processed, failed, images / elapsed if elapsed else 0
+        ))
+
+    click.echo("%s: selesai %i row, %i gagal" % (name, processed, failed))
@@ -1,7 +1,6 @@
 import click
 from werkzeug.contrib.profiler import ProfileMiddleware
 
-from soccer import http
 from configuration import SoccerConfig
 
 __author__ = "isnanda.muhammadzain@sebangsa.com"
@@ -34,10 +33,13 @@ def runserver(port, debug, profiling):
     else:
         port = 5000
 
+    # manage.py import every command, app is only created by the command that use it
+    from soccer import http
+
     if debug:
         app_instance = http.factory(config=SoccerConfigDebug)
     else:
-        app_instance = http.factory()
+        app_instance = http.app
 
     if profiling:
         app_instance.config["PROFILE"] = True
@@ -0,0 +1,38 @@
+import os
+from pathlib import Path
+
+import click
+
+from soccer.libs import file
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+@click.command()
+@click.option("--subdir", multiple=True, help="subdirectory, default semua subdirectory di STORAGE_PATH")
+@click.option("--dry-run", is_flag=True, help="hanya hitung file yang akan dipindah")
+def migrate_storage(subdir, dry_run):
+    """move flat file into sharded directory, filename and url are not changed"""
+    root = Path(SoccerConfig.STORAGE_PATH)
+    subdirs = subdir or sorted(path.name for path in root.iterdir() if path.is_dir())
+
+    for name in subdirs:
+        moved = 0
+        with os.scandir(str(root / name)) as entries:
+            for entry in entries:
+                # shard directory and temporary file are skipped
+                if not entry.is_file() or entry.name.startswith("."):
+                    continue
+
+                target = file.path(entry.name, name)
+                if not dry_run:
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.rename(entry.path, str(target))
+                    file.forget_stat(entry.path)
+
+                moved += 1
+                if moved % 10000 == 0:
+                    click.echo("%s: %i file" % (name, moved))
+
+        click.echo("%s: %i file %s" % (name, moved, "akan dipindah" if dry_run else "dipindah"))
@@ -1,11 +1,30 @@
+import logging
+import os
+import time
+from functools import partial
+
+from flask import current_app
 from flask_sqlalchemy import Pagination
+from sqlalchemy.orm import load_only
 
 from werkzeug.datastructures import FileStorage
-from PIL import Image, ImageOps
+from PIL import Image
 
+from soccer.controllers import search as search_ctrl
 from soccer.exceptions import BadRequest, PlayerNotFound
+from soccer.libs import avatar, file, imageworker, responsecache, storage, transaction
 from soccer.models import db, Player
 from soccer.models import player as player_mdl
+from configuration import SoccerConfig
+
+log = logging.getLogger(__name__)
+
+# upload asli yang menunggu diproses image worker, tidak boleh dikirim /file
+AVATAR_PENDING_DIR = "players_pending"
+
+# status proses avatar di kolom Player.image_status, done jika kolom image sudah terisi
+AVATAR_PENDING = "pending"
+AVATAR_FAILED = "failed"
 
 
 def create(shortname: str, fullname: str, backnumber: int, team_id: int, player_avatar: FileStorage, 
@@ -17,40 +36,161 @@ def create(shortname: str, fullname: str, backnumber: int, team_id: int, player_
     player.height = height
     player.weight = weight
 
-    # create player avatar
-    img = Image.open(player_avatar)
-    if img.mode == "P":
-        img = img.convert("RGBA")
-    elif img.mode == "L":
-        img = img.convert("RGB")
-
-    # for transparent player avatar
-    if img.mode == "RGBA":
-        background = Image.new("RGB", img.size, (255, 255, 255))
-        background.paste(img, mask=img.split()[3])
-        img = background
-
-    # set player avatar
-    size_image = (840, 630)
-    im = ImageOps.fit(img, size_image, Image.ANTIALIAS)
-    player.set_image(im, player_avatar.filename)
-
-    # set player avatar thumbnail
-    size_thumb = (180, 135)
-    im = ImageOps.fit(img, size_thumb, Image.ANTIALIAS)
-    player.set_image_thumb(im, player_avatar.filename)
-
-    # set player avatar icon
-    size_icon = (96, 72)
-    im = ImageOps.fit(img, size_icon, Image.ANTIALIAS)
-    player.set_image_icon(im, player_avatar.filename)
+    # make sure upload is image, only read the header
+    try:
+        Image.open(player_avatar.stream)
+    except (IOError, SyntaxError):
+        raise BadRequest("player_avatar harus berupa image")
+
+    player_avatar.stream.seek(0)
+
+    # save original upload on local disk, variant is created by image worker
+    source = file.save(player_avatar, AVATAR_PENDING_DIR, player_avatar.filename,
+                       content_hash=False, backend=storage.local())
 
     db.session.add(player)
     db.session.flush()
+    db.invalidate_total(Player)
+    db.after_commit(lambda: responsecache.invalidate("player"))
+
+    search_ctrl.index_player(player)
+
+    _process_avatar(player, str(file.path(source, AVATAR_PENDING_DIR)), player_avatar.filename)
 
     return player
 
 
+def get_avatar_status(player_id: int) -> tuple:
+    """Get status of player avatar processing
+
+    Args:
+        player_id: id player
+
+    Returns:
+        tuple (Player, status) status is pending, done or failed
+    """
+    # not from entity cache, worker may update it in other process
+    with transaction.primary(db.session):
+        player = Player.query.filter_by(id=player_id).first()
+
+    if not player:
+        raise PlayerNotFound
+
+    if player.image:
+        return player, "done"
+
+    # worker that died never mark the job failed, see sweep_pending_avatars
+    if player.image_status == AVATAR_PENDING and not _pending_expired(player.created_on):
+        return player, AVATAR_PENDING
+
+    return player, AVATAR_FAILED
+
+
+def sweep_pending_avatars() -> int:
+    """Mark avatar pending longer than AVATAR_PENDING_TIMEOUT as failed
+
+    Original upload of the job is removed from AVATAR_PENDING_DIR too.
+
+    Returns:
+        int number of player marked failed
+    """
+    deadline = time.time() - SoccerConfig.AVATAR_PENDING_TIMEOUT
+    players = Player.query.filter(
+        Player.image_status == AVATAR_PENDING,
+        Player.created_on < deadline,
+    ).all()
+
+    for player in players:
+        player.image_status = AVATAR_FAILED
+
+    db.session.commit()
+
+    # upload is saved before the player row, only remove old file
+    root = storage.local().directory(AVATAR_PENDING_DIR)
+    for dirpath, _, filenames in os.walk(str(root)):
+        for name in filenames:
+            source = os.path.join(dirpath, name)
+            try:
+                if os.stat(source).st_mtime < deadline:
+                    _remove_source(source)
+            except FileNotFoundError:
+                continue
+
+    if players:
+        responsecache.invalidate("player")
+
+    return len(players)
+
+
+def _pending_expired(created_on) -> bool:
+    return time.time() - (created_on or 0) > SoccerConfig.AVATAR_PENDING_TIMEOUT
+
+
+def _process_avatar(player: Player, source: str, filename: str):
+    """Create avatar variants in image worker, synchronous if worker disabled
+
+    Args:
+        player: Player object, must be flushed
+        source: full path of original upload
+        filename: original upload filename
+    """
+    if not imageworker.enabled():
+        _set_avatar(player, avatar.render_variants(source, filename))
+        _remove_source(source)
+        return
+
+    # status is in the row so every worker see it, committed with the player
+    player.image_status = AVATAR_PENDING
+
+    # only submit when player is committed so the worker can update it
+    callback = partial(_avatar_done, current_app._get_current_object(), player.id, source)
+    db.after_commit(lambda: imageworker.submit(
+        avatar.render_variants, source, filename, callback=callback
+    ))
+
+
+def _avatar_done(app, player_id: int, source: str, future):
+    """Save variants filename to player when image worker finish"""
+    try:
+        images = future.result()
+    except Exception:
+        log.exception("failed to process avatar player %i", player_id)
+        images = None
+
+    with app.app_context():
+        try:
+            player = Player.query.filter_by(id=player_id).first()
+            if player:
+                if images is None:
+                    player.image_status = AVATAR_FAILED
+                else:
+                    _set_avatar(player, images)
+
+                db.session.commit()
+                responsecache.invalidate("player")
+        except Exception:
+            db.session.rollback()
+            log.exception("failed to save avatar player %i", player_id)
+            return
+
+    if images is not None:
+        _remove_source(source)
+
+
+def _set_avatar(player: Player, images: dict):
+    for column, filename in images.items():
+        setattr(player, column, filename)
+
+    player.image_status = None
+
+
+def _remove_source(source: str):
+    try:
+        os.remove(source)
+    except OSError:
+        log.warning("failed to remove avatar source %s", source)
+
+
 def update(player_id: int, shortname: str = None, fullname: str = None, backnumber: int = None, team_id: int = None,
            height: int = None, weight: int = None, nation: str = None):
     """Update event
@@ -96,20 +236,28 @@ def update(player_id: int, shortname: str = None, fullname: str = None, backnumb
 
     db.session.add(player)
     db.session.flush()
+    db.invalidate_total(Player)
+    db.after_commit(lambda: responsecache.invalidate("player"))
+
+    search_ctrl.index_player(player)
 
     return player
 
 
-def get_list(page: int = 1, count: int = 1, team_id: str = None):
+def get_list(page: int = 1, count: int = 1, team_id: str = None, cursor: str = None,
+             total_mode: str = None, columns: list = None):
     """Get player with pagination
 
     Args:
         page: page start
         count: count per page
         team: team yang dipilih
+        cursor: cursor keyset pagination, None to use page
+        total_mode: exact, cached or estimate
+        columns: column yang di-load, None untuk semua column
 
     Returns:
-        Pagination
+        Pagination or CursorPagination if cursor is not None
     """
     filters = [
         Player.is_deleted == 0
@@ -118,14 +266,23 @@ def get_list(page: int = 1, count: int = 1, team_id: str = None):
     if team_id:
         filters.append(Player.team_id == team_id)
 
-    players = Player.query.filter(
+    query = Player.query.filter(
         *filters
     ).order_by(
         Player.id.desc()
-    ).paginate(
+    )
+
+    if columns:
+        query = query.options(load_only(*columns))
+
+    if cursor is not None:
+        return query.paginate_cursor(cursor=cursor, per_page=count)
+
+    players = query.paginate(
         page=page,
         per_page=count,
         error_out=False,
+        total_mode=total_mode,
     )
 
     return players
@@ -159,4 +316,8 @@ def delete(player_id: int) -> Player:
 
     player.is_deleted = 1
     db.session.add(player)
-    db.session.flush()
\ No newline at end of file
+    db.session.flush()
+    db.invalidate_total(Player)
+    db.after_commit(lambda: responsecache.invalidate("player"))
+
+    search_ctrl.index_player(player)
\ No newline at end of file
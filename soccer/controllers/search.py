@@ -1,117 +1,274 @@
 from flask_sqlalchemy import Pagination
+from sqlalchemy.orm import load_only
 
 from string import punctuation
 
+from soccer.libs import transaction
+from soccer.libs.cache import get_cache
+from soccer.libs.searchindex import PrefixIndex, TrigramIndex
 from soccer.models import db, Team, Player
+from soccer.models.base import CursorPagination, decode_cursor, encode_cursor
+from configuration import SoccerConfig
 
+# index search per process, diupdate dari controller player dan team
+player_index = TrigramIndex()
+team_index = TrigramIndex()
 
-def search_team(keyword: str, page: int = 1, count: int = 12, next_id: int = 0, last_id: int = 0) -> Pagination:
+# index autocomplete, dibangun saat startup dan tidak pernah query ke database
+player_suggest = PrefixIndex()
+team_suggest = PrefixIndex()
+
+# generation index dibagi antar worker, index dibangun ulang jika worker lain
+# mengubah player atau team
+search_cache = get_cache("search", max_size=16, slot_size=64)
+_loaded_generation = {}
+
+
+def search_team(keyword: str, page: int = 1, count: int = 12, sort: str = "match",
+                next_id: int = 0, last_id: int = 0, cursor: str = None,
+                columns: list = None) -> Pagination:
     """Search teams
 
     Args:
         keyword: keyword for search
         page: number of page
         count: item per page
+        sort: sort result (match, name, -name, id, -id)
         next_id: next id team yang dicari
         last_id: last id team yang dicari
-    
+        cursor: cursor keyset pagination, None to use page
+        columns: column yang di-load, None untuk semua column
+
     Returns:
-        Pagination
+        Pagination or CursorPagination if cursor is not None
     """
     keyword = keyword.strip(punctuation)
     if keyword == "":
         return None
 
-    filter_apply = [Teams.fullname.like("%{}%".format(keyword))]
-
-    if next_id:
-        filter_apply.append(Teams.id < next_id)
-
-    if last_id:
-        filter_apply.append(Teams.id > last_id)
+    index = get_team_index()
+    return _paginate(Team, index, keyword, page, count, sort, next_id, last_id, cursor, columns)
 
-    # generate query sort
-    sort_collections = {
-        "-name": Teams.name.desc(),
-        "name": Teams.name.asc(),
-        "-id": Teams.id.desc(),
-        "id": Teams.id.asc(),
-        "match": db.case(
-            (
-                (Teams.name == keyword, 0),
-                (Teams.name.like("{}%".format(keyword)), 1),
-                (Teams.name.like("%{}%".format(keyword)), 2),
-                (Teams.name.like("%{}".format(keyword)), 3)
-            ), else_=4
-        ).asc()
-    }
 
-    sort_apply = sort_collections[sort]
-
-    teams = Teams.query.filter(
-        *filter_apply
-    ).order_by(
-        sort_apply
-    ).paginate(
-        page=page,
-        per_page=count,
-        error_out=False
-    )
-
-    return teams
-
-
-def search_player(keyword: str, page: int = 1, count: int = 12, next_id: int = 0, last_id: int = 0) -> Pagination:
+def search_player(keyword: str, page: int = 1, count: int = 12, sort: str = "match",
+                  next_id: int = 0, last_id: int = 0, cursor: str = None,
+                  columns: list = None) -> Pagination:
     """Search players
 
     Args:
         keyword: keyword players
         page: number of page
         count: item per page
+        sort: sort result (match, name, -name, id, -id)
         next_id: next id player yang dicari
         last_id: last id player yang dicari
+        cursor: cursor keyset pagination, None to use page
+        columns: column yang di-load, None untuk semua column
 
     Returns:
-        Pagination
+        Pagination or CursorPagination if cursor is not None
     """
     keyword = keyword.strip(punctuation)
     if keyword == "":
         return None
 
-    filter_apply = [Player.fullname.like("%{}%".format(keyword))]
+    index = get_player_index()
+    return _paginate(Player, index, keyword, page, count, sort, next_id, last_id, cursor, columns)
+
+
+def suggest(keyword: str, count: int = 5, types: tuple = ("player", "team")) -> dict:
+    """Autocomplete player and team names by prefix
+
+    Args:
+        keyword: prefix typed by user
+        count: maximum result per type
+        types: type entity yang dicari (player, team)
+
+    Returns:
+        dict of type and list of (id, name)
+    """
+    indexes = {
+        "player": (player_suggest, load_player_index),
+        "team": (team_suggest, load_team_index),
+    }
+
+    result = {}
+    for type_ in types:
+        index, loader = indexes[type_]
+
+        # only load once if build at startup failed
+        if index.loaded_at is None:
+            loader()
+
+        result[type_] = index.suggest(keyword, count)
+
+    return result
+
+
+def load_index():
+    """Build all search index from database"""
+    load_player_index()
+    load_team_index()
+
+
+def load_player_index():
+    """Build player search and autocomplete index from database"""
+    _loaded_generation["player"] = search_cache.generation("player")
+    # index live until the next rebuild, read it from primary
+    with transaction.primary(db.session):
+        rows = db.session.query(
+            Player.id, Player.fullname, Player.shortname
+        ).filter(
+            Player.is_deleted == 0
+        ).all()
+
+    player_index.rebuild(rows)
+    player_suggest.rebuild(rows)
+
+
+def load_team_index():
+    """Build team search and autocomplete index from database"""
+    _loaded_generation["team"] = search_cache.generation("team")
+    with transaction.primary(db.session):
+        rows = db.session.query(
+            Team.id, Team.fullname, Team.shortname
+        ).filter(
+            Team.is_deleted == 0
+        ).all()
+
+    team_index.rebuild(rows)
+    team_suggest.rebuild(rows)
+
+
+def get_player_index() -> TrigramIndex:
+    """Get player index, rebuild from database if not loaded, expired or changed by other worker"""
+    generation = search_cache.generation("player")
+    if player_index.is_stale(SoccerConfig.SEARCH_INDEX_TTL) or _loaded_generation.get("player") != generation:
+        load_player_index()
+
+    return player_index
 
-    if bool(next_id):
-        filter_apply.append(Player.id < next_id)
 
-    if bool(last_id):
-        filter_apply.append(Player.id > last_id)
+def get_team_index() -> TrigramIndex:
+    """Get team index, rebuild from database if not loaded, expired or changed by other worker"""
+    generation = search_cache.generation("team")
+    if team_index.is_stale(SoccerConfig.SEARCH_INDEX_TTL) or _loaded_generation.get("team") != generation:
+        load_team_index()
 
-    # generate query sort
+    return team_index
+
+
+def index_player(player: Player):
+    """Sync player to search index after create, update or delete
+
+    Args:
+        player: Player object
+    """
+    for index in (player_index, player_suggest):
+        if player.is_deleted:
+            index.remove(player.id)
+        else:
+            index.add(player.id, player.fullname, player.shortname)
+
+    db.after_commit(lambda: _bump_generation("player"))
+
+
+def index_team(team: Team):
+    """Sync team to search index after create, update or delete
+
+    Args:
+        team: Team object
+    """
+    for index in (team_index, team_suggest):
+        if team.is_deleted:
+            index.remove(team.id)
+        else:
+            index.add(team.id, team.fullname, team.shortname)
+
+    db.after_commit(lambda: _bump_generation("team"))
+
+
+def _bump_generation(name: str):
+    """Tell other worker the index is changed after commit, keep this worker
+    index if it was up to date"""
+    generation = search_cache.bump(name)
+    if _loaded_generation.get(name) == generation - 1:
+        _loaded_generation[name] = generation
+
+
+def _paginate(model, index: TrigramIndex, keyword: str, page: int, count: int, sort: str,
+              next_id: int = 0, last_id: int = 0, cursor: str = None, columns: list = None) -> Pagination:
+    """Sort and paginate index result, only fetch rows in current page
+
+    Args:
+        model: Player or Team
+        index: index yang digunakan
+        keyword: keyword for search
+        page: number of page
+        count: item per page
+        sort: sort result
+        next_id: next id yang dicari
+        last_id: last id yang dicari
+        cursor: cursor keyset pagination, None to use page
+        columns: column yang di-load, None untuk semua column
+
+    Returns:
+        Pagination or CursorPagination if cursor is not None
+    """
+    matches = index.search(keyword)
+
+    if next_id:
+        matches = [m for m in matches if m[0] < next_id]
+
+    if last_id:
+        matches = [m for m in matches if m[0] > last_id]
+
+    # generate sort key, id always included so every key is unique.
+    # types of the key are checked against cursor from client
     sort_collections = {
-        "-name": Player.name.desc(),
-        "name": Player.name.asc(),
-        "-id": Player.id.desc(),
-        "id": Player.id.asc(),
-        "match": db.case(
-            (
-                (Player.name == keyword, 0),
-                (Player.name.like("{}%".format(keyword)), 1)
-                (Player.name.like("%{}%".format(keyword)), 2)
-                (Player.name.like("%{}".format(keyword)), 3)
-            ), else_=4
-        ).asc()
+        "-name": (lambda m: (index.name(m[0]), m[0]), True, (str, int)),
+        "name": (lambda m: (index.name(m[0]), m[0]), False, (str, int)),
+        "-id": (lambda m: (m[0],), True, (int,)),
+        "id": (lambda m: (m[0],), False, (int,)),
+        "match": (lambda m: (m[1], -m[0]), False, (int, int)),
     }
 
-    sort_apply = sort_collections[sort]
+    sort_key, reverse, key_types = sort_collections[sort]
+    matches.sort(key=sort_key, reverse=reverse)
+
+    if cursor is not None:
+        if cursor:
+            last_seen = tuple(decode_cursor(cursor, key_types))
+            if reverse:
+                matches = [m for m in matches if sort_key(m) < last_seen]
+            else:
+                matches = [m for m in matches if sort_key(m) > last_seen]
+
+        next_cursor = None
+        if len(matches) > count:
+            next_cursor = encode_cursor(*sort_key(matches[count - 1]))
+
+        items = _fetch(model, matches[:count], columns)
+        return CursorPagination(None, cursor, count, items, next_cursor)
+
+    page = page or 1
+    start = (page - 1) * count
+    items = _fetch(model, matches[start:start + count], columns)
 
-    players = Player.query.filter(
-        *filter_apply
-    ).order_by(
-        sort_apply
-    ).paginate(
-        page=page,
-        per_page=count,
-        error_out=False
-    )
+    return Pagination(None, page, count, len(matches), items)
 
-    return players
\ No newline at end of file
+
+def _fetch(model, matches: list, columns: list = None) -> list:
+    """Fetch rows of matches by primary key, keep matches order"""
+    page_ids = [entity_id for entity_id, _ in matches]
+    if not page_ids:
+        return []
+
+    query = model.query.filter(model.id.in_(page_ids))
+    if columns:
+        query = query.options(load_only(*columns))
+
+    rows = {
+        row.id: row for row in query.all()
+    }
+    return [rows[entity_id] for entity_id in page_ids if entity_id in rows]
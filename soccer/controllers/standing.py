@@ -1,10 +1,9 @@
-from flask_sqlalchemy import Pagination
 from soccer.exceptions import BadRequest
-#from soccer.models import db, Standing
-#from soccer.models import standing as standing_mdl
+from soccer.libs import responsecache
+from soccer.models import db, Standings
 
 
-def get(liga: str, periode: int) -> Pagination:
+def get(liga: str, periode: int) -> list:
     """Get standing from liga
 
     Args:
@@ -12,6 +11,22 @@ def get(liga: str, periode: int) -> Pagination:
         periode: periode liga yang ditampilkan
 
     Returns:
-        Pagination
+        list of Standings ordered by position
     """
-    print("nilai periode : ", periode)
\ No newline at end of file
+    standings = Standings.query.filter(
+        Standings.liga_id == liga,
+        Standings.periode == periode,
+    ).order_by(
+        Standings.position.asc()
+    ).all()
+
+    return standings
+
+
+def invalidate():
+    """Drop cached /standing response after standings table is changed
+
+    Standings are written outside of this app (result import), call this
+    in the transaction that change it, cache is dropped after commit.
+    """
+    db.after_commit(lambda: responsecache.invalidate("standing"))
@@ -1,5 +1,8 @@
 from flask_sqlalchemy import Pagination
+from sqlalchemy.orm import load_only
+from soccer.controllers import search as search_ctrl
 from soccer.exceptions import BadRequest, TeamNotFound
+from soccer.libs import responsecache
 from soccer.models import db, Team
 from soccer.models import team as team_mdl
 
@@ -25,6 +28,10 @@ def create(shortname: str, fullname: str, liga: int, stadion: str,
 
     db.session.add(team)
     db.session.flush()
+    db.invalidate_total(Team)
+    db.after_commit(lambda: responsecache.invalidate("team"))
+
+    search_ctrl.index_team(team)
 
     return team
 
@@ -71,20 +78,28 @@ def update(team_id: int, shortname: str = None, fullname: str = None, liga: str
 
     db.session.add(team)
     db.session.flush()
+    db.invalidate_total(Team)
+    db.after_commit(lambda: responsecache.invalidate("team"))
+
+    search_ctrl.index_team(team)
 
     return team
 
 
-def get_list(page: int = 1, count:int = 12, liga: str = None) -> Pagination:
+def get_list(page: int = 1, count:int = 12, liga: str = None, cursor: str = None,
+             total_mode: str = None, columns: list = None) -> Pagination:
     """Get teams with pagination
 
     Args:
         page: page start
         count: count per page
         liga: liga yang dipilih
+        cursor: cursor keyset pagination, None to use page
+        total_mode: exact, cached or estimate
+        columns: column yang di-load, None untuk semua column
 
     Returns:
-        Pagination
+        Pagination or CursorPagination if cursor is not None
     """
     filters = [
         Team.is_deleted == 0,
@@ -93,14 +108,23 @@ def get_list(page: int = 1, count:int = 12, liga: str = None) -> Pagination:
     if liga:
         filters.append(Team.liga == liga)
 
-    teams = Team.query.filter(
+    query = Team.query.filter(
         *filters
     ).order_by(
         Team.id.desc()
-    ).paginate(
+    )
+
+    if columns:
+        query = query.options(load_only(*columns))
+
+    if cursor is not None:
+        return query.paginate_cursor(cursor=cursor, per_page=count)
+
+    teams = query.paginate(
         page=page,
         per_page=count,
         error_out=False,
+        total_mode=total_mode,
     )
 
     return teams
@@ -134,4 +158,8 @@ def delete(team_id: int) -> Team:
 
     team.is_deleted = 1
     db.session.add(team)
-    db.session.flush()
\ No newline at end of file
+    db.session.flush()
+    db.invalidate_total(Team)
+    db.after_commit(lambda: responsecache.invalidate("team"))
+
+    search_ctrl.index_team(team)
\ No newline at end of file
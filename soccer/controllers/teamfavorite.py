@@ -24,6 +24,7 @@ def set_favorite(actor: int, team_id: int) -> TeamFavorites:
     favorite = TeamFavorites(actor, team_id)
     db.session.add(favorite)
     db.session.flush()
+    db.invalidate_total(TeamFavorites)
 
     return favorite
 
@@ -47,28 +48,38 @@ def set_unfavorite(actor: int, team_id: int) -> None:
     # set unfavorite
     favorite.is_deleted = 1
     db.session.add(favorite)
+    db.invalidate_total(TeamFavorites)
 
 
-def get_favorite(user: int, page: int = 1, count: int = 20) -> Pagination:
+def get_favorite(user: int, page: int = 1, count: int = 20, cursor: str = None,
+                 total_mode: str = None) -> Pagination:
     """Get list of favorite team
 
     Args:
         user: user yang akan diambil list favoritenya
         page: number of page
         count: item per page
+        cursor: cursor keyset pagination, None to use page
+        total_mode: exact, cached or estimate
 
     Returns:
         list team yang difavoritkan
     """
-    user_favorite = TeamFavorites.query.filter(
-        TeamFavorites.user_id == auth.user.id,
+    query = TeamFavorites.query.filter(
+        TeamFavorites.user_id == user,
         TeamFavorites.is_deleted == 0
     ).order_by(
         TeamFavorites.id.desc()
-    ).paginate(
+    )
+
+    if cursor is not None:
+        return query.paginate_cursor(cursor=cursor, per_page=count)
+
+    user_favorite = query.paginate(
         page=page,
         per_page=count,
-        error_out=False
+        error_out=False,
+        total_mode=total_mode,
     )
 
     return user_favorite
\ No newline at end of file
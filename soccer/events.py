@@ -8,15 +8,79 @@ from MySQLdb.connections import Connection as MysqlConnection
 from flask import g
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, object_session
 from sqlalchemy.pool import Pool
 
-from soccer.models import db
+from soccer.models import db, Player, Team
+from soccer.models import player as player_mdl
+from soccer.models import team as team_mdl
 
 log = logging.getLogger(__name__)
 
 
 def register_event():
-    pass
+    for model, listener in ENTITY_LISTENERS:
+        for identifier in ("after_insert", "after_update", "after_delete"):
+            if not event.contains(model, identifier, listener):
+                event.listen(model, identifier, listener)
+
+    for identifier in ("after_commit", "after_soft_rollback"):
+        if not event.contains(Session, identifier, invalidate_after_transaction):
+            event.listen(Session, identifier, invalidate_after_transaction)
+
+    if not event.contains(Session, "after_flush", mark_has_writes):
+        event.listen(Session, "after_flush", mark_has_writes)
+
+    if not event.contains(Session, "after_commit", run_after_commit):
+        event.listen(Session, "after_commit", run_after_commit)
+
+    if not event.contains(Session, "after_soft_rollback", discard_after_commit):
+        event.listen(Session, "after_soft_rollback", discard_after_commit)
+
+
+def entity_changed(cache):
+    """Invalidate entity cache on flush and remember it for end of transaction"""
+
+    def listener(mapper, connection, target):
+        cache.invalidate(target.id)
+
+        # other request may cache the old row before this transaction commit
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault("entity_cache_dirty", set()).add((cache, target.id))
+
+    return listener
+
+
+def invalidate_after_transaction(session, *args):
+    """Invalidate again entity changed in the finished transaction"""
+    for cache, entity_id in session.info.pop("entity_cache_dirty", ()):
+        cache.invalidate(entity_id)
+
+
+def mark_has_writes(session, flush_context):
+    """Remember session sent changes to database, used by read only request"""
+    session.info["has_writes"] = True
+
+
+def run_after_commit(session):
+    """Run callbacks registered with ``db.after_commit``"""
+    for func in session.info.pop("after_commit", ()):
+        try:
+            func()
+        except Exception:
+            log.exception("after commit callback failed")
+
+
+def discard_after_commit(session, previous_transaction):
+    """Drop callbacks of rolled back transaction"""
+    session.info.pop("after_commit", None)
+
+
+ENTITY_LISTENERS = (
+    (Player, entity_changed(player_mdl.entity_cache)),
+    (Team, entity_changed(team_mdl.entity_cache)),
+)
 
 
 @event.listens_for(Pool, "connect")
@@ -2,6 +2,10 @@ from .soccerexceptions import (
     SoccerException,
     TeamNotFound,
     BadRequest,
+    Forbidden,
+    InvalidImage,
+    FileTooLarge,
+    RateLimitExceeded,
     PlayerNotFound,
     NotFound
 )
@@ -10,6 +14,10 @@ __all__ = [
     SoccerException,
     TeamNotFound,
     BadRequest,
+    Forbidden,
+    InvalidImage,
+    FileTooLarge,
+    RateLimitExceeded,
     PlayerNotFound,
     NotFound
 ]
\ No newline at end of file
@@ -49,6 +49,27 @@ class PlayerNotFound(BadRequest):
     message = "Player tidak ditemukan"
 
 
+class InvalidImage(BadRequest):
+    message = "File harus berupa image"
+
+
+class FileTooLarge(BadRequest):
+    message = "Ukuran file terlalu besar"
+    status_code = 413
+
+
+class RateLimitExceeded(BadRequest):
+    message = "You hit the rate limit"
+    status_code = 429
+
+
+class Forbidden(SoccerException):
+    """Indicates that the user does not have access to the request"""
+
+    message = __doc__.strip()
+    status_code = 403
+
+
 class NotFound(SoccerException):
     """Indicates that the request data is not exists.
     E.g. data missing, endpoint not found"""
@@ -5,8 +5,11 @@ import time
 from flask import Flask, g, request, blueprints
 
 from soccer import models, events, metrics
+from soccer.controllers import search as search_ctrl
 from soccer.exceptions.soccerexceptions import BadRequest
-from soccer.libs import ratelimit
+from soccer.libs import conditional, ratelimit, responsecache, transaction
+from soccer.libs.compress import CompressMiddleware
+from soccer.libs.upload import UploadRequest
 from soccer.libs.misc import walk_modules
 from configuration import SoccerConfig
 
@@ -17,6 +20,9 @@ def factory(config=SoccerConfig):
     app_instance = Flask(__name__.split(",")[0])
     app_instance.make_null_session()
 
+    # validate upload while it is received
+    app_instance.request_class = UploadRequest
+
     # Register blueprint
     for modules in walk_modules("soccer.routes"):
         for obj in vars(modules).values():
@@ -32,16 +38,28 @@ def factory(config=SoccerConfig):
     # load database
     models.db.init_app(app_instance)
 
+    # build search and autocomplete index
+    with app_instance.app_context():
+        try:
+            search_ctrl.load_index()
+        except Exception:
+            log.exception("failed to build search index, will retry on first search")
+
     # setup middleware
     metrics.setup_metrics(app_instance)
 
+    if config.COMPRESS_ENABLED:
+        app_instance.wsgi_app = CompressMiddleware(app_instance.wsgi_app)
+
     @app_instance.before_request
     def before():
-        log.debug("request args '%r'" % request.args)
-        log.debug("request form '%r'" % request.form)
-        log.debug("request headers '%r'" % request.headers)
         g.request_start_time = time.time()
 
+        # form is not read here, upload is validated while it is parsed and
+        # its error must be raised in the view
+        log.debug("request args '%r'", request.args)
+        log.debug("request headers '%r'", request.headers)
+
         token = request.headers.get("Authorization")
 
         if token:
@@ -64,20 +82,35 @@ def factory(config=SoccerConfig):
 
         g.user_auth = user
 
+        # 304 Not Modified or cached response before the view run any query
+        return conditional.check_not_modified() or responsecache.lookup()
+
     @app_instance.after_request
     def after(response):
-        try:
-            # commit transaction
-            models.db.session.commit()
-        except Exception:
-            models.db.session.rollback()
-            raise
+        session = models.db.session
+        if transaction.is_read_only() and not transaction.has_writes(session):
+            # nothing to commit, return connection to pool now
+            transaction.finish_read_only(session)
+        else:
+            if transaction.is_read_only():
+                log.warning("endpoint '%s' is read only but has writes, commit", request.url_rule)
+
+            try:
+                # commit transaction
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
 
-        resp = time.time() - g.request_start_time
-        log.info("endpoint '%s' response time %.3f", request.url_rule, resp)
+        start = getattr(g, "request_start_time", None)
+        if start is not None:
+            log.info("endpoint '%s' response time %.3f", request.url_rule, time.time() - start)
 
         log.info("total query %i", getattr(g, "total_query", 0))
 
+        conditional.add_etag(response)
+        responsecache.store(response)
+
         limit = ratelimit.get_view_rate_limit()
         if limit and limit.send_x_headers:
             h = response.headers
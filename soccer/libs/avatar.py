@@ -0,0 +1,96 @@
+from PIL import Image, ImageOps
+
+from soccer.libs import file
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+# (kolom Player, subdirectory, ukuran) dari yang paling besar
+PLAYER_VARIANTS = (
+    ("image", "players", (840, 630)),
+    ("image_thumb", "players_thumb", (180, 135)),
+    ("image_icon", "players_icon", (96, 72)),
+)
+
+# ukuran team mengikuti player
+TEAM_VARIANTS = (
+    ("image", "teams", (840, 630)),
+    ("image_thumb", "teams_thumb", (180, 135)),
+    ("image_icon", "teams_icon", (96, 72)),
+)
+
+
+def variant_size(column: str, variants=PLAYER_VARIANTS) -> tuple:
+    """Get (width, height) of variant column"""
+    for variant_column, _, size in variants:
+        if variant_column == column:
+            return size
+
+    raise KeyError(column)
+
+
+def prepare(img: Image.Image) -> Image.Image:
+    """Convert image to RGB, transparent area become white
+
+    Args:
+        img: source image
+
+    Returns:
+        RGB image
+    """
+    if img.mode == "P":
+        img = img.convert("RGBA")
+    elif img.mode == "L":
+        img = img.convert("RGB")
+
+    # for transparent avatar
+    if img.mode == "RGBA":
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])
+        img = background
+
+    return img
+
+
+def render_variants(source: str, filename: str, variants=PLAYER_VARIANTS) -> dict:
+    """Resize source image into every variant and save it
+
+    Source is decoded once, every variant is created from the next bigger
+    variant instead of the full source. With IMAGE_ON_DEMAND only the
+    biggest variant is saved. Only use file and image, safe to run in
+    worker process.
+
+    Args:
+        source: full path or file object of source image
+        filename: original upload filename
+        variants: tuple of (column, subdir, size)
+
+    Returns:
+        dict of column and saved filename
+    """
+    variants = sorted(variants, key=lambda variant: variant[2][0] * variant[2][1], reverse=True)
+    columns = [column for column, _, _ in variants]
+
+    # variant lain dibuat on demand dari variant terbesar, lihat IMAGE_ON_DEMAND
+    if SoccerConfig.IMAGE_ON_DEMAND:
+        variants = variants[:1]
+
+    result = {}
+    with Image.open(source) as img:
+        # JPEG decoded at 1/2, 1/4 or 1/8 scale that still covers the biggest variant
+        img.draft(None, variants[0][2])
+        current = prepare(img)
+        for column, subdir, size in variants:
+            current = ImageOps.fit(current, size, Image.ANTIALIAS)
+            result[column] = file.save(current, subdir, filename, close_after=False)
+
+            # webp dan avif untuk client yang mendukung, lihat routes.files
+            file.save_alternates(current, subdir, result[column])
+
+        current.close()
+
+    # kolom variant on demand berisi filename variant terbesar
+    for column in columns:
+        result.setdefault(column, result[columns[0]])
+
+    return result
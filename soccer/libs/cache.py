@@ -0,0 +1,412 @@
+import fcntl
+import hashlib
+import logging
+import marshal
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+log = logging.getLogger(__name__)
+
+
+class CacheBackend(object):
+    """Cache interface used by entity, count and search cache
+
+    Namespaces have a generation counter, include it in the key and
+    ``bump`` the namespace to invalidate every key at once.
+    """
+
+    #: visible to every worker process on the host
+    shared = False
+
+    def get(self, key: str, default=None):
+        """Get value of key, default if missing or expired"""
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl: int = None) -> bool:
+        """Set value of key
+
+        Args:
+            key: cache key
+            value: value
+            ttl: time to live in seconds, default ``self.ttl``
+
+        Returns:
+            bool False if value can not be stored
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        """Delete key if exists"""
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: int = 1, ttl: int = None) -> int:
+        """Increase integer value of key, ttl is only set when key is created
+
+        Returns:
+            int value after increased
+        """
+        return self.update(key, lambda value: (value or 0) + amount, ttl)
+
+    def update(self, key: str, func, ttl: int = None):
+        """Atomically replace value of key with ``func(value)``
+
+        Args:
+            key: cache key
+            func: called with current value or None, return new value
+            ttl: time to live in seconds, only set when key is created
+
+        Returns:
+            new value
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """Delete all keys"""
+        raise NotImplementedError
+
+    def generation(self, namespace: str) -> int:
+        """Get current generation of namespace"""
+        raise NotImplementedError
+
+    def bump(self, namespace: str) -> int:
+        """Invalidate namespace by increasing its generation"""
+        raise NotImplementedError
+
+
+class LocalCache(CacheBackend):
+    """Bounded in-process LRU cache with expiration per key"""
+
+    def __init__(self, max_size: int = 1024, ttl: int = 60):
+        """
+        Args:
+            max_size: maximum number of keys, least recently used key is evicted first
+            ttl: default time to live in seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self._generations = {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+
+            value, expire_at = item
+            if expire_at < time.time():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: int = None) -> bool:
+        expire_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, expire_at)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def update(self, key, func, ttl: int = None):
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] < now:
+                item = (None, now + (self.ttl if ttl is None else ttl))
+
+            value = func(item[0])
+            self._data[key] = (value, item[1])
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def bump(self, namespace: str) -> int:
+        with self._lock:
+            generation = self._generations.get(namespace, 0) + 1
+            self._generations[namespace] = generation
+
+        return generation
+
+
+# layout file shared memory:
+#   header | generation counter * GENERATION_SLOTS | slot * max_size
+# slot: seq, expire_at, length, key digest, value (marshal)
+_FILE_HEADER = struct.Struct("<8sIIII")
+_SLOT_HEADER = struct.Struct("<QdI16s4x")
+_SEQ = struct.Struct("<Q")
+_MAGIC = b"BOLACACH"
+_VERSION = 1
+_EMPTY = b"\x00" * 16
+
+
+class SharedMemoryCache(CacheBackend):
+    """Fixed size cache on a mmap file, shared by every worker on the host
+
+    Reads never take a lock, every slot is guarded by a sequence number
+    (seqlock): writer makes it odd while writing, reader retries if the
+    sequence is odd or changed while reading. Writers are serialized with
+    a POSIX file lock. Keys are stored as 16 bytes digest in
+    ``PROBE`` candidate slots, the slot closest to expire is evicted when
+    all candidates are used. Values must be builtin types supported by
+    ``marshal`` and fit in ``slot_size``.
+    """
+
+    shared = True
+
+    PROBE = 4
+    READ_RETRY = 8
+    GENERATION_SLOTS = 1024
+
+    def __init__(self, path: str, max_size: int = 1024, ttl: int = 60, slot_size: int = 512):
+        """
+        Args:
+            path: path of mmap file, use tmpfs (/dev/shm) to keep it in memory
+            max_size: number of slots
+            ttl: default time to live in seconds
+            slot_size: bytes per slot including slot header
+        """
+        if slot_size <= _SLOT_HEADER.size:
+            raise ValueError("slot_size must be bigger than %i" % _SLOT_HEADER.size)
+
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.slot_size = slot_size
+
+        self._generation_offset = _FILE_HEADER.size
+        self._slot_offset = self._generation_offset + self.GENERATION_SLOTS * _SEQ.size
+        self._file_size = self._slot_offset + max_size * slot_size
+
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._locked():
+            self._prepare_file()
+
+        self._mm = mmap.mmap(self._fd, self._file_size, mmap.MAP_SHARED)
+
+    def get(self, key, default=None):
+        digest = self._digest(key)
+        for offset in self._probe(digest):
+            found, expire_at, payload = self._read(offset, digest)
+            if not found:
+                continue
+
+            if expire_at < time.time():
+                return default
+
+            return marshal.loads(payload)
+
+        return default
+
+    def set(self, key, value, ttl: int = None) -> bool:
+        payload = marshal.dumps(value)
+        if len(payload) > self.slot_size - _SLOT_HEADER.size:
+            return False
+
+        digest = self._digest(key)
+        expire_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._locked():
+            self._write(self._victim(digest), digest, expire_at, payload)
+
+        return True
+
+    def delete(self, key):
+        digest = self._digest(key)
+        with self._locked():
+            for offset in self._probe(digest):
+                if _SLOT_HEADER.unpack_from(self._mm, offset)[3] == digest:
+                    self._write(offset, _EMPTY, 0, b"")
+
+    def update(self, key, func, ttl: int = None):
+        digest = self._digest(key)
+        now = time.time()
+        with self._locked():
+            offset = self._victim(digest)
+            _, expire_at, length, slot_digest = _SLOT_HEADER.unpack_from(self._mm, offset)
+
+            value = None
+            if slot_digest == digest and expire_at >= now:
+                start = offset + _SLOT_HEADER.size
+                value = marshal.loads(self._mm[start:start + length])
+            else:
+                expire_at = now + (self.ttl if ttl is None else ttl)
+
+            value = func(value)
+            payload = marshal.dumps(value)
+            if len(payload) > self.slot_size - _SLOT_HEADER.size:
+                raise ValueError("value of %r is bigger than slot" % key)
+
+            self._write(offset, digest, expire_at, payload)
+
+        return value
+
+    def clear(self):
+        empty = b"\x00" * self.slot_size
+        with self._locked():
+            for index in range(self.max_size):
+                offset = self._slot_offset + index * self.slot_size
+                seq = _SEQ.unpack_from(self._mm, offset)[0]
+                _SEQ.pack_into(self._mm, offset, seq + 1)
+                self._mm[offset + _SEQ.size:offset + self.slot_size] = empty[_SEQ.size:]
+                _SEQ.pack_into(self._mm, offset, seq + 2)
+
+    def generation(self, namespace: str) -> int:
+        # counter only increase, torn read only cause a cache miss
+        return _SEQ.unpack_from(self._mm, self._generation_slot(namespace))[0]
+
+    def bump(self, namespace: str) -> int:
+        offset = self._generation_slot(namespace)
+        with self._locked():
+            generation = _SEQ.unpack_from(self._mm, offset)[0] + 1
+            _SEQ.pack_into(self._mm, offset, generation)
+
+        return generation
+
+    @contextmanager
+    def _locked(self):
+        # lockf is owned by process, thread lock for threads in same process
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    def _prepare_file(self):
+        """Reset file if it is new or created with different layout"""
+        expected = _FILE_HEADER.pack(_MAGIC, _VERSION, self.slot_size, self.max_size, self.GENERATION_SLOTS)
+        if os.fstat(self._fd).st_size == self._file_size:
+            if os.pread(self._fd, _FILE_HEADER.size, 0) == expected:
+                return
+
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, self._file_size)
+        os.pwrite(self._fd, expected, 0)
+
+    @staticmethod
+    def _digest(key) -> bytes:
+        if isinstance(key, str):
+            key = key.encode("utf-8")
+
+        return hashlib.blake2b(key, digest_size=16).digest()
+
+    def _probe(self, digest: bytes):
+        start = int.from_bytes(digest[:8], "little") % self.max_size
+        for i in range(min(self.PROBE, self.max_size)):
+            yield self._slot_offset + ((start + i) % self.max_size) * self.slot_size
+
+    def _generation_slot(self, namespace: str) -> int:
+        index = int.from_bytes(self._digest(namespace)[:8], "little") % self.GENERATION_SLOTS
+        return self._generation_offset + index * _SEQ.size
+
+    def _read(self, offset: int, digest: bytes):
+        """Lock-free read of slot
+
+        Returns:
+            tuple (found, expire_at, payload)
+        """
+        mm = self._mm
+        for _ in range(self.READ_RETRY):
+            seq, expire_at, length, slot_digest = _SLOT_HEADER.unpack_from(mm, offset)
+            if seq & 1:
+                continue
+
+            payload = None
+            if slot_digest == digest:
+                start = offset + _SLOT_HEADER.size
+                payload = mm[start:start + length]
+
+            if _SEQ.unpack_from(mm, offset)[0] == seq:
+                return payload is not None, expire_at, payload
+
+        # writer is busy on this slot, treat as miss
+        return False, 0, None
+
+    def _victim(self, digest: bytes) -> int:
+        """Slot for digest: same key, then empty or expired, then closest to expire"""
+        now = time.time()
+        victim = None
+        victim_expire = None
+        for offset in self._probe(digest):
+            _, expire_at, _, slot_digest = _SLOT_HEADER.unpack_from(self._mm, offset)
+            if slot_digest == digest:
+                return offset
+
+            if slot_digest == _EMPTY or expire_at < now:
+                expire_at = 0
+
+            if victim is None or expire_at < victim_expire:
+                victim = offset
+                victim_expire = expire_at
+
+        return victim
+
+    def _write(self, offset: int, digest: bytes, expire_at: float, payload: bytes):
+        mm = self._mm
+        seq = _SEQ.unpack_from(mm, offset)[0] | 1
+        _SLOT_HEADER.pack_into(mm, offset, seq, expire_at, len(payload), digest)
+        start = offset + _SLOT_HEADER.size
+        mm[start:start + len(payload)] = payload
+        _SEQ.pack_into(mm, offset, seq + 1)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str, max_size: int = 1024, ttl: int = 60, slot_size: int = 512) -> CacheBackend:
+    """Get named cache with backend from CACHE_BACKEND config
+
+    Args:
+        name: cache name, same name return same cache
+        max_size: maximum number of keys
+        ttl: default time to live in seconds
+        slot_size: maximum bytes per value for shared memory backend
+
+    Returns:
+        CacheBackend, LocalCache if shared memory can not be opened
+    """
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is not None:
+            return cache
+
+        if SoccerConfig.CACHE_BACKEND == "shm":
+            path = os.path.join(SoccerConfig.CACHE_SHM_DIR, "bola-app-%s.cache" % name)
+            try:
+                cache = SharedMemoryCache(path, max_size=max_size, ttl=ttl, slot_size=slot_size)
+            except OSError:
+                log.exception("can not open shared cache %s, fallback to local cache", path)
+
+        if cache is None:
+            cache = LocalCache(max_size=max_size, ttl=ttl)
+
+        _caches[name] = cache
+        return cache
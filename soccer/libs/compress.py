@@ -0,0 +1,285 @@
+import hashlib
+import re
+import time
+import zlib
+
+from soccer import metrics
+from soccer.libs.cache import get_cache
+from configuration import SoccerConfig
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+# hanya response text yang dikompres, image sudah terkompres
+COMPRESSIBLE_MIMETYPES = (
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/xml",
+)
+
+# suffix ETag response yang dikompres, lihat CompressMiddleware._encoded_etag
+_ENCODED_ETAG = re.compile(r'-(?:gzip|br)"')
+
+
+def _gzip(data: bytes, level: int) -> bytes:
+    # wbits 31 is gzip container, no mtime so same body give same bytes
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _brotli(data: bytes, level: int) -> bytes:
+    return brotli.compress(data, quality=level)
+
+
+def available_encodings() -> tuple:
+    """Supported content encoding, ordered by preference"""
+    if brotli is not None and SoccerConfig.COMPRESS_BROTLI:
+        return "br", "gzip"
+
+    return ("gzip",)
+
+
+def negotiate(accept_encoding: str, encodings: tuple) -> str:
+    """Pick content encoding from Accept-Encoding header
+
+    Args:
+        accept_encoding: value of Accept-Encoding, ex: "gzip, deflate, br;q=0.9"
+        encodings: supported encoding ordered by preference
+
+    Returns:
+        str encoding, None if client accept none of them
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+
+        accepted[name] = quality
+
+    best = None
+    best_quality = 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+
+class CompressMiddleware(object):
+    """WSGI middleware compressing text response with brotli or gzip
+
+    Only 200 response with Content-Length of at least COMPRESS_MIN_SIZE and
+    a compressible mimetype is compressed. Streamed response (no
+    Content-Length), file response (image, X-Sendfile, X-Accel-Redirect,
+    Range) and response already encoded are passed through untouched.
+
+    Compressed body of GET response is cached by hash of the body, same
+    list page requested again only pay the hash instead of compression.
+    """
+
+    def __init__(self, app, min_size: int = None, level: int = None, brotli_level: int = None):
+        """
+        Args:
+            app: wsgi application
+            min_size: smaller body is sent as is, default COMPRESS_MIN_SIZE
+            level: gzip level 1-9, default COMPRESS_LEVEL
+            brotli_level: brotli quality 0-11, default COMPRESS_BROTLI_LEVEL
+        """
+        self.app = app
+        self.min_size = SoccerConfig.COMPRESS_MIN_SIZE if min_size is None else min_size
+        self.levels = {
+            "gzip": SoccerConfig.COMPRESS_LEVEL if level is None else level,
+            "br": SoccerConfig.COMPRESS_BROTLI_LEVEL if brotli_level is None else brotli_level,
+        }
+        self.compressors = {"gzip": _gzip, "br": _brotli}
+        self.encodings = available_encodings()
+        self.cache = get_cache(
+            "compressed", max_size=SoccerConfig.COMPRESS_CACHE_SIZE, ttl=SoccerConfig.COMPRESS_CACHE_TTL,
+            slot_size=SoccerConfig.COMPRESS_CACHE_SLOT_SIZE
+        )
+
+    def __call__(self, environ, start_response):
+        if_none_match = environ.get("HTTP_IF_NONE_MATCH")
+        encoded_etag = False
+        if if_none_match:
+            # application only know ETag of the identity body
+            environ["HTTP_IF_NONE_MATCH"] = _ENCODED_ETAG.sub('"', if_none_match)
+            encoded_etag = environ["HTTP_IF_NONE_MATCH"] != if_none_match
+
+        if environ.get("REQUEST_METHOD") == "HEAD":
+            return self.app(environ, start_response)
+
+        # start_response is delayed until we know the response can be compressed
+        delayed = []
+        passthrough = []
+
+        def delay(status, headers, exc_info=None):
+            if exc_info is not None or passthrough:
+                return start_response(status, headers, exc_info)
+
+            delayed.append((status, headers))
+            return self._write
+
+        app_iter = self.app(environ, delay)
+        if not delayed:
+            # application call start_response lazily, nothing to do
+            passthrough.append(True)
+            return app_iter
+
+        status, headers = delayed[0]
+        if status.startswith("304"):
+            self._not_modified(environ, headers, encoded_etag)
+            start_response(status, headers)
+            return app_iter
+
+        encoding = self._encoding(environ, status, headers)
+        if encoding is None:
+            self._add_vary(status, headers)
+            start_response(status, headers)
+            return app_iter
+
+        try:
+            body = b"".join(app_iter)
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+
+        compressed = self._compress(body, encoding, cacheable=environ.get("REQUEST_METHOD") == "GET")
+
+        headers = [
+            (key, value) for key, value in headers
+            if key.lower() not in ("content-length", "etag")
+        ] + [
+            ("Content-Encoding", encoding),
+            ("Content-Length", str(len(compressed))),
+        ]
+
+        etag = self._header(delayed[0][1], "etag")
+        if etag:
+            headers.append(("ETag", self._encoded_etag(etag, encoding)))
+
+        self._add_vary(status, headers)
+        start_response(status, headers)
+        return [compressed]
+
+    @staticmethod
+    def _write(data):
+        raise RuntimeError("write() callable is not supported by CompressMiddleware")
+
+    def _encoding(self, environ, status: str, headers: list) -> str:
+        """Encoding for the response, None if it must be sent as is"""
+        if not status.startswith("200"):
+            return None
+
+        for key in ("content-encoding", "x-sendfile", "x-accel-redirect", "content-range"):
+            if self._header(headers, key) is not None:
+                return None
+
+        mimetype = (self._header(headers, "content-type") or "").split(";")[0].strip().lower()
+        if mimetype not in COMPRESSIBLE_MIMETYPES:
+            return None
+
+        length = self._header(headers, "content-length")
+        if length is None or not length.isdigit() or int(length) < self.min_size:
+            return None
+
+        return negotiate(environ.get("HTTP_ACCEPT_ENCODING", ""), self.encodings)
+
+    def _compress(self, body: bytes, encoding: str, cacheable: bool) -> bytes:
+        key = None
+        if cacheable:
+            digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+            key = "compressed:%s:%i:%s" % (encoding, self.levels[encoding], digest)
+            compressed = self.cache.get(key)
+            if compressed is not None:
+                metrics.COMPRESS_CACHE.labels("bola-app", encoding, "hit").inc()
+                self._record(encoding, body, compressed)
+                return compressed
+
+        start = time.perf_counter()
+        compressed = self.compressors[encoding](body, self.levels[encoding])
+        metrics.COMPRESS_SECONDS.labels("bola-app", encoding).inc(time.perf_counter() - start)
+        self._record(encoding, body, compressed)
+
+        if key is not None:
+            metrics.COMPRESS_CACHE.labels("bola-app", encoding, "miss").inc()
+            self.cache.set(key, compressed)
+
+        return compressed
+
+    @staticmethod
+    def _record(encoding: str, body: bytes, compressed: bytes):
+        metrics.COMPRESS_BYTES_IN.labels("bola-app", encoding).inc(len(body))
+        metrics.COMPRESS_BYTES_OUT.labels("bola-app", encoding).inc(len(compressed))
+
+    def _not_modified(self, environ, headers: list, encoded_etag: bool):
+        """Headers of 304 must match the 200 the client cached
+
+        304 has no body and content type, it is answered for the identity
+        ETag after the encoding suffix was stripped from If-None-Match. Only
+        a client that sent an encoded ETag is known to have cached a
+        compressed 200, cache keep the stored headers that are not sent.
+        """
+        if not encoded_etag:
+            return
+
+        etag = self._header(headers, "etag")
+        encoding = negotiate(environ.get("HTTP_ACCEPT_ENCODING", ""), self.encodings)
+        if etag and encoding:
+            headers[:] = [(key, value) for key, value in headers if key.lower() != "etag"]
+            headers.append(("ETag", self._encoded_etag(etag, encoding)))
+
+        self._vary(headers)
+
+    def _add_vary(self, status: str, headers: list):
+        """Response of compressible type differ by Accept-Encoding, tell the caches"""
+        mimetype = (self._header(headers, "content-type") or "").split(";")[0].strip().lower()
+        if mimetype not in COMPRESSIBLE_MIMETYPES:
+            return
+
+        self._vary(headers)
+
+    @staticmethod
+    def _vary(headers: list):
+        for index, (key, value) in enumerate(headers):
+            if key.lower() == "vary":
+                if "accept-encoding" not in value.lower():
+                    headers[index] = (key, value + ", Accept-Encoding")
+                return
+
+        headers.append(("Vary", "Accept-Encoding"))
+
+    @staticmethod
+    def _encoded_etag(etag: str, encoding: str) -> str:
+        """ETag of compressed body must differ from the identity body"""
+        if etag.endswith('"'):
+            return etag[:-1] + "-" + encoding + '"'
+
+        return etag
+
+    @staticmethod
+    def _header(headers: list, name: str):
+        for key, value in headers:
+            if key.lower() == name:
+                return value
+
+        return None
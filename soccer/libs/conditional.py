@@ -0,0 +1,90 @@
+import hashlib
+
+from flask import current_app, g, request
+
+from soccer.libs import transaction
+from soccer.libs.cache import get_cache
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+def etag(version_func):
+    """Decorator enable conditional GET on endpoint
+
+    ETag is computed from version of the data before the view runs, so
+    ``304 Not Modified`` is answered without SQL and serialization. Only
+    used when the blueprint of the endpoint is in ETAG_BLUEPRINTS and the
+    versions are in shared cache (CACHE_BACKEND shm).
+
+    Args:
+        version_func: called with view args, return version of the data
+            (ex: ``entity_cache.version``), must change when the data change
+    """
+    def decorator(f):
+        f.etag_version = version_func
+        return f
+
+    return decorator
+
+
+def versions_shared() -> bool:
+    """Check entity versions are shared by every worker
+
+    With local cache every worker has its own version token, a write in one
+    worker does not change the token of the others and they would keep
+    answering 304 for the old data.
+    """
+    # same cache instance created by soccer.models.entitycache
+    return get_cache("entity_version").shared
+
+
+def _version_func():
+    if request.method not in ("GET", "HEAD") or request.blueprint not in SoccerConfig.ETAG_BLUEPRINTS:
+        return None
+
+    if not versions_shared():
+        return None
+
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(view, "etag_version", None)
+
+
+def check_not_modified():
+    """Compute ETag of request and answer 304 if client already has it
+
+    Called in before request.
+
+    Returns:
+        flask Response 304, None to continue to the view
+    """
+    version_func = _version_func()
+    if version_func is None:
+        return None
+
+    version = version_func(**(request.view_args or {}))
+    key = "%s|%s|%s" % (request.endpoint, version, request.full_path)
+    g.etag = hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+
+    # body must be at least as new as the version, a lagging replica would
+    # pair the new ETag with the old body
+    transaction.read_primary()
+
+    if request.if_none_match.contains_weak(g.etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(g.etag, weak=True)
+        return response
+
+    return None
+
+
+def add_etag(response):
+    """Set ETag computed in before request on successful response
+
+    Called in after request.
+    """
+    tag = getattr(g, "etag", None)
+    if tag and response.status_code == 200:
+        response.set_etag(tag, weak=True)
+
+    return response
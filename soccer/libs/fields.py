@@ -0,0 +1,85 @@
+from soccer.exceptions import BadRequest
+from soccer.libs import serializer
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+class FieldSet(object):
+    """Fields of an entity in list response, for ``fields=`` query parameter
+
+    Every field knows the columns it reads, so only the columns of the
+    requested fields are selected and computed field (avatar) is only built
+    when it is requested.
+    """
+
+    def __init__(self, name: str, fields: list):
+        """
+        Args:
+            name: name of the dict shape, used as fragment kind
+            fields: list of (field, columns, getter) in response order,
+                getter is function entity -> value
+        """
+        self.name = name
+        self.fields = fields
+        self.names = tuple(field for field, _, _ in fields)
+
+    def parse(self, value: str) -> tuple:
+        """Parse ``fields`` query parameter
+
+        Args:
+            value: comma separated field, ex: "id,shortname". None or empty for all field
+
+        Returns:
+            tuple of field in response order
+        """
+        if not value:
+            return self.names
+
+        requested = set(field.strip() for field in value.split(",") if field.strip())
+        unknown = requested.difference(self.names)
+        if unknown:
+            raise BadRequest("field tidak dikenal: %s. field yang tersedia: %s" % (
+                ", ".join(sorted(unknown)), ", ".join(self.names)
+            ))
+
+        return tuple(field for field in self.names if field in requested)
+
+    def columns(self, selected: tuple) -> list:
+        """Columns needed by selected fields, None if every column is needed
+
+        id is always loaded, it is the identity of the row and fragment.
+        """
+        if selected == self.names:
+            return None
+
+        columns = ["id"]
+        for field, field_columns, _ in self.fields:
+            if field in selected:
+                columns.extend(column for column in field_columns if column not in columns)
+
+        return columns
+
+    def build(self, entity, selected: tuple) -> dict:
+        """Build response dict of entity with selected fields"""
+        return {
+            field: getter(entity)
+            for field, _, getter in self.fields
+            if field in selected
+        }
+
+    def fragments(self, entities, selected: tuple, versions, loaded_version) -> list:
+        """Encoded entities with selected fields, see ``serializer.fragments``
+
+        Args:
+            entities: list of model instance
+            selected: fields from ``parse``
+            versions: ``EntityCache`` of the model
+            loaded_version: ``versions.table_version()`` read before the entities were loaded
+        """
+        kind = self.name
+        if selected != self.names:
+            kind = "%s:%s" % (self.name, ",".join(selected))
+
+        return serializer.fragments(
+            kind, entities, lambda entity: self.build(entity, selected), versions, loaded_version
+        )
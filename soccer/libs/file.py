@@ -1,19 +1,51 @@
+import hashlib
+import io
+import mimetypes
 import os
+import re
+import tempfile
 from collections import namedtuple
+from datetime import datetime
+from urllib.parse import quote
 from pathlib import Path
 import string
 import random
 
 from PIL import Image
-from PIL.ImageFile import ImageFile
 
+from flask import Response, request, send_file
+from werkzeug.http import is_resource_modified
 from werkzeug.utils import secure_filename
 
+from soccer.libs import storage
+from soccer.libs.cache import get_cache
 from configuration import SoccerConfig
 
 Chunk = namedtuple("Chunk", "path url")
 STORAGE_PATH = Path(SoccerConfig.STORAGE_PATH)
 
+# untuk membatasi ukuran image yang di upload
+MAX_IMAGE_SIZE = (1312, 984)
+
+# format yang ditulis di samping JPEG sebagai <filename>.<ext>: (ext, format PIL, mimetype)
+ALTERNATE_FORMATS = (
+    ("avif", "AVIF", "image/avif"),
+    ("webp", "WEBP", "image/webp"),
+)
+_alternate_formats = None
+
+# nama dari safe_filename dan content hash tidak pernah ditimpa, aman di cache selamanya
+IMMUTABLE_NAME = re.compile(r"(_[A-Za-z]{10}|^[0-9a-f]{32})\.")
+
+# panjang hex sha256 untuk nama file content hash
+HASH_LENGTH = 32
+
+CHUNK_SIZE = 64 * 1024
+
+# (inode, mtime ns, size) file yang dikirim /file
+stat_cache = get_cache("file_stat", max_size=SoccerConfig.FILE_STAT_CACHE_SIZE,
+                       ttl=SoccerConfig.FILE_STAT_TTL, slot_size=128)
+
 
 def url(filename, subdir: str) -> str:
     """Get url file
@@ -28,15 +60,28 @@ def url(filename, subdir: str) -> str:
     if not filename:
         return ""
 
-    static_url = SoccerConfig.STATIC_URL
-    if subdir:
-        static_url = static_url + "/" + subdir
-    
-    return static_url + "/" + filename
+    return storage.get_storage().url(subdir, filename)
+
+
+def variant_url(filename, subdir: str, size: tuple) -> str:
+    """Get url of variant resized on demand by /file
+
+    Args:
+        filename: filename of source image
+        subdir: subdirectory
+        size: (width, height) of variant
+
+    Returns:
+        str url
+    """
+    if not filename:
+        return ""
+
+    return storage.local().url(subdir, filename) + "?w=%i&h=%i" % size
 
 
 def path(filename: str, subdir: str) -> Path:
-    """Get full file path
+    """Get full path on local storage, sharded into STORAGE_PATH/<subdir>/xx/yy/<filename>
 
     Args:
         filename: filename
@@ -45,58 +90,285 @@ def path(filename: str, subdir: str) -> Path:
     Returns:
         str full path
     """
-    upload_dir = Path(SoccerConfig.STORAGE_PATH)
-    if subdir:
-        upload_dir = upload_dir / subdir
+    return storage.local().path(subdir, filename)
+
+
+def find(filename: str, subdir: str) -> Path:
+    """Get full path of existing file on local storage, fallback to flat
+    layout for file that is not migrated yet (manage.py migrate_storage)
+
+    Args:
+        filename: filename
+        subdir: subdirectory
 
-    return upload_dir / filename
+    Returns:
+        Path sharded path if exists, otherwise flat path
+    """
+    sharded = path(filename, subdir)
+    try:
+        stat(str(sharded))
+        return sharded
+    except FileNotFoundError:
+        return storage.local().directory(subdir) / filename
 
 
-def save(file, subdir: str, filename=None, close_after=True) -> str:
+def save(file, subdir: str, filename=None, close_after=True, content_hash=None, backend=None) -> str:
     """Save file
 
+    With content hash the filename is the sha256 of the saved bytes, the
+    same upload is stored once and not written again.
+
     Args:
-        file: save able file ex: (FileStorage, ImageFile)
+        file: save able file ex: (FileStorage, Image)
         subdir: sub directory
         filename: filename of file
         close_after: close file after done ?
+        content_hash: name file by content, default FILE_CONTENT_HASH
+        backend: Storage, default from STORAGE_BACKEND
 
     Returns:
         str filename
     """
-    upload_dir = Path(SoccerConfig.STORAGE_PATH)
-    if subdir:
-        upload_dir = upload_dir / subdir
+    if content_hash is None:
+        content_hash = SoccerConfig.FILE_CONTENT_HASH
+
+    if backend is None:
+        backend = storage.get_storage()
+
+    # temporary file is written next to local storage, rename on same disk
+    temp_dir = storage.local().directory(subdir)
 
     # make sure upload directory exists
-    if not upload_dir.is_dir():
-        upload_dir.mkdir(parents=True)
+    if not temp_dir.is_dir():
+        temp_dir.mkdir(parents=True)
 
     if not filename:
         filename = file.filename
 
-    # make sure filename is safe and no collision
-    filename = safe_filename(filename)
-    while (upload_dir / filename).is_file():
-        filename = safe_filename(file.filename)
+    ext = os.path.splitext(secure_filename(filename))[1].lower()
 
-    if isinstance(file, ImageFile):
+    # opened image file and image from resize (ImageOps.fit) saved the same way
+    if isinstance(file, Image.Image):
+        source = file
         if file.mode in ('RGBA', 'LA', '1', 'P'):
             file = file.convert("RGB")
 
-        size = (1312, 984) # untuk membatasi ukuran image yang di upload
-        if file.size[0] > size[0] or file.size[1] > size[1]:
-            file.thumbnail(size, Image.ANTIALIAS)
-            file.save(str(upload_dir / filename), quality=90)
-        else:
-            file.save(str(upload_dir / filename), quality=90)
+        # variant yang sudah kecil tidak perlu di resize lagi
+        if file.size[0] > MAX_IMAGE_SIZE[0] or file.size[1] > MAX_IMAGE_SIZE[1]:
+            file.thumbnail(MAX_IMAGE_SIZE, Image.ANTIALIAS)
+
+        Image.init()
+        if ext not in Image.EXTENSION:
+            ext = ".jpg"
+
+        buffer = io.BytesIO()
+        file.save(buffer, Image.EXTENSION[ext], quality=90)
+        if file is not source:
+            file.close()
+
+        file = source
+        data = buffer.getvalue()
+        name = _name(backend, hashlib.sha256(data), ext, filename, subdir, content_hash)
+        if not (content_hash and backend.exists(subdir, name)):
+            backend.save(subdir, name, _spool(temp_dir, [data]))
     else:
-        file.save(str(upload_dir / filename))
+        # hash while writing to temporary file, rename after the name is known
+        stream = getattr(file, "stream", file)
+        digest = hashlib.sha256()
+        temp = _spool(temp_dir, iter(lambda: stream.read(CHUNK_SIZE), b""), digest)
+        name = _name(backend, digest, ext, filename, subdir, content_hash)
+        if content_hash and backend.exists(subdir, name):
+            os.remove(temp)
+        else:
+            backend.save(subdir, name, temp)
 
     if close_after:
         file.close()
 
-    return filename
+    return name
+
+
+def _name(backend, digest, ext: str, filename: str, subdir: str, content_hash: bool) -> str:
+    """Filename from content hash, or safe filename with random string without collision"""
+    if content_hash:
+        return digest.hexdigest()[:HASH_LENGTH] + ext
+
+    name = safe_filename(filename)
+    while backend.exists(subdir, name):
+        name = safe_filename(filename)
+
+    return name
+
+
+def _spool(temp_dir: Path, chunks, digest=None) -> str:
+    """Write chunks into temporary file in temp_dir, return its path"""
+    fd, temp = tempfile.mkstemp(prefix=".", dir=str(temp_dir))
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in chunks:
+                if digest is not None:
+                    digest.update(chunk)
+
+                out.write(chunk)
+    except Exception:
+        os.remove(temp)
+        raise
+
+    return temp
+
+
+def stat(full_path: str) -> tuple:
+    """Get cached stat of file
+
+    Args:
+        full_path: full path of file
+
+    Returns:
+        tuple (inode, mtime ns, size), raise FileNotFoundError if not exists
+    """
+    value = stat_cache.get(full_path)
+    if value is None:
+        try:
+            st = os.stat(full_path)
+            value = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            # missing file (ex: webp sibling) is cached too
+            value = ()
+
+        stat_cache.set(full_path, value)
+
+    if not value:
+        raise FileNotFoundError(full_path)
+
+    return tuple(value)
+
+
+def forget_stat(full_path: str):
+    """Remove cached stat after file is replaced or deleted"""
+    stat_cache.delete(full_path)
+
+
+def send(full_path: str, mimetype: str = None, filename: str = None) -> Response:
+    """Send file with FILE_SERVE_MODE, front server stream the bytes if possible
+
+    Response has strong ETag (inode, mtime, size) and Last-Modified, 304 is
+    returned before the file is opened. Range is handled here in wsgi mode
+    and by the front server in the other modes.
+
+    Modes:
+        wsgi: Flask send_file, body is ``wsgi.file_wrapper`` so uWSGI or
+            gunicorn use os.sendfile (uWSGI offload it with --offload-threads)
+        x-accel: empty body with X-Accel-Redirect to nginx internal location
+        x-sendfile, uwsgi: empty body with X-Sendfile, for apache mod_xsendfile
+            or uWSGI --collect-header X-Sendfile routing to static offload
+
+    Args:
+        full_path: full path of file, inside STORAGE_PATH or IMAGE_CACHE_PATH
+        mimetype: mimetype, default guessed from filename
+        filename: filename used to guess mimetype
+
+    Returns:
+        Response
+    """
+    inode, mtime_ns, size = stat(full_path)
+    etag = "%x-%x-%x" % (inode, mtime_ns, size)
+    last_modified = datetime.utcfromtimestamp(mtime_ns // 1000000000)
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = Response(status=304)
+        _cache_headers(response, full_path, etag, last_modified)
+        return response
+
+    if mimetype is None:
+        mimetype = mimetypes.guess_type(filename or full_path)[0] or "application/octet-stream"
+
+    mode = SoccerConfig.FILE_SERVE_MODE
+    if mode == "wsgi":
+        try:
+            response = send_file(full_path, mimetype=mimetype, conditional=False, add_etags=False)
+        except FileNotFoundError:
+            # file deleted after stat is cached
+            forget_stat(full_path)
+            raise
+
+        _cache_headers(response, full_path, etag, last_modified)
+        return response.make_conditional(request, accept_ranges=True, complete_length=response.content_length)
+
+    response = Response(mimetype=mimetype)
+    if mode == "x-accel":
+        response.headers["X-Accel-Redirect"] = _accel_uri(full_path)
+    else:
+        response.headers["X-Sendfile"] = full_path
+
+    _cache_headers(response, full_path, etag, last_modified)
+    return response
+
+
+def _cache_headers(response: Response, full_path: str, etag: str, last_modified: datetime):
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.public = True
+    if IMMUTABLE_NAME.search(os.path.basename(full_path)):
+        response.cache_control.max_age = SoccerConfig.FILE_IMMUTABLE_MAX_AGE
+        # werkzeug 0.12 has no immutable property
+        response.headers["Cache-Control"] += ", immutable"
+    else:
+        response.cache_control.max_age = SoccerConfig.FILE_MAX_AGE
+
+
+def _accel_uri(full_path: str) -> str:
+    """Map full path into nginx internal location"""
+    locations = (
+        (SoccerConfig.STORAGE_PATH, SoccerConfig.FILE_ACCEL_PREFIX),
+        (SoccerConfig.IMAGE_CACHE_PATH, SoccerConfig.FILE_ACCEL_VARIANT_PREFIX),
+    )
+    for root, prefix in locations:
+        relative = os.path.relpath(full_path, root)
+        if not relative.startswith(".."):
+            return prefix.rstrip("/") + "/" + quote(relative)
+
+    raise ValueError("%s is not in storage path" % full_path)
+
+
+def alternate_formats() -> list:
+    """Get alternate formats supported by installed Pillow"""
+    global _alternate_formats
+    if _alternate_formats is None:
+        Image.init()
+        _alternate_formats = [fmt for fmt in ALTERNATE_FORMATS if fmt[1] in Image.SAVE]
+
+    return _alternate_formats
+
+
+def save_alternates(image, subdir: str, filename: str, backend=None) -> list:
+    """Save image in every alternate format next to saved file
+
+    Args:
+        image: PIL Image, RGB
+        subdir: subdirectory
+        filename: filename returned by ``save``
+        backend: Storage, default from STORAGE_BACKEND
+
+    Returns:
+        list of saved ext
+    """
+    if backend is None:
+        backend = storage.get_storage()
+
+    saved = []
+    for ext, fmt, _ in alternate_formats():
+        name = filename + "." + ext
+
+        # content hash file already has its sibling
+        if not backend.exists(subdir, name):
+            buffer = io.BytesIO()
+            image.save(buffer, fmt, quality=80)
+            backend.save(subdir, name, _spool(storage.local().directory(subdir), [buffer.getvalue()]))
+            forget_stat(str(path(name, subdir)))
+
+        saved.append(ext)
+
+    return saved
 
 
 def safe_filename(filename, maxchar=40):
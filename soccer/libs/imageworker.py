@@ -0,0 +1,52 @@
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+log = logging.getLogger(__name__)
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Get image process pool of current process
+
+    Pool is created on first use, so every uwsgi worker has its own pool
+    after fork.
+    """
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(max_workers=SoccerConfig.IMAGE_WORKERS)
+            _executor_pid = os.getpid()
+
+        return _executor
+
+
+def enabled() -> bool:
+    """Image is processed in background if IMAGE_WORKERS more than 0"""
+    return SoccerConfig.IMAGE_WORKERS > 0
+
+
+def submit(func, *args, callback=None):
+    """Run func in image worker process
+
+    Args:
+        func: module level function, must be picklable
+        args: argument of func
+        callback: called with the future in this process when func finish
+
+    Returns:
+        Future
+    """
+    future = get_executor().submit(func, *args)
+    if callback is not None:
+        future.add_done_callback(callback)
+
+    return future
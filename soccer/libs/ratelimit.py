@@ -1,31 +1,283 @@
+import logging
+import math
+import os
+import socket
+import threading
 import time
+from urllib.parse import urlparse
 
 from flask import g, request
 from functools import wraps
 
-from soccer.exceptions import BadRequest
+from soccer.exceptions import RateLimitExceeded
+from soccer.libs.cache import LocalCache, SharedMemoryCache
+from configuration import SoccerConfig
 
+log = logging.getLogger(__name__)
 
-class RateLimit(object):
+
+class MemoryStorage(object):
+    """Limiter storage on cache backend, in-process or shared memory"""
+
+    def __init__(self, cache):
+        """
+        Args:
+            cache: CacheBackend instance
+        """
+        self.cache = cache
+
+    def incr(self, key: str, ttl: int) -> int:
+        return self.cache.incr(key, ttl=ttl)
+
+    def get(self, key: str) -> int:
+        return self.cache.get(key, 0)
+
+    def take_token(self, key: str, rate: float, capacity: int, ttl: int):
+        """Take one token from bucket
+
+        Returns:
+            tuple (allowed, tokens left)
+        """
+        def take(state):
+            now = time.time()
+            tokens, updated_at, _ = state or (capacity, now, False)
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                return tokens - 1, now, True
+
+            return tokens, now, False
+
+        tokens, _, allowed = self.cache.update(key, take, ttl=ttl)
+        return allowed, tokens
+
+
+class RedisStorage(object):
+    """Limiter storage on redis, speak RESP protocol directly over socket
+
+    Connection is kept per thread. Token bucket runs as lua script so it
+    is atomic across every host.
+    """
+
+    TOKEN_BUCKET_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, url: str, timeout: float = 0.5):
+        """
+        Args:
+            url: redis://[:password@]host:port/db
+            timeout: socket timeout in seconds
+        """
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.strip("/") or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def incr(self, key: str, ttl: int) -> int:
+        value = self.execute("INCR", key)
+        if value == 1:
+            self.execute("EXPIRE", key, ttl)
+
+        return value
+
+    def get(self, key: str) -> int:
+        return int(self.execute("GET", key) or 0)
+
+    def take_token(self, key: str, rate: float, capacity: int, ttl: int):
+        allowed, tokens = self.execute(
+            "EVAL", self.TOKEN_BUCKET_SCRIPT, 1, key, rate, capacity, time.time(), ttl
+        )
+        return allowed == 1, float(tokens)
+
+    def execute(self, *args):
+        """Send command and read reply, reconnect once if connection is broken"""
+        try:
+            return self._execute(self._connection(), args)
+        except (OSError, ConnectionError):
+            self._close()
+            return self._execute(self._connection(), args)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or conn[2] != os.getpid():
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            conn = (sock, sock.makefile("rb"), os.getpid())
+            self._local.conn = conn
+
+            if self.password:
+                self._execute(conn, ("AUTH", self.password))
+
+            if self.db:
+                self._execute(conn, ("SELECT", self.db))
+
+        return conn
+
+    def _close(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn[0].close()
+            except OSError:
+                pass
+
+    def _execute(self, conn, args):
+        sock, reader, _ = conn
+        sock.sendall(self._encode(args))
+        return self._read_reply(reader)
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b"*%i\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            parts.append(b"$%i\r\n%s\r\n" % (len(arg), arg))
+
+        return b"".join(parts)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("redis connection closed")
+
+        prefix, data = line[:1], line[1:-2]
+        if prefix == b"+":
+            return data.decode("utf-8")
+        elif prefix == b"-":
+            raise RedisError(data.decode("utf-8"))
+        elif prefix == b":":
+            return int(data)
+        elif prefix == b"$":
+            length = int(data)
+            if length == -1:
+                return None
+
+            value = reader.read(length + 2)[:-2]
+            return value.decode("utf-8")
+        elif prefix == b"*":
+            length = int(data)
+            if length == -1:
+                return None
+
+            return [self._read_reply(reader) for _ in range(length)]
+
+        raise ConnectionError("unknown redis reply %r" % line)
+
+
+class RedisError(Exception):
+    """Error reply from redis"""
+
+
+class FixedWindow(object):
+    """Count request per fixed window of ``per`` seconds"""
+
+    # keep key a little longer than window
     expiration_window = 10
 
-    def __init__(self, key_prefix, limit, per, send_x_headers):
-        self.rest = (int(time.time()) // per) * per + per
-        self.key = key_prefix + str(self.reset)
+    def hit(self, storage, key: str, limit: int, per: int):
+        """Count one request
+
+        Returns:
+            tuple (allowed, remaining, reset timestamp)
+        """
+        now = int(time.time())
+        reset = (now // per) * per + per
+        current = storage.incr(key + str(reset), per + self.expiration_window)
+        return current <= limit, max(limit - current, 0), reset
+
+
+class SlidingWindow(object):
+    """Sliding window counter, weight previous window by overlapping time
+
+    Approximate sliding log with two counters, O(1) per request.
+    """
+
+    expiration_window = 10
+
+    def hit(self, storage, key: str, limit: int, per: int):
+        now = time.time()
+        window = int(now // per) * per
+        current = storage.incr(key + str(window), per * 2 + self.expiration_window)
+        previous = storage.get(key + str(window - per))
+
+        weight = 1 - (now - window) / per
+        estimated = previous * weight + current
+        return estimated <= limit, max(int(limit - estimated), 0), window + per
+
+
+class TokenBucket(object):
+    """Bucket of ``limit`` tokens refilled evenly over ``per`` seconds"""
+
+    def hit(self, storage, key: str, limit: int, per: int):
+        rate = limit / per
+        allowed, tokens = storage.take_token(key, rate, limit, per * 2)
+        reset = int(time.time() + (limit - tokens) / rate)
+        return allowed, int(math.floor(tokens)), reset
+
+
+ALGORITHMS = {
+    "fixed": FixedWindow(),
+    "sliding": SlidingWindow(),
+    "token": TokenBucket(),
+}
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Get limiter storage from RATELIMIT_STORAGE config (memory, shm, redis)"""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            kind = SoccerConfig.RATELIMIT_STORAGE
+            if kind == "redis":
+                _storage = RedisStorage(SoccerConfig.RATELIMIT_REDIS_URL)
+            elif kind == "shm":
+                path = os.path.join(SoccerConfig.CACHE_SHM_DIR, "bola-app-ratelimit.cache")
+                _storage = MemoryStorage(SharedMemoryCache(path, max_size=65536, slot_size=96))
+            else:
+                _storage = MemoryStorage(LocalCache(max_size=65536))
+
+        return _storage
+
+
+class RateLimit(object):
+
+    def __init__(self, key_prefix, limit, per, send_x_headers, algorithm=None, storage=None):
+        self.key = key_prefix
         self.limit = limit
         self.per = per
         self.send_x_headers = send_x_headers
-        value = cache.incr(self.key)
-        cache.expireat(self.key, self.reset + self.expiration_window)
-        self.current = min(value, limit)
+        algorithm = ALGORITHMS[algorithm or SoccerConfig.RATELIMIT_ALGORITHM]
+        storage = storage or get_storage()
 
-    @property
-    def remaining(self):
-        return self.limit - self.current
+        try:
+            allowed, self.remaining, self.reset = algorithm.hit(storage, self.key, limit, per)
+        except (OSError, ConnectionError, RedisError):
+            # fail open, rate limit storage must not break the endpoint
+            log.exception("rate limit storage error")
+            allowed, self.remaining, self.reset = True, limit, int(time.time()) + per
 
-    @property
-    def over_limit(self):
-        return self.current >= self.limit
+        self.over_limit = not allowed
 
 
 def get_view_rate_limit():
@@ -34,15 +286,26 @@ def get_view_rate_limit():
 
 def ratelimit(limit, per=300, send_x_headers=True,
               scope_func=lambda: request.remote_addr,
-              key_func=lambda: request.endpoint):
+              key_func=lambda: request.endpoint,
+              algorithm=None):
+    """Decorator rate limit endpoint
+
+    Args:
+        limit: maximum request per ``per`` seconds
+        per: window in seconds
+        send_x_headers: send X-RateLimit-* headers
+        scope_func: limit scope, default client ip
+        key_func: limit key, default endpoint
+        algorithm: fixed, sliding or token, default RATELIMIT_ALGORITHM
+    """
     def decorator(f):
         @wraps(f)
         def rate_limited(*args, **kwargs):
             key = 'rate-limit/%s/%s/' % (key_func(), scope_func())
-            rlimit = RateLimit(key, limit, per, send_x_headers)
+            rlimit = RateLimit(key, limit, per, send_x_headers, algorithm)
             g._view_rate_limit = rlimit
             if rlimit.over_limit:
-                raise BadRequest("You hit the rate limit")
+                raise RateLimitExceeded
             return f(*args, **kwargs)
         return rate_limited
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,165 @@
+import random
+import time
+from urllib.parse import urlencode
+
+from flask import current_app, g, request
+
+from soccer import metrics
+from soccer.libs import transaction
+from soccer.libs.cache import get_cache
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+response_store = get_cache(
+    "response", max_size=SoccerConfig.RESPONSE_CACHE_SIZE,
+    ttl=SoccerConfig.RESPONSE_CACHE_TTL + SoccerConfig.RESPONSE_CACHE_STALE,
+    slot_size=SoccerConfig.RESPONSE_CACHE_SLOT_SIZE
+)
+
+# interval cek response dari request lain yang sedang merender key yang sama
+WAIT_INTERVAL = 0.01
+
+
+def cached(tags: tuple, ttl: int = None, stale: int = None):
+    """Decorator cache whole response of anonymous GET endpoint
+
+    Response is served from before request, the view, controller and rate
+    limit of the endpoint are skipped on hit.
+
+    Args:
+        tags: data the response depends on, ex: ("player",), see ``invalidate``
+        ttl: fresh time in seconds, default RESPONSE_CACHE_TTL
+        stale: seconds after ttl the old response is still served while
+            one request render the new one, default RESPONSE_CACHE_STALE
+    """
+    def decorator(f):
+        f.response_cache = (tuple(tags), ttl, stale)
+        return f
+
+    return decorator
+
+
+def invalidate(*tags):
+    """Drop every cached response with one of the tags
+
+    Call it after commit, response rendered from the old data before it is
+    stored under the old generation and never read again.
+
+    Args:
+        tags: tag of changed data, ex: "player"
+    """
+    for tag in tags:
+        response_store.bump("tag:" + tag)
+
+
+def _rule():
+    """Cache rule of current request, None if it must not be cached"""
+    if not SoccerConfig.RESPONSE_CACHE_ENABLED or request.method != "GET":
+        return None
+
+    # response may depend on the user
+    if getattr(g, "user_auth", None) is not None or "Authorization" in request.headers:
+        return None
+
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(view, "response_cache", None)
+
+
+def _key(tags: tuple) -> str:
+    """Key from tag generations, path and sorted query args"""
+    generations = ",".join(str(response_store.generation("tag:" + tag)) for tag in tags)
+    query = urlencode(sorted(request.args.items(multi=True)))
+    return "response:%s:%s?%s" % (generations, request.path, query)
+
+
+def _acquire(key: str) -> bool:
+    """Take render lock of key, only one request render the same key"""
+    token = random.getrandbits(62)
+    lock_ttl = max(1, int(SoccerConfig.RESPONSE_CACHE_WAIT * 2))
+    return response_store.update("lock:" + key, lambda value: value or token, ttl=lock_ttl) == token
+
+
+def _respond(entry: tuple, result: str):
+    _, _, render_seconds, content_type, body = entry
+    metrics.RESPONSE_CACHE.labels("bola-app", request.url_rule, result).inc()
+    metrics.RESPONSE_CACHE_SAVED_SECONDS.labels("bola-app", request.url_rule).inc(render_seconds)
+
+    response = current_app.response_class(body, status=200, content_type=content_type)
+    response.headers["X-Cache"] = result.upper()
+    return response
+
+
+def lookup():
+    """Serve cached response of current request
+
+    Called in before request. Fresh entry is served. Stale entry is served
+    while another request is rendering it again, the request that takes the
+    render lock continue to the view. On miss only one request render, the
+    others wait up to RESPONSE_CACHE_WAIT seconds for its response.
+
+    Returns:
+        flask Response, None to continue to the view
+    """
+    rule = _rule()
+    if rule is None:
+        return None
+
+    tags, ttl, stale = rule
+    key = _key(tags)
+    entry = response_store.get(key)
+    now = time.time()
+
+    if entry is not None and now < entry[0]:
+        return _respond(entry, "hit")
+
+    locked = _acquire(key)
+    if entry is not None and now < entry[1]:
+        if not locked:
+            return _respond(entry, "stale")
+
+        result = "refresh"
+    else:
+        result = "miss"
+        if not locked:
+            deadline = now + SoccerConfig.RESPONSE_CACHE_WAIT
+            while time.time() < deadline:
+                time.sleep(WAIT_INTERVAL)
+                entry = response_store.get(key)
+                if entry is not None:
+                    return _respond(entry, "coalesced")
+
+    metrics.RESPONSE_CACHE.labels("bola-app", request.url_rule, result).inc()
+    g.response_cache = (key, ttl, stale, locked)
+
+    # rendered response is cached, never render it from a lagging replica
+    transaction.read_primary()
+    return None
+
+
+def store(response):
+    """Store response rendered by the view and release the render lock
+
+    Called in after request, only 200 response that fit a cache slot is
+    stored.
+    """
+    context = getattr(g, "response_cache", None)
+    if context is None:
+        return response
+
+    key, ttl, stale, locked = context
+    g.response_cache = None
+    try:
+        if response.status_code == 200 and not response.direct_passthrough:
+            ttl = SoccerConfig.RESPONSE_CACHE_TTL if ttl is None else ttl
+            stale = SoccerConfig.RESPONSE_CACHE_STALE if stale is None else stale
+            now = time.time()
+            render_seconds = now - getattr(g, "request_start_time", now)
+            entry = (now + ttl, now + ttl + stale, render_seconds, response.content_type, response.get_data())
+            response_store.set(key, entry, ttl=ttl + stale)
+            response.headers["X-Cache"] = "MISS"
+    finally:
+        if locked:
+            response_store.delete("lock:" + key)
+
+    return response
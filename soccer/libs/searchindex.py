@@ -0,0 +1,330 @@
+import bisect
+import re
+import threading
+import time
+from collections import defaultdict
+from string import punctuation
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+_PUNCTUATION = re.compile("[%s]" % re.escape(punctuation))
+_WHITESPACE = re.compile(r"\s+")
+
+# urutan rank sama dengan CASE "match" pada query search sebelumnya
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_CONTAINS = 2
+
+
+def normalize(text: str) -> str:
+    """Normalize name for indexing
+
+    Args:
+        text: name to normalize
+
+    Returns:
+        str lowercase name without punctuation and duplicate whitespace
+    """
+    if not text:
+        return ""
+
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def grams(text: str, size: int) -> set:
+    """Split text into n-grams
+
+    Args:
+        text: normalized text
+        size: gram length
+
+    Returns:
+        set of n-grams
+    """
+    if len(text) <= size:
+        return {text} if text else set()
+
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class TrigramIndex(object):
+    """In-memory n-gram index for substring search over entity names
+
+    Every name is indexed with 1, 2 and 3-grams so short keywords still
+    resolve through the posting lists instead of scanning all names.
+    """
+
+    gram_size = 3
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._names = {}
+        self._postings = defaultdict(set)
+        self.loaded_at = None
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, entity_id):
+        return entity_id in self._names
+
+    def is_stale(self, ttl: int) -> bool:
+        """Check index need to rebuild
+
+        Args:
+            ttl: maximum age of the index in seconds, 0 to never expire
+        """
+        if self.loaded_at is None:
+            return True
+
+        return bool(ttl) and time.time() - self.loaded_at > ttl
+
+    def rebuild(self, rows):
+        """Replace the whole index
+
+        Args:
+            rows: iterable of (entity_id, name, name, ...)
+        """
+        names = {}
+        postings = defaultdict(set)
+        for entity_id, *entity_names in rows:
+            normalized = self._normalize_all(entity_names)
+            names[entity_id] = normalized
+            for gram in self._grams_all(normalized):
+                postings[gram].add(entity_id)
+
+        with self._lock:
+            self._names = names
+            self._postings = postings
+            self.loaded_at = time.time()
+
+    def add(self, entity_id: int, *entity_names):
+        """Add or replace entity names in index
+
+        Args:
+            entity_id: id entity
+            entity_names: names of entity, first name is used for sorting
+        """
+        normalized = self._normalize_all(entity_names)
+        with self._lock:
+            self._discard(entity_id)
+            self._names[entity_id] = normalized
+            for gram in self._grams_all(normalized):
+                self._postings[gram].add(entity_id)
+
+    def remove(self, entity_id: int):
+        """Remove entity from index
+
+        Args:
+            entity_id: id entity
+        """
+        with self._lock:
+            self._discard(entity_id)
+
+    def name(self, entity_id: int) -> str:
+        """Get normalized primary name of entity"""
+        names = self._names.get(entity_id)
+        return names[0] if names else ""
+
+    def search(self, keyword: str) -> list:
+        """Search entity by keyword
+
+        Args:
+            keyword: keyword
+
+        Returns:
+            list of (entity_id, rank) tuple, unordered
+        """
+        keyword = normalize(keyword)
+        if not keyword:
+            return []
+
+        size = min(len(keyword), self.gram_size)
+        with self._lock:
+            postings = [self._postings.get(gram) for gram in grams(keyword, size)]
+            if not all(postings):
+                return []
+
+            # intersect from the smallest posting list
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting
+                if not candidates:
+                    return []
+
+            results = []
+            for entity_id in candidates:
+                rank = self._rank(self._names[entity_id], keyword)
+                if rank is not None:
+                    results.append((entity_id, rank))
+
+        return results
+
+    def _discard(self, entity_id):
+        names = self._names.pop(entity_id, None)
+        if names is None:
+            return
+
+        for gram in self._grams_all(names):
+            posting = self._postings.get(gram)
+            if posting is None:
+                continue
+
+            posting.discard(entity_id)
+            if not posting:
+                del self._postings[gram]
+
+    def _normalize_all(self, entity_names):
+        return tuple(normalize(name) for name in entity_names)
+
+    def _grams_all(self, names):
+        result = set()
+        for name in names:
+            for size in range(1, self.gram_size + 1):
+                result |= grams(name, size)
+
+        return result
+
+    @staticmethod
+    def _rank(names, keyword):
+        """Rank match between names and keyword, None if not match"""
+        rank = None
+        for name in names:
+            if name == keyword:
+                return RANK_EXACT
+            elif name.startswith(keyword):
+                current = RANK_PREFIX
+            elif keyword in name:
+                current = RANK_CONTAINS
+            else:
+                continue
+
+            if rank is None or current < rank:
+                rank = current
+
+        return rank
+
+
+class PrefixIndex(object):
+    """Sorted array of normalized names for prefix autocomplete
+
+    Every word of a name is also a key so "mes" matches "Lionel Messi".
+    Lookups are a bisect plus a bounded forward scan.
+    """
+
+    # maximum key yang discan per suggest dibanding limit
+    scan_factor = 20
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []
+        self._entries = {}
+        self.loaded_at = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def rebuild(self, rows):
+        """Replace the whole index
+
+        Args:
+            rows: iterable of (entity_id, name, name, ...), first name is displayed
+        """
+        keys = []
+        entries = {}
+        for entity_id, *entity_names in rows:
+            entity_keys = self._keys_for(entity_names)
+            entries[entity_id] = (entity_names[0], entity_keys)
+            keys.extend((key, entity_id) for key in entity_keys)
+
+        keys.sort()
+        with self._lock:
+            self._keys = keys
+            self._entries = entries
+            self.loaded_at = time.time()
+
+    def add(self, entity_id: int, *entity_names):
+        """Add or replace entity names in index
+
+        Args:
+            entity_id: id entity
+            entity_names: names of entity, first name is displayed
+        """
+        entity_keys = self._keys_for(entity_names)
+        with self._lock:
+            self._discard(entity_id)
+            self._entries[entity_id] = (entity_names[0], entity_keys)
+            for key in entity_keys:
+                bisect.insort(self._keys, (key, entity_id))
+
+    def remove(self, entity_id: int):
+        """Remove entity from index
+
+        Args:
+            entity_id: id entity
+        """
+        with self._lock:
+            self._discard(entity_id)
+
+    def suggest(self, prefix: str, limit: int = 5) -> list:
+        """Get entities with a name starting with prefix
+
+        Args:
+            prefix: prefix typed by user
+            limit: maximum result
+
+        Returns:
+            list of (entity_id, name) tuple, exact and shorter names first
+        """
+        prefix = normalize(prefix)
+        if not prefix or limit <= 0:
+            return []
+
+        found = {}
+        with self._lock:
+            keys = self._keys
+            position = bisect.bisect_left(keys, (prefix,))
+            end = min(len(keys), position + limit * self.scan_factor)
+            while position < end:
+                key, entity_id = keys[position]
+                if not key.startswith(prefix):
+                    break
+
+                exact = key == prefix
+                if entity_id not in found or exact:
+                    found[entity_id] = exact
+                position += 1
+
+            entries = self._entries
+            ranked = sorted(
+                found.items(),
+                key=lambda item: (not item[1], len(entries[item[0]][0]), item[0])
+            )
+            return [(entity_id, entries[entity_id][0]) for entity_id, _ in ranked[:limit]]
+
+    def _discard(self, entity_id):
+        entry = self._entries.pop(entity_id, None)
+        if entry is None:
+            return
+
+        for key in entry[1]:
+            position = bisect.bisect_left(self._keys, (key, entity_id))
+            if position < len(self._keys) and self._keys[position] == (key, entity_id):
+                del self._keys[position]
+
+    @staticmethod
+    def _keys_for(entity_names):
+        keys = set()
+        for name in entity_names:
+            name = normalize(name)
+            if not name:
+                continue
+
+            keys.add(name)
+            words = name.split(" ")
+            for i in range(1, len(words)):
+                keys.add(" ".join(words[i:]))
+
+        return tuple(keys)
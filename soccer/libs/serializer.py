@@ -0,0 +1,228 @@
+import json
+import logging
+import threading
+
+from flask import current_app, request
+
+from soccer import metrics
+from soccer.libs.cache import get_cache
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+log = logging.getLogger(__name__)
+
+fragment_store = get_cache(
+    "json_fragment", max_size=SoccerConfig.JSON_FRAGMENT_CACHE_SIZE, ttl=SoccerConfig.ENTITY_CACHE_TTL,
+    slot_size=1024
+)
+
+
+class Fragment(object):
+    """JSON value that is already encoded, written to the output as is"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        """
+        Args:
+            data: encoded json
+        """
+        self.data = data
+
+    def load(self):
+        """Decode fragment back to python value"""
+        return json.loads(self.data.decode("utf-8"))
+
+
+def _orjson():
+    import orjson
+    return orjson.dumps
+
+
+def _simplejson():
+    import simplejson
+
+    def dumps(obj) -> bytes:
+        return simplejson.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    return dumps
+
+
+def _json():
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    return dumps
+
+
+ENCODERS = {
+    "orjson": _orjson,
+    "simplejson": _simplejson,
+    "json": _json,
+}
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def get_encoder():
+    """Get compact encoder from JSON_ENCODER config, function obj -> bytes
+
+    ``auto`` pick the fastest installed one: orjson, simplejson, json.
+    Missing encoder fall back to the next one.
+    """
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            name = SoccerConfig.JSON_ENCODER
+            names = ("orjson", "simplejson", "json")
+            if name in names:
+                names = names[names.index(name):]
+            elif name != "auto":
+                log.warning("unknown JSON_ENCODER %r, use auto", name)
+
+            for candidate in names:
+                try:
+                    _encoder = ENCODERS[candidate]()
+                    break
+                except ImportError:
+                    if candidate == name:
+                        log.warning("JSON_ENCODER %s is not installed, fallback", name)
+
+        return _encoder
+
+
+def _has_fragment(value) -> bool:
+    if isinstance(value, Fragment):
+        return True
+
+    if isinstance(value, (list, tuple)):
+        return any(isinstance(item, Fragment) for item in value)
+
+    return False
+
+
+def dumps(obj) -> bytes:
+    """Encode obj to compact json
+
+    Fragment is allowed as value of the top level dict or list, or as item
+    of a list in it. Only the parts without fragment go to the encoder, the
+    fragments are joined as is.
+
+    Args:
+        obj: json serializable value
+
+    Returns:
+        bytes utf-8 json
+    """
+    if isinstance(obj, Fragment):
+        return obj.data
+
+    encoder = get_encoder()
+    if isinstance(obj, dict) and any(_has_fragment(value) for value in obj.values()):
+        return b"{" + b",".join(
+            encoder(str(key)) + b":" + _dumps_value(value, encoder) for key, value in obj.items()
+        ) + b"}"
+
+    if isinstance(obj, (list, tuple)) and _has_fragment(obj):
+        return _dumps_value(obj, encoder)
+
+    return encoder(obj)
+
+
+def _dumps_value(value, encoder) -> bytes:
+    if isinstance(value, Fragment):
+        return value.data
+
+    if isinstance(value, (list, tuple)) and _has_fragment(value):
+        return b"[" + b",".join(
+            item.data if isinstance(item, Fragment) else encoder(item) for item in value
+        ) + b"]"
+
+    return encoder(value)
+
+
+def _plain(obj):
+    """Replace fragments with decoded value, for pretty print"""
+    if isinstance(obj, Fragment):
+        return obj.load()
+
+    if isinstance(obj, dict):
+        return {key: _plain(value) for key, value in obj.items()}
+
+    if isinstance(obj, (list, tuple)):
+        return [_plain(item) for item in obj]
+
+    return obj
+
+
+def jsonify(obj, status: int = 200):
+    """Create json response, replacement of ``flask.jsonify`` that accept fragments
+
+    Pretty print follow JSONIFY_PRETTYPRINT_REGULAR like flask, it decode
+    the fragments so only use it for debugging.
+
+    Args:
+        obj: response dict
+        status: http status code
+
+    Returns:
+        flask Response
+    """
+    config = current_app.config
+    if config.get("JSONIFY_PRETTYPRINT_REGULAR") and not request.is_xhr:
+        body = (json.dumps(_plain(obj), indent=2, separators=(", ", ": ")) + "\n").encode("utf-8")
+    else:
+        body = dumps(obj)
+
+    return current_app.response_class(
+        body, status=status, mimetype=config.get("JSONIFY_MIMETYPE", "application/json")
+    )
+
+
+def fragments(kind: str, entities, build, versions, loaded_version) -> list:
+    """Encode entities, reuse cached bytes of entity that did not change
+
+    Key of the cache is (kind, id, version), changed entity get a new
+    version so the old fragment is never read again and expire by itself.
+
+    Entity written after it was loaded get its new version before we read
+    it, the old data would be stored under the new version. New fragment is
+    only stored when the table version is still the one read before the
+    query, otherwise it is only used for this response.
+
+    Args:
+        kind: name of the dict shape, different shape of the same entity must use different kind
+        entities: list of model instance
+        build: function entity -> dict, only called on cache miss
+        versions: ``EntityCache`` of the model
+        loaded_version: ``versions.table_version()`` read before the entities were loaded
+
+    Returns:
+        list of Fragment
+    """
+    encoder = get_encoder()
+    result = []
+    missed = []
+    for entity in entities:
+        key = "fragment:%s:%s:%s" % (kind, entity.id, versions.version(entity.id))
+        data = fragment_store.get(key)
+        if data is None:
+            data = encoder(build(entity))
+            missed.append((key, data))
+
+        result.append(Fragment(data))
+
+    if missed and versions.table_version() == loaded_version:
+        for key, data in missed:
+            fragment_store.set(key, data)
+
+    hit = len(result) - len(missed)
+    if hit:
+        metrics.JSON_FRAGMENT_HIT.labels("bola-app", kind).inc(hit)
+
+    if missed:
+        metrics.JSON_FRAGMENT_MISS.labels("bola-app", kind).inc(len(missed))
+
+    return result
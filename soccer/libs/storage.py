@@ -0,0 +1,373 @@
+import hashlib
+import hmac
+import mimetypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from urllib.parse import quote, urlparse
+from xml.etree import ElementTree
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StorageError(Exception):
+    """Error response from storage backend"""
+
+
+class Storage(object):
+    """File storage interface used by ``soccer.libs.file``
+
+    Files are addressed by subdir and name, url is the public url of the
+    file.
+    """
+
+    def save(self, subdir: str, name: str, temp_path: str):
+        """Store local temporary file as subdir/name
+
+        Args:
+            subdir: subdirectory
+            name: filename
+            temp_path: temporary file, moved or deleted by the backend
+        """
+        raise NotImplementedError
+
+    def open(self, subdir: str, name: str):
+        """Open file for reading, raise FileNotFoundError if not exists
+
+        Returns:
+            binary file object, caller must close it
+        """
+        raise NotImplementedError
+
+    def url(self, subdir: str, name: str) -> str:
+        """Get public url of file"""
+        raise NotImplementedError
+
+    def exists(self, subdir: str, name: str) -> bool:
+        """Check file exists"""
+        raise NotImplementedError
+
+    def delete(self, subdir: str, name: str):
+        """Delete file if exists"""
+        raise NotImplementedError
+
+
+def shard(name: str) -> tuple:
+    """Get nested directory of filename, from hash of the name stem
+
+    Sibling (<name>.jpg.webp) and variant share the directory of the file.
+
+    Args:
+        name: filename
+
+    Returns:
+        tuple of 2 directory name, ex: ("3f", "a9")
+    """
+    stem = name.split(".")[0]
+    digest = hashlib.blake2b(stem.encode("utf-8"), digest_size=2).hexdigest()
+    return digest[:2], digest[2:]
+
+
+class LocalStorage(Storage):
+    """Storage on local disk, STORAGE_PATH/<subdir>/xx/yy/<name> served by /file
+
+    Files from before sharding (STORAGE_PATH/<subdir>/<name>) are still read.
+    """
+
+    def __init__(self, root: str = None, static_url: str = None):
+        """
+        Args:
+            root: storage directory, default STORAGE_PATH
+            static_url: base url, default STATIC_URL
+        """
+        self._root = root
+        self._static_url = static_url
+
+    @property
+    def root(self) -> Path:
+        return Path(self._root or SoccerConfig.STORAGE_PATH)
+
+    def directory(self, subdir: str) -> Path:
+        """Get directory of subdir, the flat layout"""
+        return self.root / subdir if subdir else self.root
+
+    def path(self, subdir: str, name: str) -> Path:
+        """Get sharded path of file"""
+        return self.directory(subdir).joinpath(*shard(name)) / name
+
+    def save(self, subdir, name, temp_path):
+        target = self.path(subdir, name)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_path, str(target))
+
+    def open(self, subdir, name):
+        try:
+            return self.path(subdir, name).open("rb")
+        except FileNotFoundError:
+            return (self.directory(subdir) / name).open("rb")
+
+    def url(self, subdir, name):
+        static_url = self._static_url or SoccerConfig.STATIC_URL
+        if subdir:
+            static_url = static_url + "/" + subdir
+
+        return static_url + "/" + name
+
+    def exists(self, subdir, name):
+        return self.path(subdir, name).is_file() or (self.directory(subdir) / name).is_file()
+
+    def delete(self, subdir, name):
+        for path in (self.path(subdir, name), self.directory(subdir) / name):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class S3Storage(Storage):
+    """Storage on S3 compatible server (AWS S3, MinIO), path style bucket
+
+    Request is signed with AWS signature v4. Connections are pooled per
+    process, big file is uploaded as multipart with parts sent in parallel.
+    """
+
+    def __init__(self, endpoint: str, bucket: str, access_key: str, secret_key: str,
+                 region: str = "us-east-1", public_url: str = None,
+                 part_size: int = 8 * 1024 * 1024, concurrency: int = 4, timeout: float = 30):
+        """
+        Args:
+            endpoint: server url, ex: http://127.0.0.1:9000
+            bucket: bucket name
+            access_key: access key
+            secret_key: secret key
+            region: region for signature
+            public_url: base url of file, default <endpoint>/<bucket>
+            part_size: multipart part size, minimum 5MB except last part
+            concurrency: parts uploaded at once, also connection pool size
+            timeout: request timeout in seconds
+        """
+        self.endpoint = endpoint.rstrip("/")
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.public_url = (public_url or "%s/%s" % (self.endpoint, bucket)).rstrip("/")
+        self.part_size = part_size
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.host = urlparse(self.endpoint).netloc
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def save(self, subdir, name, temp_path):
+        key = self._key(subdir, name)
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        try:
+            size = os.path.getsize(temp_path)
+            if size <= self.part_size:
+                with open(temp_path, "rb") as f:
+                    self._request("PUT", key, data=f.read(), headers={"Content-Type": content_type})
+            else:
+                self._upload_multipart(key, temp_path, size, content_type)
+        finally:
+            os.remove(temp_path)
+
+    def open(self, subdir, name):
+        response = self._request("GET", self._key(subdir, name), stream=True, not_found=True)
+        if response is None:
+            raise FileNotFoundError("%s/%s" % (subdir, name))
+
+        # only a small file is kept in memory
+        spooled = SpooledTemporaryFile(max_size=1024 * 1024)
+        try:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                spooled.write(chunk)
+        except Exception:
+            spooled.close()
+            raise
+        finally:
+            response.close()
+
+        spooled.seek(0)
+        return spooled
+
+    def url(self, subdir, name):
+        return self.public_url + "/" + quote(self._key(subdir, name))
+
+    def exists(self, subdir, name):
+        return self._request("HEAD", self._key(subdir, name), not_found=True) is not None
+
+    def delete(self, subdir, name):
+        self._request("DELETE", self._key(subdir, name), not_found=True)
+
+    @staticmethod
+    def _key(subdir: str, name: str) -> str:
+        return subdir + "/" + name if subdir else name
+
+    def _upload_multipart(self, key: str, temp_path: str, size: int, content_type: str):
+        response = self._request("POST", key, {"uploads": ""}, headers={"Content-Type": content_type})
+        upload_id = self._xml_text(response.content, "UploadId")
+
+        def upload_part(number):
+            # every thread read its own part, memory is concurrency * part_size
+            with open(temp_path, "rb") as f:
+                f.seek((number - 1) * self.part_size)
+                data = f.read(self.part_size)
+
+            part = self._request("PUT", key, {"partNumber": number, "uploadId": upload_id}, data=data)
+            return number, part.headers["ETag"]
+
+        count = (size + self.part_size - 1) // self.part_size
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                parts = list(executor.map(upload_part, range(1, count + 1)))
+
+            body = "<CompleteMultipartUpload>%s</CompleteMultipartUpload>" % "".join(
+                "<Part><PartNumber>%i</PartNumber><ETag>%s</ETag></Part>" % part for part in parts
+            )
+            response = self._request("POST", key, {"uploadId": upload_id}, data=body.encode("utf-8"))
+
+            # error can be returned with status 200
+            if b"<Error>" in response.content:
+                raise StorageError(response.content.decode("utf-8", "replace"))
+        except Exception:
+            self._request("DELETE", key, {"uploadId": upload_id}, not_found=True)
+            raise
+
+    def _session(self) -> requests.Session:
+        """Get connection pool of current process"""
+        pid = os.getpid()
+        with self._lock:
+            session = self._sessions.get(pid)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency, max_retries=2)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions = {pid: session}
+
+            return session
+
+    def _request(self, method: str, key: str, params: dict = None, data: bytes = b"",
+                 headers: dict = None, stream: bool = False, not_found: bool = False):
+        """Send signed request
+
+        Args:
+            not_found: return None on 404 instead of raising StorageError
+
+        Returns:
+            requests.Response
+        """
+        path = "/%s/%s" % (self.bucket, quote(key, safe="/-_.~"))
+        query = self._canonical_query(params or {})
+        headers = self._sign(method, path, query, dict(headers or {}), hashlib.sha256(data).hexdigest())
+
+        url = self.endpoint + path + ("?" + query if query else "")
+        response = self._session().request(
+            method, url, data=data or None, headers=headers, stream=stream, timeout=self.timeout
+        )
+
+        if not_found and response.status_code == 404:
+            response.close()
+            return None
+
+        if response.status_code >= 300:
+            raise StorageError("%s %s: %i %s" % (method, key, response.status_code, response.text[:500]))
+
+        return response
+
+    @staticmethod
+    def _canonical_query(params: dict) -> str:
+        return "&".join(
+            "%s=%s" % (quote(str(k), safe="-_.~"), quote(str(v), safe="-_.~"))
+            for k, v in sorted(params.items())
+        )
+
+    def _sign(self, method: str, path: str, query: str, headers: dict, payload_hash: str) -> dict:
+        """Add AWS signature v4 headers"""
+        now = datetime.utcnow()
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date = now.strftime("%Y%m%d")
+
+        headers["Host"] = self.host
+        headers["X-Amz-Date"] = amz_date
+        headers["X-Amz-Content-Sha256"] = payload_hash
+
+        canonical = sorted((k.lower(), " ".join(str(v).split())) for k, v in headers.items())
+        signed_headers = ";".join(k for k, _ in canonical)
+        canonical_request = "\n".join([
+            method,
+            path,
+            query,
+            "".join("%s:%s\n" % item for item in canonical),
+            signed_headers,
+            payload_hash,
+        ])
+
+        scope = "%s/%s/s3/aws4_request" % (date, self.region)
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ])
+
+        key = ("AWS4" + self.secret_key).encode("utf-8")
+        for value in (date, self.region, "s3", "aws4_request"):
+            key = hmac.new(key, value.encode("utf-8"), hashlib.sha256).digest()
+
+        signature = hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+        headers["Authorization"] = "AWS4-HMAC-SHA256 Credential=%s/%s, SignedHeaders=%s, Signature=%s" % (
+            self.access_key, scope, signed_headers, signature
+        )
+        return headers
+
+    @staticmethod
+    def _xml_text(content: bytes, tag: str) -> str:
+        for element in ElementTree.fromstring(content).iter():
+            if element.tag.split("}")[-1] == tag:
+                return element.text
+
+        raise StorageError("%s not found in response" % tag)
+
+
+_local = LocalStorage()
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def local() -> LocalStorage:
+    """Get local disk storage, for temporary file and /file"""
+    return _local
+
+
+def get_storage() -> Storage:
+    """Get storage from STORAGE_BACKEND config (local, s3)"""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if SoccerConfig.STORAGE_BACKEND == "s3":
+                _storage = S3Storage(
+                    endpoint=SoccerConfig.S3_ENDPOINT,
+                    bucket=SoccerConfig.S3_BUCKET,
+                    access_key=SoccerConfig.S3_ACCESS_KEY,
+                    secret_key=SoccerConfig.S3_SECRET_KEY,
+                    region=SoccerConfig.S3_REGION,
+                    public_url=SoccerConfig.S3_PUBLIC_URL or None,
+                    part_size=SoccerConfig.S3_PART_SIZE,
+                    concurrency=SoccerConfig.S3_CONCURRENCY,
+                )
+            else:
+                _storage = _local
+
+        return _storage
@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+# method http yang tidak mengubah data
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def read_only(f):
+    """Decorator to declare endpoint never write to database, the
+    transaction is not committed. Must be placed below ``bp.route``"""
+    f.read_only = True
+    return f
+
+
+def read_write(f):
+    """Decorator to force commit on endpoint with safe http method.
+    Must be placed below ``bp.route``"""
+    f.read_only = False
+    return f
+
+
+def is_read_only() -> bool:
+    """Check current request is read only, by endpoint decorator or http method"""
+    read_only_request = getattr(g, "_read_only", None)
+    if read_only_request is None:
+        view = current_app.view_functions.get(request.endpoint)
+        read_only_request = getattr(view, "read_only", None)
+        if read_only_request is None:
+            read_only_request = request.method in SAFE_METHODS
+
+        g._read_only = read_only_request
+
+    return read_only_request
+
+
+@contextmanager
+def primary(session):
+    """Send reads inside the block to primary
+
+    Use it when the result fill a cache shared by other requests, rows
+    from a lagging replica would stay cached for the whole TTL.
+
+    Args:
+        session: sqlalchemy session
+    """
+    session.info["primary"] = session.info.get("primary", 0) + 1
+    try:
+        yield
+    finally:
+        session.info["primary"] -= 1
+
+
+def read_primary():
+    """Send every read of current request to primary"""
+    g._read_primary = True
+
+
+def reads_primary(session) -> bool:
+    """Check reads of session must go to primary"""
+    if session.info.get("primary") or session.info.get("replica_failed"):
+        return True
+
+    return has_request_context() and getattr(g, "_read_primary", False)
+
+
+def has_connection(session) -> bool:
+    """Check session transaction already use a database connection"""
+    transaction = session.transaction
+    return transaction is not None and bool(transaction._connections)
+
+
+def has_writes(session) -> bool:
+    """Check session has flushed or pending changes"""
+    return bool(
+        session.info.get("has_writes") or session.new or session.dirty or session.deleted
+    )
+
+
+def finish_read_only(session):
+    """Release connection of read only request without COMMIT
+
+    The transaction is ended with one ROLLBACK by ``RoutingSession.close``,
+    the pool does not reset the connection again (pool_reset_on_return is
+    None, see ``SoccerDB.apply_driver_hacks``).
+
+    Args:
+        session: sqlalchemy session
+    """
+    session.close()
@@ -0,0 +1,136 @@
+import io
+from tempfile import SpooledTemporaryFile
+
+from flask import Request
+from PIL import Image
+
+from soccer.exceptions import FileTooLarge, InvalidImage
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+# magic bytes format image yang diterima
+MAGIC_BYTES = (
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"GIF87a", "GIF"),
+    (b"GIF89a", "GIF"),
+)
+
+# header JPEG bisa panjang karena EXIF thumbnail
+HEADER_LIMIT = 256 * 1024
+
+# header yang belum lengkap di-parse lagi setelah ukurannya 2x lipat, minimal bertambah sebanyak ini
+HEADER_PARSE_STEP = 4 * 1024
+
+
+def sniff(data: bytes) -> str:
+    """Get image format from magic bytes
+
+    Args:
+        data: first bytes of file, at least 12 bytes
+
+    Returns:
+        str format, None if not supported image
+    """
+    for magic, fmt in MAGIC_BYTES:
+        if data.startswith(magic):
+            return fmt
+
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "WEBP"
+
+    return None
+
+
+class ImageUploadStream(SpooledTemporaryFile):
+    """Upload file validated while the bytes arrive
+
+    Magic bytes are checked on the first write and dimensions once the
+    header is parsed, upload bigger than UPLOAD_MAX_BYTES is aborted.
+    Only UPLOAD_SPOOL_SIZE bytes are kept in memory, the rest is in a
+    temporary file.
+    """
+
+    def __init__(self, max_bytes: int, max_pixels: int, spool_size: int):
+        """
+        Args:
+            max_bytes: maximum file size
+            max_pixels: maximum width * height
+            spool_size: bytes kept in memory
+        """
+        super(ImageUploadStream, self).__init__(max_size=spool_size)
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.written = 0
+        self.format = None
+        self.size = None
+        self._header = bytearray()
+        # parse header again when it reach this length
+        self._parse_at = 12
+
+    def write(self, data):
+        self.written += len(data)
+        if self.written > self.max_bytes:
+            raise FileTooLarge("Ukuran file maksimal %i MB" % (self.max_bytes // (1024 * 1024)))
+
+        if self.size is None:
+            self._check_header(data)
+
+        return super(ImageUploadStream, self).write(data)
+
+    def seek(self, *args):
+        # werkzeug seek to start after the last write, parse header that was
+        # waiting for more bytes
+        if self.size is None and len(self._header) >= 12:
+            self._parse_at = 0
+            self._check_header(b"")
+
+        return super(ImageUploadStream, self).seek(*args)
+
+    def _check_header(self, data: bytes):
+        self._header += data
+        if len(self._header) < self._parse_at:
+            return
+
+        if self.format is None:
+            self.format = sniff(bytes(self._header[:12]))
+            if self.format is None:
+                raise InvalidImage
+
+        # only header is parsed, pixel is not decoded
+        try:
+            with Image.open(io.BytesIO(self._header)) as img:
+                self.size = img.size
+        except Image.DecompressionBombError:
+            raise InvalidImage("Dimensi image terlalu besar")
+        except Exception:
+            # truncated header raise different error per format
+            if len(self._header) > HEADER_LIMIT:
+                raise InvalidImage
+
+            # parsing on every write is quadratic, wait until header doubled.
+            # one last try just past HEADER_LIMIT
+            length = len(self._header)
+            self._parse_at = min(max(length * 2, length + HEADER_PARSE_STEP), HEADER_LIMIT + 1)
+            return
+
+        self._header = bytearray()
+
+        if self.size[0] * self.size[1] > self.max_pixels:
+            raise InvalidImage("Dimensi image maksimal %i pixel" % self.max_pixels)
+
+
+class UploadRequest(Request):
+    """Request that stream every uploaded file into ImageUploadStream
+
+    Every upload in this app is an image (avatar), other file is rejected
+    while it is being received.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return ImageUploadStream(
+            max_bytes=SoccerConfig.UPLOAD_MAX_BYTES,
+            max_pixels=SoccerConfig.UPLOAD_MAX_PIXELS,
+            spool_size=SoccerConfig.UPLOAD_SPOOL_SIZE,
+        )
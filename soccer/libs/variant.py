@@ -0,0 +1,278 @@
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from PIL import Image, ImageOps
+
+from soccer.libs import avatar, file
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+log = logging.getLogger(__name__)
+
+# fmt query string: (format PIL, mimetype)
+FORMATS = {
+    "jpg": ("JPEG", "image/jpeg"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png"),
+    "webp": ("WEBP", "image/webp"),
+    "avif": ("AVIF", "image/avif"),
+}
+
+# ukuran variant yang boleh diminta, sama dengan ukuran avatar
+SIZES = tuple(sorted(set(
+    size for variants in (avatar.PLAYER_VARIANTS, avatar.TEAM_VARIANTS) for _, _, size in variants
+), reverse=True))
+
+
+def allowed_size(width: int, height: int) -> bool:
+    """Check requested size is one of SIZES, one side may be 0 to keep aspect ratio
+
+    Every size is a new render and a new file in the cache, arbitrary size
+    from client is not allowed.
+    """
+    for size_width, size_height in SIZES:
+        if (width, height) in ((size_width, size_height), (size_width, 0), (0, size_height)):
+            return True
+
+    return False
+
+
+def supported(fmt: str) -> bool:
+    """Check fmt is known and can be saved by installed Pillow"""
+    if fmt not in FORMATS:
+        return False
+
+    Image.init()
+    return FORMATS[fmt][0] in Image.SAVE
+
+
+def render(source: str, target: str, width: int, height: int, fmt: str):
+    """Resize source image and save it as target
+
+    Args:
+        source: full path of source image, or function returning file object
+            that is closed after render
+        target: full path of variant
+        width: width of variant, 0 to follow height
+        height: height of variant, 0 to follow width
+        fmt: key of FORMATS
+    """
+    if callable(source):
+        with source() as f:
+            return render(f, target, width, height, fmt)
+
+    with Image.open(source) as img:
+        size = _resolve_size(img.size, width, height)
+        img.draft(None, size)
+        img = avatar.prepare(img)
+
+        if size != img.size:
+            img = ImageOps.fit(img, size, Image.ANTIALIAS)
+
+        img.save(target, FORMATS[fmt][0], quality=90)
+
+
+def _resolve_size(source_size: tuple, width: int, height: int) -> tuple:
+    """Size of variant, keep aspect ratio if only one side is requested"""
+    source_width, source_height = source_size
+    if width and height:
+        return width, height
+    elif width:
+        return width, max(1, round(source_height * width / source_width))
+    elif height:
+        return max(1, round(source_width * height / source_height)), height
+
+    return source_width, source_height
+
+
+@contextmanager
+def _flock(path: str):
+    """Exclusive flock, every open has its own lock so threads are excluded too"""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class VariantCache(object):
+    """Disk cache of image variants created on first request
+
+    Total size is bounded, least recently used variant (by atime) is
+    evicted first. mtime is never touched, it is part of the ETag. Render of the same variant is coalesced across workers
+    with a striped file lock, the loser waits and reuses the file.
+    """
+
+    # hit only update atime if older than this, save a syscall per hit
+    touch_interval = 60
+
+    # run eviction every n render per process
+    evict_every = 50
+
+    # evict until total size is under this fraction of max_bytes
+    low_watermark = 0.9
+
+    lock_stripes = 256
+
+    def __init__(self, root: str, max_bytes: int):
+        """
+        Args:
+            root: cache directory
+            max_bytes: maximum total size of variants
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock_dir = os.path.join(root, ".locks")
+        self._renders = 0
+        self._renders_lock = threading.Lock()
+
+    def path(self, subdir: str, filename: str, width: int, height: int, fmt: str) -> str:
+        """Get full path of variant"""
+        return os.path.join(self.root, subdir, "%s.%ix%i.%s" % (filename, width, height, fmt))
+
+    def get(self, source: str, subdir: str, filename: str, width: int, height: int, fmt: str) -> str:
+        """Get variant path, render it if not cached
+
+        Args:
+            source: full path of source image, or function returning file object
+            subdir: subdirectory of source
+            filename: filename of source
+            width: width of variant, 0 to follow height
+            height: height of variant, 0 to follow width
+            fmt: key of FORMATS
+
+        Returns:
+            str full path of variant
+        """
+        target = self.path(subdir, filename, width, height, fmt)
+        try:
+            stat = os.stat(target)
+        except FileNotFoundError:
+            self._render(source, target, width, height, fmt)
+            return target
+
+        if time.time() - stat.st_atime > self.touch_interval:
+            try:
+                os.utime(target, ns=(int(time.time() * 1e9), stat.st_mtime_ns))
+            except FileNotFoundError:
+                # evicted by other worker, rendered again on next request
+                pass
+
+        return target
+
+    def evict(self) -> int:
+        """Delete least recently used variants until total size is under low watermark
+
+        Returns:
+            int number of deleted variant
+        """
+        entries = []
+        total = 0
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            for name in filenames:
+                # skip temporary file being rendered
+                if name.startswith("."):
+                    continue
+
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+
+                entries.append((stat.st_atime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return 0
+
+        entries.sort()
+        limit = self.max_bytes * self.low_watermark
+        deleted = 0
+        for _, size, path in entries:
+            if total <= limit:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+            file.forget_stat(path)
+            total -= size
+            deleted += 1
+
+        return deleted
+
+    def _render(self, source: str, target: str, width: int, height: int, fmt: str):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.makedirs(self._lock_dir, exist_ok=True)
+
+        with _flock(self._stripe(target)):
+            # other worker may render it while we wait for the lock
+            if os.path.isfile(target):
+                return
+
+            # render to temporary file, reader never see half written file
+            fd, temp = tempfile.mkstemp(prefix=".", dir=os.path.dirname(target))
+            os.close(fd)
+            try:
+                render(source, temp, width, height, fmt)
+                os.replace(temp, target)
+                file.forget_stat(target)
+            except Exception:
+                os.remove(temp)
+                raise
+
+        with self._renders_lock:
+            self._renders += 1
+            evict = self._renders % self.evict_every == 0
+
+        if evict:
+            self._evict_once()
+
+    def _evict_once(self):
+        """Evict if no other worker is evicting"""
+        fd = os.open(os.path.join(self._lock_dir, "evict"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return
+
+        try:
+            deleted = self.evict()
+            if deleted:
+                log.info("evicted %i image variant from %s", deleted, self.root)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _stripe(self, target: str) -> str:
+        digest = hashlib.blake2b(target.encode("utf-8"), digest_size=8).digest()
+        index = int.from_bytes(digest, "little") % self.lock_stripes
+        return os.path.join(self._lock_dir, "%03i" % index)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_variant_cache() -> VariantCache:
+    """Get variant cache from IMAGE_CACHE_PATH and IMAGE_CACHE_MAX_BYTES config"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = VariantCache(SoccerConfig.IMAGE_CACHE_PATH, SoccerConfig.IMAGE_CACHE_MAX_BYTES)
+
+        return _cache
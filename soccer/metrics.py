@@ -1,6 +1,6 @@
 import time
 
-from flask import request
+from flask import g, request
 from prometheus_client import Counter, Histogram
 
 REQUEST_COUNT = Counter(
@@ -13,6 +13,77 @@ REQUEST_LATENCY = Histogram(
     ["app_name", "method", "endpoint", "http_status"]
 )
 
+REQUEST_QUERY_COUNT = Histogram(
+    "request_query_count", "SQL query per request, from g.total_query",
+    ["app_name", "method", "endpoint"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, float("inf"))
+)
+
+ENTITY_CACHE_HIT = Counter(
+    "entity_cache_hit", "Entity cache hit, include negative hit",
+    ["app_name", "entity"]
+)
+
+ENTITY_CACHE_MISS = Counter(
+    "entity_cache_miss", "Entity cache miss",
+    ["app_name", "entity"]
+)
+
+JSON_FRAGMENT_HIT = Counter(
+    "json_fragment_hit", "Entity JSON reused from fragment cache",
+    ["app_name", "kind"]
+)
+
+JSON_FRAGMENT_MISS = Counter(
+    "json_fragment_miss", "Entity JSON encoded and stored in fragment cache",
+    ["app_name", "kind"]
+)
+
+IMAGE_FORMAT_SERVED = Counter(
+    "image_format_served", "Image file served per format after Accept negotiation",
+    ["app_name", "format"]
+)
+
+IMAGE_BYTES_SAVED = Counter(
+    "image_bytes_saved", "Bytes saved by serving alternate format instead of JPEG",
+    ["app_name", "format"]
+)
+
+FILE_RESPONSE = Counter(
+    "file_response", "Response of /file per http status (200, 206, 304)",
+    ["app_name", "http_status"]
+)
+
+COMPRESS_BYTES_IN = Counter(
+    "compress_bytes_in", "Response bytes before compression",
+    ["app_name", "encoding"]
+)
+
+COMPRESS_BYTES_OUT = Counter(
+    "compress_bytes_out", "Response bytes sent after compression",
+    ["app_name", "encoding"]
+)
+
+COMPRESS_SECONDS = Counter(
+    "compress_seconds", "Time spent compressing response, excluding cache hit",
+    ["app_name", "encoding"]
+)
+
+COMPRESS_CACHE = Counter(
+    "compress_cache", "Compressed body cache of GET response (hit, miss)",
+    ["app_name", "encoding", "result"]
+)
+
+RESPONSE_CACHE = Counter(
+    "response_cache", "Response cache lookup (hit, stale, coalesced, refresh, miss)",
+    ["app_name", "endpoint", "result"]
+)
+
+RESPONSE_CACHE_SAVED_SECONDS = Counter(
+    "response_cache_saved_seconds", "Render time of responses served from response cache",
+    ["app_name", "endpoint"]
+)
+
 
 def start_timer():
     request.start_time = time.time()
@@ -29,7 +100,14 @@ def record_request_data(response):
     return response
 
 
+def record_query_count(response):
+    total_query = getattr(g, "total_query", 0)
+    REQUEST_QUERY_COUNT.labels("bola-app", request.method, request.url_rule).observe(total_query)
+    return response
+
+
 def setup_metrics(app):
     app.before_request(start_timer)
     app.after_request(record_request_data)
+    app.after_request(record_query_count)
     app.after_request(stop_timer)
\ No newline at end of file
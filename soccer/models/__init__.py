@@ -1,5 +1,6 @@
 from .base import db
 from .player import Player
+from .standing import Standings
 from .team_favorite import TeamFavorites
 from .team import Team
 
@@ -7,6 +8,7 @@ from .team import Team
 __all__ = [
     db,
     Player,
+    Standings,
     TeamFavorites,
     Team,
 ]
@@ -1,19 +1,240 @@
-from flask_sqlalchemy import SQLAlchemy, BaseQuery, _BoundDeclarativeMeta, _QueryProperty, Model, Pagination
+import base64
+import binascii
+import json
+import logging
+
+from flask import abort, has_request_context
+from flask_sqlalchemy import (
+    SQLAlchemy, BaseQuery, SignallingSession, _BoundDeclarativeMeta, _QueryProperty, Model, Pagination
+)
+from sqlalchemy import orm
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.sql.expression import Select
+
+from soccer.exceptions import BadRequest
+from soccer.libs import transaction
+from soccer.libs.cache import get_cache
+from soccer.models import replica
+from configuration import SoccerConfig
 
 __author__ = "isnanda.muhammadzain@sebangsa.com"
 
+log = logging.getLogger(__name__)
+
+# mode perhitungan total pagination
+#   exact: selalu COUNT(*)
+#   cached: COUNT(*) lalu disimpan di cache per filter
+#   estimate: estimasi dari EXPLAIN mysql lalu disimpan di cache per filter
+TOTAL_MODES = ("exact", "cached", "estimate")
+
+count_cache = get_cache("count", max_size=SoccerConfig.COUNT_CACHE_SIZE, ttl=SoccerConfig.COUNT_CACHE_TTL, slot_size=128)
+
+
+def encode_cursor(*values) -> str:
+    """Encode last seen sort values into opaque cursor
+
+    Args:
+        values: json serializable sort values of last item
+
+    Returns:
+        str cursor
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, types: tuple = None) -> list:
+    """Decode cursor from ``encode_cursor``
+
+    Args:
+        cursor: opaque cursor from client
+        types: expected type of every sort value, ex: (str, int). Cursor
+            crafted by client or made for another sort must not reach the
+            comparison
+
+    Returns:
+        list of last seen sort values
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise BadRequest("cursor tidak valid")
+
+    if not isinstance(values, list) or not values:
+        raise BadRequest("cursor tidak valid")
+
+    if types is not None:
+        if len(values) != len(types):
+            raise BadRequest("cursor tidak valid")
+
+        for value, value_type in zip(values, types):
+            # bool is subclass of int, json true is not an id
+            if isinstance(value, bool) or not isinstance(value, value_type):
+                raise BadRequest("cursor tidak valid")
+
+    return values
+
+
+def _python_type(column) -> tuple:
+    """Python type of column value for ``decode_cursor``, int is accepted for float"""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return (object,)
+
+    if python_type is float:
+        return (int, float)
+
+    return (python_type,)
+
+
+class CursorPagination(object):
+    """Keyset pagination result, total is never counted"""
+
+    def __init__(self, query, cursor, per_page, items, next_cursor):
+        #: the query object that was used to create this pagination object
+        self.query = query
+        #: cursor of current page, empty for the first page
+        self.cursor = cursor
+        #: the number of items to be displayed on a page.
+        self.per_page = per_page
+        #: the items for the current page
+        self.items = items
+        #: cursor for next page, None on the last page
+        self.next_cursor = next_cursor
+        #: total is skipped in cursor mode
+        self.total = None
+
+    @property
+    def has_prev(self):
+        return bool(self.cursor)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
 
 class SoccerBaseQuery(BaseQuery):
     """Extending untuk menambahkan fungsionalitas query"""
 
-    def paginate_limit(self, page=None, per_page=None, limit=None) -> Pagination:
+    def _execute_and_instances(self, querycontext):
+        try:
+            return super()._execute_and_instances(querycontext)
+        except OperationalError:
+            session = self.session
+            if not session.info.get("bind_replica"):
+                raise
+
+            # replica is down or broken, read the rest of the session from primary
+            log.warning("query on replica failed, retry on primary", exc_info=True)
+            session.info["replica_failed"] = True
+            return super()._execute_and_instances(querycontext)
+
+    def paginate(self, page=None, per_page=None, error_out=True, total_mode=None) -> Pagination:
+        """Return paginate object, total is counted by ``total_mode``
+
+        Args:
+            page: number of page
+            per_page: item per page
+            error_out: abort 404 if page is invalid
+            total_mode: exact, cached or estimate, default PAGINATION_TOTAL_MODE
+
+        Returns:
+            Pagination object
+        """
+        page = page or 1
+        per_page = per_page or 20
+
+        if error_out and page < 1:
+            abort(404)
+
+        items = self.limit(per_page).offset((page - 1) * per_page).all()
+
+        if not items and page != 1 and error_out:
+            abort(404)
+
+        # No need to count if we're on the first page and there are fewer
+        # items than we expected
+        if page == 1 and len(items) < per_page:
+            total = len(items)
+        else:
+            total = self.total(total_mode)
+
+        return Pagination(self, page, per_page, total, items)
+
+    def total(self, total_mode=None) -> int:
+        """Count total rows of query
+
+        Args:
+            total_mode: exact, cached or estimate, default PAGINATION_TOTAL_MODE
+
+        Returns:
+            int total
+        """
+        total_mode = total_mode or SoccerConfig.PAGINATION_TOTAL_MODE
+        query = self.order_by(None)
+
+        if total_mode == "exact":
+            return query.count()
+
+        key = query._count_key(total_mode)
+        total = count_cache.get(key)
+        if total is None:
+            # total is cached, replica may still count the old rows
+            with transaction.primary(self.session):
+                if total_mode == "estimate":
+                    total = query._estimate_count()
+                else:
+                    total = query.count()
+
+            count_cache.set(key, total)
+
+        return total
+
+    def _count_key(self, total_mode: str) -> str:
+        """Cache key from compiled filter and generation of every table"""
+        statement = self.statement
+        compiled = statement.compile()
+        params = sorted(compiled.params.items())
+        generations = [
+            "%s.%i" % (table.name, count_cache.generation(table.name))
+            for table in statement.froms if hasattr(table, "name")
+        ]
+
+        return "count:%s:%s:%r:%s" % (total_mode, ",".join(generations), params, compiled)
+
+    def _estimate_count(self) -> int:
+        """Estimate total rows from mysql EXPLAIN, exact count for other database"""
+        mapper = self._mapper_zero()
+        bind = self.session.get_bind(mapper)
+        if bind.dialect.name != "mysql":
+            return self.count()
+
+        sql = str(self.statement.compile(
+            dialect=bind.dialect, compile_kwargs={"literal_binds": True}
+        ))
+
+        # escape percent, statement is executed without parameter
+        row = self.session.connection(mapper=mapper).execute(
+            "EXPLAIN " + sql.replace("%", "%%")
+        ).first()
+
+        if row is None or row["rows"] is None:
+            return 0
+
+        filtered = row["filtered"] if "filtered" in row.keys() else 100
+        return int(row["rows"] * (filtered or 100) / 100)
+
+    def paginate_limit(self, page=None, per_page=None, limit=None, total_mode=None) -> Pagination:
         """Return paginate object
 
         Args:
             page: number of page
             per_page: item per page
             limit: limit item per page
+            total_mode: exact, cached or estimate, default PAGINATION_TOTAL_MODE
 
         Returns:
             Pagination object
@@ -29,20 +250,154 @@ class SoccerBaseQuery(BaseQuery):
         if page == 1 and len(items) < per_page:
             total = len(items)
         else:
-            total = self.order_by(None).count()
+            total = self.total(total_mode)
 
         return Pagination(self, page, per_page, total, items)
 
+    def paginate_cursor(self, cursor=None, per_page=None, key=None) -> CursorPagination:
+        """Return keyset paginate object, query must be ordered by key desc
+
+        Seek with ``key < last_seen`` instead of OFFSET and skip the COUNT.
+
+        Args:
+            cursor: next_cursor from previous page, empty for first page
+            per_page: item per page
+            key: column used for seek, default primary key
+
+        Returns:
+            CursorPagination object
+        """
+        per_page = per_page or 12
+        if key is None:
+            key = self._mapper_zero().primary_key[0]
+
+        query = self
+        if cursor:
+            last_seen = decode_cursor(cursor, (_python_type(key),))[0]
+            query = query.filter(key < last_seen)
+
+        # fetch one more item to know if next page exists
+        items = query.limit(per_page + 1).all()
+
+        next_cursor = None
+        if len(items) > per_page:
+            items = items[:per_page]
+            next_cursor = encode_cursor(getattr(items[-1], key.key))
+
+        return CursorPagination(self, cursor, per_page, items, next_cursor)
+
 
 class SoccerModel(Model):
     # Change query class with SoccerBaseQuery
     query_class = SoccerBaseQuery
 
 
+class RoutingSession(SignallingSession):
+    """Session that send SELECT of read only request to replica"""
+
+    def __init__(self, db, *args, **kwargs):
+        self.db = db
+        super().__init__(db, *args, **kwargs)
+
+    def get_bind(self, mapper=None, clause=None):
+        if self._use_replica(clause):
+            engine = self.info.get("replica")
+            if engine is None:
+                engine = self.info["replica"] = self.db.replicas.pick()
+
+            if engine is not None:
+                self.info["bind_replica"] = True
+                return engine
+
+        self.info["bind_replica"] = False
+        return super().get_bind(mapper, clause)
+
+    def close(self):
+        # pool does not reset returned connection, end open transaction here
+        if transaction.has_connection(self):
+            self.rollback()
+
+        super().close()
+
+    def commit(self):
+        wrote = transaction.has_writes(self)
+        super().commit()
+
+        # read-your-writes, next requests of this user read from primary
+        if wrote and self.db.replicas:
+            replica.stick()
+
+    def _use_replica(self, clause) -> bool:
+        """Only SELECT of read only request without write in this session"""
+        if not self.db.replicas or self._flushing or not isinstance(clause, Select):
+            return False
+
+        if not has_request_context() or not transaction.is_read_only():
+            return False
+
+        if transaction.has_writes(self) or transaction.reads_primary(self):
+            return False
+
+        return not replica.is_sticky()
+
+
 class SoccerDB(SQLAlchemy):
 
     def __init__(self):
-        super().__init__()
+        # session.query also retry failed replica read on primary
+        super().__init__(query_class=SoccerBaseQuery)
+        self.replicas = None
+
+    def init_app(self, app):
+        """Register SQLALCHEMY_REPLICA_URIS as ``replica_<n>`` binds"""
+        binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+        replica_keys = []
+        for index, uri in enumerate(app.config.get("SQLALCHEMY_REPLICA_URIS") or ()):
+            key = "replica_%i" % index
+            binds[key] = uri
+            replica_keys.append(key)
+
+        app.config["SQLALCHEMY_BINDS"] = binds or None
+        super().init_app(app)
+
+        self.replicas = replica.ReplicaSet(
+            self, app, replica_keys, eject_seconds=app.config.get("REPLICA_EJECT_SECONDS", 30)
+        )
+
+    def apply_driver_hacks(self, app, info, options):
+        """Disable rollback of the pool when connection is returned
+
+        Every transaction is already ended with COMMIT or ROLLBACK by the
+        session (``RoutingSession.close``), the reset would be a second
+        round trip for every request.
+        """
+        super().apply_driver_hacks(app, info, options)
+        options.setdefault("pool_reset_on_return", None)
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def after_commit(self, func):
+        """Call func after current session transaction is committed,
+        discarded if the transaction is rolled back
+
+        Args:
+            func: callable without argument
+        """
+        self.session.info.setdefault("after_commit", []).append(func)
+
+    def invalidate_total(self, *models):
+        """Invalidate cached pagination total of models
+
+        Args:
+            models: model class yang datanya berubah
+        """
+        tables = [model.__table__.name for model in models]
+        for table in tables:
+            count_cache.bump(table)
+
+        # bump again, other worker may count old rows before this commit
+        self.after_commit(lambda: [count_cache.bump(table) for table in tables])
     
     def make_declarative_base(self, model, metadata=None):
         """change declarative base"""
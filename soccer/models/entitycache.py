@@ -0,0 +1,134 @@
+import random
+
+from sqlalchemy import inspect
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.session import make_transient_to_detached
+
+from soccer import metrics
+from soccer.libs import transaction
+from soccer.libs.cache import get_cache
+from soccer.models.base import db
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+# penanda entity tidak ada di database (negative cache)
+MISSING = "__missing__"
+
+entity_store = get_cache(
+    "entity", max_size=SoccerConfig.ENTITY_CACHE_SIZE, ttl=SoccerConfig.ENTITY_CACHE_TTL, slot_size=1024
+)
+
+# versi entity, diganti setiap entity berubah. dipakai key cache turunan entity (json fragment)
+version_store = get_cache(
+    "entity_version", max_size=SoccerConfig.ENTITY_CACHE_SIZE * 2, ttl=SoccerConfig.ENTITY_VERSION_TTL,
+    slot_size=64
+)
+
+
+def _new_version() -> int:
+    # random instead of counter, evicted version never come back with the old value
+    return random.getrandbits(62)
+
+
+class EntityCache(object):
+    """Read-through cache of entity by primary key
+
+    Only plain dict snapshots of the columns are stored, the snapshot is
+    merged into the current session without SQL when read.
+    """
+
+    def __init__(self, model, name: str):
+        """
+        Args:
+            model: model class
+            name: entity name, used in cache key and metrics
+        """
+        self.model = model
+        self.name = name
+
+    def key(self, entity_id) -> str:
+        return "entity:%s:%s" % (self.name, entity_id)
+
+    def version_key(self, entity_id) -> str:
+        return "version:%s:%s" % (self.name, entity_id)
+
+    def version(self, entity_id) -> int:
+        """Get version of entity, changed every time entity is invalidated
+
+        Args:
+            entity_id: primary key
+
+        Returns:
+            int version, only compare it for equality
+        """
+        return self._version(self.version_key(entity_id))
+
+    def table_version(self) -> int:
+        """Get version of the table, changed every time any entity is invalidated"""
+        return self._version(self.version_key("*"))
+
+    @staticmethod
+    def _version(key: str) -> int:
+        version = version_store.get(key)
+        if version is None:
+            version = version_store.update(key, lambda value: value or _new_version())
+
+        return version
+
+    def get(self, entity_id):
+        """Get entity by id
+
+        Args:
+            entity_id: primary key
+
+        Returns:
+            model instance attached to current session, None if not exists
+        """
+        key = self.key(entity_id)
+        snapshot = entity_store.get(key)
+
+        if snapshot is not None:
+            metrics.ENTITY_CACHE_HIT.labels("bola-app", self.name).inc()
+            if snapshot == MISSING:
+                return None
+
+            return self._restore(snapshot)
+
+        metrics.ENTITY_CACHE_MISS.labels("bola-app", self.name).inc()
+        # snapshot is shared with other requests, never fill it from a lagging replica
+        with transaction.primary(db.session):
+            entity = self.model.query.filter_by(id=entity_id).first()
+
+        if entity is None:
+            entity_store.set(key, MISSING, SoccerConfig.ENTITY_CACHE_NEGATIVE_TTL)
+        else:
+            entity_store.set(key, self.snapshot(entity))
+
+        return entity
+
+    def invalidate(self, entity_id):
+        """Remove entity from cache, change version of entity and table
+
+        Args:
+            entity_id: primary key
+        """
+        entity_store.delete(self.key(entity_id))
+        version_store.set(self.version_key(entity_id), _new_version())
+        version_store.set(self.version_key("*"), _new_version())
+
+    def snapshot(self, entity) -> dict:
+        """Copy column values of entity to dict"""
+        return {
+            attr.key: getattr(entity, attr.key)
+            for attr in inspect(self.model).column_attrs
+        }
+
+    def _restore(self, snapshot: dict):
+        entity = inspect(self.model).class_manager.new_instance()
+        for key, value in snapshot.items():
+            set_committed_value(entity, key, value)
+
+        # as if it was loaded from database, merge without SELECT
+        make_transient_to_detached(entity)
+        return db.session.merge(entity, load=False)
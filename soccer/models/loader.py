@@ -0,0 +1,66 @@
+from flask import g
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+class BatchLoader(object):
+    """Load entities of a page by foreign key with one ``IN`` query
+
+    Loaded entities are kept until the end of request, ids already
+    loaded are not queried again.
+    """
+
+    def __init__(self, model):
+        """
+        Args:
+            model: model class, primary key must be ``id``
+        """
+        self.model = model
+        self._loaded = {}
+
+    def load_many(self, ids) -> dict:
+        """Load entities by id
+
+        Args:
+            ids: iterable of id, None is ignored
+
+        Returns:
+            dict of id and entity, missing id is not included
+        """
+        ids = {entity_id for entity_id in ids if entity_id is not None}
+        missing = [entity_id for entity_id in ids if entity_id not in self._loaded]
+
+        if missing:
+            for entity in self.model.query.filter(self.model.id.in_(missing)).all():
+                self._loaded[entity.id] = entity
+
+            # remember not found ids so they are not queried again
+            for entity_id in missing:
+                self._loaded.setdefault(entity_id, None)
+
+        return {
+            entity_id: self._loaded[entity_id]
+            for entity_id in ids if self._loaded[entity_id] is not None
+        }
+
+
+def get_loader(model) -> BatchLoader:
+    """Get batch loader of model for current request
+
+    Args:
+        model: model class
+
+    Returns:
+        BatchLoader
+    """
+    loaders = g.setdefault("_batch_loaders", {})
+    loader = loaders.get(model)
+    if loader is None:
+        loader = loaders[model] = BatchLoader(model)
+
+    return loader
+
+
+def load_many(model, ids) -> dict:
+    """Shortcut of ``get_loader(model).load_many(ids)``"""
+    return get_loader(model).load_many(ids)
@@ -3,7 +3,9 @@ import time
 from sqlalchemy.orm import relationship, backref
 
 from soccer.models import db
-from soccer.libs import file
+from soccer.models.entitycache import EntityCache
+from soccer.libs import avatar, file
+from configuration import SoccerConfig
 
 
 class Player(db.Model):
@@ -33,6 +35,9 @@ class Player(db.Model):
 
     image_thumb = db.Column(db.String(100))
 
+    # status proses avatar di image worker (pending, failed), NULL jika selesai
+    image_status = db.Column(db.String(10))
+
     #team = relationship("")
 
     def __init__(self, shortname, fullname, back_number):
@@ -61,6 +66,10 @@ class Player(db.Model):
 
     @property
     def image_icon_url(self):
+        # variant dibuat on demand dari image, lihat IMAGE_ON_DEMAND
+        if self.image_icon and self.image_icon == self.image:
+            return file.variant_url(self.image, 'players', avatar.variant_size("image_icon"))
+
         return file.url(self.image_icon, 'players_icon')
 
     def set_image_thumb(self, imagefile: str = None, filename: str = None):
@@ -68,10 +77,23 @@ class Player(db.Model):
 
     @property
     def image_thumb_url(self):
+        # variant dibuat on demand dari image, lihat IMAGE_ON_DEMAND
+        if self.image_thumb and self.image_thumb == self.image:
+            return file.variant_url(self.image, 'players', avatar.variant_size("image_thumb"))
+
         return file.url(self.image_thumb, 'players_thumb')
 
     @property
     def avatar_json(self):
+        # avatar is still processed by image worker
+        if not self.image:
+            placeholder = SoccerConfig.AVATAR_PLACEHOLDER
+            return {
+                "large": placeholder,
+                "medium": placeholder,
+                "small": placeholder,
+            }
+
         return {
             "large": self.image_url,
             "medium": self.image_icon_url,
@@ -79,5 +101,8 @@ class Player(db.Model):
         }
 
 
+entity_cache = EntityCache(Player, "player")
+
+
 def get_by_id(player_id: int) -> Player:
-    return Player.query.filter_by(id=player_id).first()
+    return entity_cache.get(player_id)
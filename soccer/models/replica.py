@@ -0,0 +1,104 @@
+import itertools
+import logging
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+
+from soccer.libs.cache import get_cache
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+log = logging.getLogger(__name__)
+
+# user yang baru saja menulis dibaca dari primary (read-your-writes)
+sticky_cache = get_cache("replica", max_size=10000, ttl=SoccerConfig.REPLICA_STICKY_SECONDS, slot_size=64)
+
+
+class ReplicaSet(object):
+    """Read replica engines registered as ``replica_<n>`` binds
+
+    Every replica has its own engine and pool. A replica that raises a
+    connection error is ejected for ``eject_seconds`` then tried again.
+    """
+
+    def __init__(self, db, app, bind_keys, eject_seconds: int = 30):
+        """
+        Args:
+            db: SoccerDB instance
+            app: flask application
+            bind_keys: bind key of every replica
+            eject_seconds: how long failing replica is not used
+        """
+        self.db = db
+        self.app = app
+        self.bind_keys = list(bind_keys)
+        self.eject_seconds = eject_seconds
+        self._ejected_until = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._engines = {}
+
+    def __bool__(self):
+        return bool(self.bind_keys)
+
+    def engine(self, bind_key: str):
+        """Get engine of replica, register error listener on first use"""
+        engine = self._engines.get(bind_key)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(bind_key)
+                if engine is None:
+                    engine = self.db.get_engine(self.app, bind=bind_key)
+                    event.listen(engine, "handle_error", self._on_error(bind_key))
+                    self._engines[bind_key] = engine
+
+        return engine
+
+    def pick(self):
+        """Pick healthy replica round robin
+
+        Returns:
+            engine or None if every replica is ejected
+        """
+        now = time.time()
+        healthy = [key for key in self.bind_keys if self._ejected_until.get(key, 0) <= now]
+        if not healthy:
+            return None
+
+        return self.engine(healthy[next(self._counter) % len(healthy)])
+
+    def eject(self, bind_key: str):
+        log.warning("replica %s ejected for %i seconds", bind_key, self.eject_seconds)
+        self._ejected_until[bind_key] = time.time() + self.eject_seconds
+
+    def _on_error(self, bind_key: str):
+        def handle_error(context):
+            # disconnect or failed to connect
+            failed_connect = context.connection is None and isinstance(context.sqlalchemy_exception, DBAPIError)
+            if context.is_disconnect or failed_connect:
+                self.eject(bind_key)
+
+        return handle_error
+
+
+def sticky_key() -> str:
+    """Key of current user, authenticated user id or client ip"""
+    user = getattr(g, "user_auth", None)
+    if user is not None:
+        return "sticky:user:%s" % user.id
+
+    return "sticky:ip:%s" % request.remote_addr
+
+
+def stick():
+    """Read current user from primary for REPLICA_STICKY_SECONDS"""
+    if has_request_context():
+        sticky_cache.set(sticky_key(), 1)
+
+
+def is_sticky() -> bool:
+    return has_request_context() and bool(sticky_cache.get(sticky_key()))
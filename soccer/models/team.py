@@ -4,6 +4,8 @@ from datetime import datetime
 from sqlalchemy.orm import relationship, backref
 
 from soccer.models import db
+from soccer.models.entitycache import EntityCache
+from soccer.libs import file
 
 class Team(db.Model):
     id = db.Column(db.Integer, primary_key=True, nullable=False)
@@ -75,5 +77,8 @@ class Team(db.Model):
         }
 
 
+entity_cache = EntityCache(Team, "team")
+
+
 def get_by_id(team_id: int) -> Team:
-    return Team.query.filter_by(id=team_id).first()
+    return entity_cache.get(team_id)
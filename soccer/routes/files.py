@@ -1,7 +1,15 @@
-from flask import Blueprint, request, jsonify, send_file
+import os
 
+from functools import partial
+
+from flask import Blueprint, request, jsonify, redirect
+from flask.helpers import safe_join
+from PIL import Image
+
+from soccer import metrics
 from soccer.controllers import player as player_ctrl
-from soccer.exceptions import BadRequest, NotFound
+from soccer.exceptions import BadRequest, InvalidImage, NotFound
+from soccer.libs import file, storage, variant
 from soccer.libs.ratelimit import ratelimit
 from configuration import SoccerConfig
 
@@ -10,9 +18,144 @@ bp = Blueprint(__name__, "files")
 
 @bp.route("/file/<path:path_file>")
 def get_files(path_file):
-    directory = path_file.split("/")[0]
-    filename = path_file.split("/")[1]
+    """Get uploaded file, resized variant is created on first request
+
+    Client yang mengirim ``Accept: image/avif`` atau ``image/webp`` mendapat
+    format tersebut jika lebih kecil dari file asli.
+
+    **endpoint**
+
+    .. sourcecode:: http
+
+        GET /file/players/messi_AbCdEfGhIj.jpg?w=180&h=135&fmt=webp
+
+    :query w: lebar variant, jika h kosong tinggi mengikuti rasio
+    :query h: tinggi variant, jika w kosong lebar mengikuti rasio.
+        ukuran yang tersedia: 840x630, 180x135, 96x72
+    :query fmt: format variant (jpg, png, webp, avif), default dari header Accept
+    """
+    directory, _, filename = path_file.partition("/")
+    if not filename or "/" in filename:
+        raise NotFound
+
+    # original upload is not validated yet
+    if directory == player_ctrl.AVATAR_PENDING_DIR:
+        raise NotFound
+
+    # reject path traversal, file is in sharded or flat layout
+    safe_join(SoccerConfig.STORAGE_PATH, directory, filename)
+    path_file_send = str(file.find(filename, directory))
+
+    width = request.args.get("w", "0")
+    height = request.args.get("h", "0")
+    fmt = request.args.get("fmt")
+
+    backend = storage.get_storage()
+    if width == "0" and height == "0" and fmt is None:
+        if backend is not storage.local():
+            return redirect(backend.url(directory, filename), 301)
+
+        return _send_negotiated(path_file_send, filename)
+
+    if not width.isdigit() or not height.isdigit():
+        raise BadRequest("w dan h harus berupa angka")
+
+    # type conversion
+    width = int(width)
+    height = int(height)
+
+    if not variant.allowed_size(width, height):
+        raise BadRequest("ukuran variant yang tersedia: %s" % ", ".join(
+            "%ix%i" % size for size in variant.SIZES
+        ))
+
+    negotiated = fmt is None
+    if negotiated:
+        fmt = _negotiate_variant_format(filename)
+    elif not variant.supported(fmt):
+        raise BadRequest("fmt tidak didukung")
+
+    if backend is storage.local():
+        try:
+            file.stat(path_file_send)
+        except FileNotFoundError:
+            raise NotFound
+
+        source = path_file_send
+    else:
+        # only downloaded if variant is not cached
+        source = partial(backend.open, directory, filename)
+
+    try:
+        path_variant = variant.get_variant_cache().get(source, directory, filename, width, height, fmt)
+    except FileNotFoundError:
+        raise NotFound
+    except (IOError, SyntaxError, Image.DecompressionBombError):
+        # source is not an image Pillow can decode
+        raise InvalidImage(status_code=415)
+
+    metrics.IMAGE_FORMAT_SERVED.labels("bola-app", fmt).inc()
+
+    response = file.send(path_variant, mimetype=variant.FORMATS[fmt][1])
+    if negotiated:
+        response.vary.add("Accept")
+
+    return _record(response)
+
+
+def _accepted(mimetype: str) -> bool:
+    """Client explicitly accept mimetype, */* is not enough for new image format"""
+    return any(value == mimetype and quality > 0 for value, quality in request.accept_mimetypes)
+
+
+def _send_negotiated(path_file_send: str, filename: str):
+    """Send smallest alternate (<file>.avif, <file>.webp) accepted by client, or the file"""
+    try:
+        original_size = file.stat(path_file_send)[2]
+    except FileNotFoundError:
+        raise NotFound
+
+    best = None
+    for ext, _, mimetype in file.alternate_formats():
+        if not _accepted(mimetype):
+            continue
+
+        try:
+            size = file.stat(path_file_send + "." + ext)[2]
+        except FileNotFoundError:
+            continue
+
+        if size < original_size and (best is None or size < best[0]):
+            best = (size, ext, mimetype)
+
+    if best is None:
+        fmt = os.path.splitext(filename)[1].lstrip(".").lower() or "original"
+        response = file.send(path_file_send, filename=filename)
+    else:
+        size, fmt, mimetype = best
+        response = file.send(path_file_send + "." + fmt, mimetype=mimetype)
+        metrics.IMAGE_BYTES_SAVED.labels("bola-app", fmt).inc(original_size - size)
+
+    metrics.IMAGE_FORMAT_SERVED.labels("bola-app", fmt).inc()
+
+    response.vary.add("Accept")
+    return _record(response)
+
+
+def _record(response):
+    """Count file response by status, 304 fraction = 304 / all"""
+    metrics.FILE_RESPONSE.labels("bola-app", response.status_code).inc()
+    return response
+
+
+def _negotiate_variant_format(filename: str) -> str:
+    """Format of on demand variant when fmt is not given"""
+    for ext, _, mimetype in file.alternate_formats():
+        if _accepted(mimetype) and variant.supported(ext):
+            return ext
 
-    path_file_send = SoccerConfig.STORAGE_PATH + "/{}/{}".format(directory, filename)
+    fmt = os.path.splitext(filename)[1].lstrip(".").lower()
+    if variant.supported(fmt):
+        return fmt
 
-    return send_file(path_file_send, attachment_filename=filename)
\ No newline at end of file
+    return "jpg"
@@ -2,11 +2,28 @@ from flask import Blueprint, request, jsonify
 
 from soccer.controllers import player as player_ctrl
 from soccer.exceptions import BadRequest, NotFound
+from soccer.libs import conditional, responsecache, serializer
+from soccer.libs.fields import FieldSet
 from soccer.libs.ratelimit import ratelimit
+from soccer.models import player as player_mdl
+from soccer.models.base import TOTAL_MODES
 
 
 bp = Blueprint(__name__, "player")
 
+# field list player, bisa dipilih dengan query fields=
+PLAYER_FIELDS = FieldSet("player_list", [
+    ("id", ("id",), lambda player: player.id),
+    ("shortname", ("shortname",), lambda player: player.shortname),
+    ("fullname", ("fullname",), lambda player: player.fullname),
+    ("backnumber", ("backnumber",), lambda player: player.backnumber),
+    ("height", ("height",), lambda player: player.height),
+    ("weight", ("weight",), lambda player: player.weight),
+    ("nation", ("nation",), lambda player: player.nation),
+    ("team_id", ("team_id",), lambda player: player.team_id),
+    ("avatar", ("image", "image_icon", "image_thumb"), lambda player: player.avatar_json),
+])
+
 @bp.route("/player/create", methods=["POST"])
 def player_create():
     """Create player
@@ -38,9 +55,13 @@ def player_create():
                 "large": "",
                 "medium": "",
                 "small": "",
-            }
+            },
+            "avatar_status": "pending"
         }
 
+    avatar diproses di background, selama status pending avatar berisi
+    placeholder. cek status di ``GET /player/<player_id>/avatar``
+
     :form shortname: nama punggung dari pemain
     :form fullname: nama lengkap dari pemain
     :form backnumber: nomor punggung dari pemain
@@ -89,12 +110,15 @@ def player_create():
         "nation": player.nation,
         "team": player.team_id,
         "avatar": player.avatar_json,
+        "avatar_status": player.image_status or "done",
     }
 
     return jsonify(response)
 
 
 @bp.route("/player", methods=["GET"])
+@responsecache.cached(tags=("player",))
+@conditional.etag(player_mdl.entity_cache.table_version)
 def player_list():
     """Get list player
 
@@ -145,10 +169,21 @@ def player_list():
     :query page: pagination page
     :query count: count result per page
     :query team: team yang akan dicari list pemainnya
+    :query cursor: keyset pagination, kosongkan untuk halaman pertama lalu
+        gunakan ``next_cursor``. total tidak dihitung pada mode ini
+    :query total_mode: perhitungan total (exact, cached, estimate)
+    :query fields: field yang ditampilkan dipisah koma, ex: ``id,shortname``.
+        default semua field
     """
     page = request.args.get("page", "1")
     count = request.args.get("count", "12")
     team_id = request.args.get("team_id")
+    cursor = request.args.get("cursor")
+    total_mode = request.args.get("total_mode")
+    fields = PLAYER_FIELDS.parse(request.args.get("fields"))
+
+    if total_mode and total_mode not in TOTAL_MODES:
+        raise BadRequest("total_mode tidak didukung")
 
     if not team_id:
         raise BadRequest("Nama team tidak boleh kosong")
@@ -158,39 +193,35 @@ def player_list():
     count = int(count)
     team_id = int(team_id)
 
-    player = player_ctrl.get_list(page=page, count=count, team_id=team_id)
+    # read before the query, see serializer.fragments
+    loaded_version = player_mdl.entity_cache.table_version()
+    player = player_ctrl.get_list(
+        page=page,
+        count=count,
+        team_id=team_id,
+        cursor=cursor,
+        total_mode=total_mode,
+        columns=PLAYER_FIELDS.columns(fields),
+    )
 
     response = {
         "status": 200 if player.items != [] else 204,
         "has_next": player.has_next,
         "has_prev": player.has_prev,
         "total": player.total,
-        "result": _entity_player_list(player.items)
+        "next_cursor": getattr(player, "next_cursor", None),
+        "result": _entity_player_list(player.items, fields, loaded_version)
     }
 
-    return jsonify(response)
-
-
-def _entity_player_list(players):
-    results = []
-    for player in players:
-        results.append({
-            "id": player.id,
-            "shortname": player.shortname,
-            "fullname": player.fullname,
-            "backnumber": player.backnumber,
-            "height": player.height,
-            "weight": player.weight,
-            "nation": player.nation,
-            "team_id": player.team_id,
-            "avatar": player.avatar_json,
-        })
+    return serializer.jsonify(response)
 
 
-    return results
+def _entity_player_list(players, fields: tuple, loaded_version):
+    return PLAYER_FIELDS.fragments(players, fields, player_mdl.entity_cache, loaded_version)
 
 
 @bp.route("/player/<int:player_id>", methods=["GET"])
+@conditional.etag(lambda player_id: player_mdl.entity_cache.version(player_id))
 def player_get_by_id(player_id):
     """Get player by id
 
@@ -247,6 +278,46 @@ def player_get_by_id(player_id):
     return jsonify(response)
 
 
+@bp.route("/player/<int:player_id>/avatar", methods=["GET"])
+def player_avatar_status(player_id):
+    """Get avatar processing status of player
+
+    **endpoint**
+
+    .. sourcecode:: http
+
+        GET /player/<int:player_id>/avatar
+
+    **success response**
+
+        HTTP/1.1 200 OK
+        Content-Type: text/javascript
+
+        {
+            "status": 200,
+            "id": 1,
+            "avatar_status": "done",
+            "avatar": {
+                "large": asset.soccer-app...,
+                "medium": asset.soccer-app...,
+                "small": asset.soccer-app...,
+            }
+        }
+
+    avatar_status: pending, done atau failed
+    """
+    player, status = player_ctrl.get_avatar_status(player_id=player_id)
+
+    response = {
+        "status": 200,
+        "id": player.id,
+        "avatar_status": status,
+        "avatar": player.avatar_json,
+    }
+
+    return jsonify(response)
+
+
 @bp.route("/player/update/<int:player_id>", methods=["PUT"])
 def player_update(player_id):
     """Update player
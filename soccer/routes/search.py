@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 
 from soccer.controllers import search
 from soccer.exceptions import BadRequest
+from soccer.libs import responsecache, serializer
+from soccer.libs.fields import FieldSet
 from soccer.libs.ratelimit import ratelimit
 
 from soccer.models import team as team_mdl
@@ -9,8 +11,32 @@ from soccer.models import player as player_mdl
 
 bp = Blueprint(__name__, 'search')
 
+# field hasil search, bisa dipilih dengan query fields=
+TEAM_FIELDS = FieldSet("team_search", [
+    ("id", ("id",), lambda team: team.id),
+    ("shortname", ("shortname",), lambda team: team.shortname),
+    ("fullname", ("fullname",), lambda team: team.fullname),
+    ("liga", ("liga",), lambda team: team.liga),
+    ("website", ("website",), lambda team: team.website),
+    ("birthday", ("birthday",), lambda team: team.birthday),
+    ("image", ("image",), lambda team: team.image_url),
+    ("image_icon", ("image_icon",), lambda team: team.image_icon_url),
+    ("image_thumb", ("image_thumb",), lambda team: team.image_thumb_url),
+])
+
+PLAYER_FIELDS = FieldSet("player_search", [
+    ("id", ("id",), lambda player: player.id),
+    ("shortname", ("shortname",), lambda player: player.shortname),
+    ("fullname", ("fullname",), lambda player: player.fullname),
+    ("backnumber", ("backnumber",), lambda player: player.backnumber),
+    ("nation", ("nation",), lambda player: player.nation),
+    ("team_id", ("team_id",), lambda player: player.team_id),
+    ("avatar", ("image", "image_icon", "image_thumb"), lambda player: player.avatar_json),
+])
+
 
 @bp.route("/search/team")
+@responsecache.cached(tags=("team",))
 def search_team():
     """Search team
 
@@ -38,14 +64,7 @@ def search_team():
                     "id": 1,
                     "shortname": FCB,
                     "fullname": Barcelona FC,
-                    "liga": {
-                        "id": 1,
-                        "name": La Liga,
-                        "nation": Spain,
-                        "image": asset.soccer-app...,
-                        "image_icon": asset.soccer-app...,
-                        "image_thumb": asset.soccer-app...,
-                    },
+                    "liga": 1,
                     "website": www.barcelona.com,
                     "birthday": 1555769584,
                     "image": asset.soccer-app...,
@@ -60,6 +79,10 @@ def search_team():
     :query last_id: last_id team fro search
     :query page: pagination page
     :query count: count result per page
+    :query cursor: keyset pagination, kosongkan untuk halaman pertama lalu
+        gunakan ``next_cursor``. total tidak dihitung pada mode ini
+    :query fields: field yang ditampilkan dipisah koma, ex: ``id,shortname``.
+        default semua field
 
     optional:
     :query sort: sort list team
@@ -75,6 +98,8 @@ def search_team():
     sort = request.args.get("sort", "match")
     next_id = request.args.get("next_id", "0")
     last_id = request.args.get("last_id", "0")
+    cursor = request.args.get("cursor")
+    fields = TEAM_FIELDS.parse(request.args.get("fields"))
 
     # raise BadRequest is missing keyword
     if not keyword:
@@ -92,44 +117,38 @@ def search_team():
     next_id = int(next_id)
     last_id = int(last_id)
     
-    teams = search.search_team(keyword, next_id, last_id, page, count, sort)
+    # read before the query, see serializer.fragments
+    loaded_version = team_mdl.entity_cache.table_version()
+    teams = search.search_team(
+        keyword,
+        page=page,
+        count=count,
+        sort=sort,
+        next_id=next_id,
+        last_id=last_id,
+        cursor=cursor,
+        columns=TEAM_FIELDS.columns(fields),
+    )
 
     # get teams result
     result = []
     if teams != None:
-        for team in teams.items:
-            result.append({
-                "id": team.id,
-                "shortname": team.shortname,
-                "fullname": team.fullname,
-                "liga": {
-                    "id": team.liga.id,
-                    "name": team.liga.name,
-                    "nation": team.liga.nation,
-                    "image": team.liga.image_url,
-                    "image_icon": team.liga.image_icon_url,
-                    "image_thumb": team.liga.image_thumb_url,
-                },
-                "website": team.website,
-                "birthday": team.birthday,
-                "image": team.image_url,
-                "image_icon": team.image_icon_url,
-                "image_thumb": team.image_thumb_url,
-            })
-
+        result = TEAM_FIELDS.fragments(teams.items, fields, team_mdl.entity_cache, loaded_version)
 
     response = {
         "status": 200,
         "result": result,
         "has_prev": teams.has_prev if teams else False,
         "has_next": teams.has_next if teams else False,
-        "total": teams.total if teams else 0
+        "total": teams.total if teams else 0,
+        "next_cursor": getattr(teams, "next_cursor", None),
     }
 
-    return jsonify(response)
+    return serializer.jsonify(response)
 
 
 @bp.route("/search/player")
+@responsecache.cached(tags=("player",))
 def search_player():
     """Search player
 
@@ -163,6 +182,10 @@ def search_player():
     :query last_id: last id player for search
     :query page: pagination pag
     :query count: count result per page
+    :query cursor: keyset pagination, kosongkan untuk halaman pertama lalu
+        gunakan ``next_cursor``. total tidak dihitung pada mode ini
+    :query fields: field yang ditampilkan dipisah koma, ex: ``id,shortname``.
+        default semua field
 
     optional:
     :query sort: sort list player
@@ -176,8 +199,10 @@ def search_player():
     page = request.args.get("page", "1")
     count = request.args.get("count", "12")
     sort = request.args.get("sort", "match")
-    next_id = request.args.get("next_id")
-    last_id = request.args.get("last_id")
+    next_id = request.args.get("next_id", "0")
+    last_id = request.args.get("last_id", "0")
+    cursor = request.args.get("cursor")
+    fields = PLAYER_FIELDS.parse(request.args.get("fields"))
 
     # raise BadRequest is missing keyword
     if not keyword:
@@ -195,17 +220,107 @@ def search_player():
     next_id = int(next_id)
     last_id = int(last_id)
 
-    players = search.search_player(keyword, next_id, last_id, page, count, sort)
+    # read before the query, see serializer.fragments
+    loaded_version = player_mdl.entity_cache.table_version()
+    players = search.search_player(
+        keyword,
+        page=page,
+        count=count,
+        sort=sort,
+        next_id=next_id,
+        last_id=last_id,
+        cursor=cursor,
+        columns=PLAYER_FIELDS.columns(fields),
+    )
 
     # get players result
     result = []
+    if players != None:
+        result = PLAYER_FIELDS.fragments(players.items, fields, player_mdl.entity_cache, loaded_version)
 
     response = {
         "status": 200,
         "result": result,
         "has_prev": players.has_prev if players else False,
         "has_next": players.has_next if players else False,
-        "total": players.total if players else 0
+        "total": players.total if players else 0,
+        "next_cursor": getattr(players, "next_cursor", None),
+    }
+
+    return serializer.jsonify(response)
+
+
+@bp.route("/search/suggest")
+@responsecache.cached(tags=("player", "team"))
+def search_suggest():
+    """Autocomplete player and team name
+
+    **endpoint**
+
+    .. sourcecode:: http
+
+        GET /search/suggest
+
+    **success response**
+
+    .. sourcecode:: http
+
+        HTTP/1.1 200 OK
+        Content-Type: text/javascript
+
+        {
+            "status": 200,
+            "result": {
+                "player": [
+                    {
+                        "id": 1,
+                        "name": Lionel Messi
+                    }
+                ],
+                "team": [
+                    {
+                        "id": 1,
+                        "name": Barcelona FC
+                    }
+                ]
+            }
+        }
+
+    :query keyword: prefix yang diketik user
+    :query count: maximum result per type (max 20)
+
+    optional:
+    :query type: type entity yang dicari
+        - player: hanya player
+        - team: hanya team
+    """
+    keyword = request.args.get("keyword")
+    count = request.args.get("count", "5")
+    type_ = request.args.get("type")
+
+    # raise BadRequest is missing keyword
+    if not keyword:
+        raise BadRequest("Keyword kosong")
+
+    if not count.isdigit():
+        raise BadRequest("count harus integer")
+
+    if type_ and type_ not in ("player", "team"):
+        raise BadRequest("Type tidak didukung")
+
+    # type conversion
+    count = min(int(count), 20)
+    types = (type_,) if type_ else ("player", "team")
+
+    suggestions = search.suggest(keyword, count=count, types=types)
+
+    result = {}
+    for key, items in suggestions.items():
+        result[key] = [{"id": entity_id, "name": name} for entity_id, name in items]
+
+    response = {
+        "status": 200,
+        "result": result,
     }
 
-    return jsonify(response)
\ No newline at end of file
+    return jsonify(response)
@@ -1,15 +1,22 @@
+import logging
+
 from flask import Blueprint, request, jsonify
 
 from datetime import datetime
 
 from soccer.controllers import standing as standing_ctrl
 from soccer.exceptions import BadRequest, NotFound
+from soccer.libs import responsecache
+from soccer.models import Team
+from soccer.models.loader import load_many
 
 
 bp = Blueprint(__name__, "standing")
+logger = logging.getLogger(__name__)
 
 
 @bp.route("/standing", methods=["GET"])
+@responsecache.cached(tags=("standing", "team"))
 def standing_list():
     """Get list team in standing
 
@@ -43,7 +50,7 @@ def standing_list():
     if not liga:
         raise BadRequest("Nama liga tidak boleh kosong")
 
-    if not liga:
+    if not periode:
         periode = datetime.today().year
 
     standing = standing_ctrl.get(liga=liga, periode=periode)
@@ -57,22 +64,30 @@ def standing_list():
 
 
 def _entity_standing_list(standings):
+    # load team of all standing in one query
+    teams = load_many(Team, [standing.team_id for standing in standings])
+
     results = []
     for standing in standings:
+        team = teams.get(standing.team_id)
+        if team is None:
+            # posisi tetap dikirim supaya klasemen tidak bolong
+            logger.warning("standing %s refer to missing team %s", standing.id, standing.team_id)
+
         results.append({
             "position": standing.position,
             "points": standing.points,
             "periode": standing.periode,
             "team": {
-                "id": standing.team.id,
-                "shortname": standing.team.shortname,
-                "fullname": standing.team.fullname,
-                "website": standing.team.website,
-                "birthday": standing.team.birthday,
-                "image": standing.team.image_url,
-                "image_icon": standing.team.image_icon_url,
-                "image_thumb": standing.team.image_thumb_url,
-            }
+                "id": team.id,
+                "shortname": team.shortname,
+                "fullname": team.fullname,
+                "website": team.website,
+                "birthday": team.birthday,
+                "image": team.image_url,
+                "image_icon": team.image_icon_url,
+                "image_thumb": team.image_thumb_url,
+            } if team is not None else None
         })
 
     return results
\ No newline at end of file
@@ -2,10 +2,25 @@ from flask import Blueprint, request, jsonify
 
 from soccer.controllers import team as team_ctrl
 from soccer.exceptions import BadRequest, NotFound
+from soccer.libs import conditional, responsecache, serializer
+from soccer.libs.fields import FieldSet
+from soccer.models import team as team_mdl
+from soccer.models.base import TOTAL_MODES
 
 
 bp = Blueprint(__name__, "team")
 
+# field list team, bisa dipilih dengan query fields=
+TEAM_FIELDS = FieldSet("team_list", [
+    ("id", ("id",), lambda team: team.id),
+    ("shortname", ("shortname",), lambda team: team.shortname),
+    ("fullname", ("fullname",), lambda team: team.fullname),
+    ("liga", ("liga",), lambda team: team.liga),
+    ("website", ("website",), lambda team: team.website),
+    ("birthday", ("birthday",), lambda team: team.birthday),
+    ("avatar", ("image", "image_icon", "image_thumb"), lambda team: team.avatar_json),
+])
+
 @bp.route("/team/create", methods=["POST"])
 def team_create():
     """Create team
@@ -79,6 +94,8 @@ def team_create():
     
 
 @bp.route("/team", methods=["GET"])
+@responsecache.cached(tags=("team",))
+@conditional.etag(team_mdl.entity_cache.table_version)
 def team_list():
     """Get list team
 
@@ -125,10 +142,21 @@ def team_list():
     :query page: pagination pag
     :query count: count result per page
     :query liga: liga yang dipilih
+    :query cursor: keyset pagination, kosongkan untuk halaman pertama lalu
+        gunakan ``next_cursor``. total tidak dihitung pada mode ini
+    :query total_mode: perhitungan total (exact, cached, estimate)
+    :query fields: field yang ditampilkan dipisah koma, ex: ``id,shortname``.
+        default semua field
     """
     page = request.args.get("page", "1")
     count = request.args.get("count", "12")
     liga = request.args.get("liga")
+    cursor = request.args.get("cursor")
+    total_mode = request.args.get("total_mode")
+    fields = TEAM_FIELDS.parse(request.args.get("fields"))
+
+    if total_mode and total_mode not in TOTAL_MODES:
+        raise BadRequest("total_mode tidak didukung")
 
     if not liga:
         raise BadRequest("id liga tidak boleh kosong")
@@ -138,36 +166,35 @@ def team_list():
     count = int(count)
     liga = int(liga)
 
-    team = team_ctrl.get_list(page=page, count=count, liga=liga)
+    # read before the query, see serializer.fragments
+    loaded_version = team_mdl.entity_cache.table_version()
+    team = team_ctrl.get_list(
+        page=page,
+        count=count,
+        liga=liga,
+        cursor=cursor,
+        total_mode=total_mode,
+        columns=TEAM_FIELDS.columns(fields),
+    )
 
     response = {
         "status": 200 if team.items != [] else 204,
         "has_next": team.has_next,
         "has_prev": team.has_prev,
         "total": team.total,
-        "result": _entity_team_list(team.items)
+        "next_cursor": getattr(team, "next_cursor", None),
+        "result": _entity_team_list(team.items, fields, loaded_version)
     }
 
-    return jsonify(response)
-
+    return serializer.jsonify(response)
 
-def _entity_team_list(teams):
-    results = []
-    for team in teams:
-        results.append({
-            "id": team.id,
-            "shortname": team.shortname,
-            "fullname": team.fullname,
-            "liga": team.liga,
-            "website": team.website,
-            "birthday": team.birthday,
-            "avatar": team.avatar_json,
-        })
 
-    return results
+def _entity_team_list(teams, fields: tuple, loaded_version):
+    return TEAM_FIELDS.fragments(teams, fields, team_mdl.entity_cache, loaded_version)
 
 
 @bp.route("/team/<int:team_id>", methods=["GET"])
+@conditional.etag(lambda team_id: team_mdl.entity_cache.version(team_id))
 def team_get_by_id(team_id):
     """Get team by id
 
@@ -1,11 +1,18 @@
+import logging
+
 from flask import Blueprint, request, jsonify
 
 from soccer.controllers import teamfavorite as teamfavorite_ctrl
 from soccer.exceptions import BadRequest
+from soccer.libs import auth
 from soccer.libs.ratelimit import ratelimit
+from soccer.models import Team
+from soccer.models.base import TOTAL_MODES
+from soccer.models.loader import load_many
 
 
 bp = Blueprint(__name__, "team_favorite")
+logger = logging.getLogger(__name__)
 
 
 @bp.route("/team/favorite", methods=["POST"])
@@ -114,14 +121,7 @@ def team_list_favorite():
                         "id": 1,
                         "shortname": FCB,
                         "fullname": Barcelona FC,
-                        "liga": {
-                            "id": 1,
-                            "name": La Liga,
-                            "nation": Spain,
-                            "image": asset.soccer-app...,
-                            "image_icon": asset.soccer-app...,
-                            "image_thumb": asset.soccer-app...,
-                        },
+                        "liga": 1,
                         "website": www.barcelona.com,
                         "birthday": 1556789851,
                         "image": asset.soccer-app...,
@@ -134,38 +134,53 @@ def team_list_favorite():
 
     :query page: page result
     :query count: count result per page
+    :query cursor: keyset pagination, kosongkan untuk halaman pertama lalu
+        gunakan ``next_cursor``. total tidak dihitung pada mode ini
+    :query total_mode: perhitungan total (exact, cached, estimate)
     """
     page = request.args.get("page", "1")
     count = request.args.get("count", "12")
+    cursor = request.args.get("cursor")
+    total_mode = request.args.get("total_mode")
+
+    if total_mode and total_mode not in TOTAL_MODES:
+        raise BadRequest("total_mode tidak didukung")
 
     # type conversion
     page = int(page)
     count = int(count)
 
-    teams_favorite = teamfavorite_ctrl.get_favorite(auth.user, page=page, count=count)
+    teams_favorite = teamfavorite_ctrl.get_favorite(
+        auth.user.id,
+        page=page,
+        count=count,
+        cursor=cursor,
+        total_mode=total_mode,
+    )
+
+    # load team of all favorite in one query
+    teams = load_many(Team, [fav.team_id for fav in teams_favorite.items])
 
     result = []
     for fav in teams_favorite.items:
+        team = teams.get(fav.team_id)
+        if team is None:
+            # team sudah dihapus, baris tetap dikirim supaya halaman tidak berkurang
+            logger.warning("favorite %s refer to missing team %s", fav.id, fav.team_id)
+
         result.append({
-            "favorite_id": fav.team.id,
+            "favorite_id": fav.team_id,
             "team": {
-                "id": fav.team.id,
-                "shortname": fav.team.shortname,
-                "fullname": fav.team.fullname,
-                "liga": {
-                    "id": fav.team.liga.id,
-                    "name": fav.team.liga.name,
-                    "nation": fav.team.liga.nation,
-                    "image": fav.team.liga.image_url,
-                    "image_icon": fav.team.liga.image_icon_url,
-                    "image_thumb": fav.team.liga.image_thumb_url,
-                },
-                "website": fav.team.website,
-                "birthday": fav.team.birthday,
-                "image": fav.team.image_url,
-                "image_icon": fav.team.image_icon_url,
-                "image_thumb": fav.team.image_thumb_url,
-            }
+                "id": team.id,
+                "shortname": team.shortname,
+                "fullname": team.fullname,
+                "liga": team.liga,
+                "website": team.website,
+                "birthday": team.birthday,
+                "image": team.image_url,
+                "image_icon": team.image_icon_url,
+                "image_thumb": team.image_thumb_url,
+            } if team is not None else None
         })
 
     response = {
@@ -173,6 +188,7 @@ def team_list_favorite():
         "has_next": teams_favorite.has_next,
         "has_prev": teams_favorite.has_prev,
         "total": teams_favorite.total,
+        "next_cursor": getattr(teams_favorite, "next_cursor", None),
         "result": result
     }
 
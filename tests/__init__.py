@@ -0,0 +1,4 @@
+import os
+
+# dibaca configuration saat import, sebelum module soccer manapun
+os.environ.setdefault("LOG_LEVEL", "CRITICAL")
@@ -0,0 +1,61 @@
+"""Flask app on SQLite databases for tests"""
+import os
+
+from sqlalchemy.exc import NoReferencedTableError
+
+from soccer import http
+from soccer.libs import cache
+from soccer.models import db
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+def create_app(directory: str, replicas: int = 0, **config):
+    """Create app with SQLite primary and replicas, tables are created on every database
+
+    Args:
+        directory: directory of the database files
+        replicas: number of replica, bind ``replica_<n>``
+        config: override of SoccerConfig
+
+    Returns:
+        flask app
+    """
+    replica_uris = [
+        "sqlite:///" + os.path.join(directory, "replica_%i.db" % index) for index in range(replicas)
+    ]
+    attrs = {
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(directory, "primary.db"),
+        "SQLALCHEMY_REPLICA_URIS": replica_uris,
+        # sqlite use its own pool
+        "SQLALCHEMY_POOL_SIZE": None,
+        "SQLALCHEMY_MAX_OVERFLOW": None,
+    }
+    attrs.update(config)
+
+    app = http.factory(config=type("TestConfig", (SoccerConfig,), attrs))
+    tables = [table for table in db.Model.metadata.tables.values() if _resolvable(table)]
+    with app.app_context():
+        for bind in [None] + ["replica_%i" % index for index in range(replicas)]:
+            db.Model.metadata.create_all(db.get_engine(app, bind), tables=tables)
+
+    return app
+
+
+def _resolvable(table) -> bool:
+    """Table without foreign key to table that is not a model (league)"""
+    try:
+        for foreign_key in table.foreign_keys:
+            foreign_key.column
+    except NoReferencedTableError:
+        return False
+
+    return True
+
+
+def clear_caches():
+    """Empty every named cache, entity and response of previous test"""
+    for named_cache in list(cache._caches.values()):
+        named_cache.clear()
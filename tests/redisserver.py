@@ -0,0 +1,191 @@
+"""In process stand-in of a redis server speaking RESP, for tests
+
+Only the commands ``soccer.libs.ratelimit.RedisStorage`` use are
+implemented: AUTH, SELECT, GET, INCR, EXPIRE, HMGET, HSET and EVAL. Lua is
+not available, EVAL runs the python function registered for the script
+in ``RedisServer.scripts``.
+"""
+import socketserver
+import threading
+import time
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+class RedisError(Exception):
+    """Error reply"""
+
+
+class RedisHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        while True:
+            try:
+                args = self._read_command()
+            except ConnectionError:
+                return
+
+            try:
+                with self.server.lock:
+                    reply = self.server.execute(self, args)
+            except RedisError as e:
+                self.wfile.write(b"-ERR %s\r\n" % str(e).encode("utf-8"))
+                continue
+
+            self.wfile.write(self._encode(reply))
+
+    def _read_command(self) -> list:
+        line = self.rfile.readline()
+        if not line:
+            raise ConnectionError("closed")
+
+        if not line.startswith(b"*"):
+            raise ConnectionError("inline command is not supported")
+
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2].decode("utf-8"))
+
+        return args
+
+    def _encode(self, reply) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+
+        if isinstance(reply, bool):
+            reply = int(reply)
+
+        if isinstance(reply, int):
+            return b":%i\r\n" % reply
+
+        if isinstance(reply, (list, tuple)):
+            return b"*%i\r\n" % len(reply) + b"".join(self._encode(item) for item in reply)
+
+        if isinstance(reply, Status):
+            return b"+%s\r\n" % reply.encode("utf-8")
+
+        data = str(reply).encode("utf-8")
+        return b"$%i\r\n%s\r\n" % (len(data), data)
+
+
+class Status(str):
+    """Simple string reply, ex: OK"""
+
+
+OK = Status("OK")
+
+
+class RedisServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Redis on a random local port, run it with ``start``
+
+    Data of every db is in ``data``, key -> (value, expire_at or None).
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password: str = None):
+        super(RedisServer, self).__init__(("127.0.0.1", 0), RedisHandler)
+        self.password = password
+        self.data = {}
+        self.scripts = {}
+        self.lock = threading.Lock()
+        self._authenticated = set()
+        self._db = {}
+
+    @property
+    def url(self) -> str:
+        auth = ":%s@" % self.password if self.password else ""
+        return "redis://%s127.0.0.1:%i/1" % (auth, self.server_address[1])
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def execute(self, client, args):
+        command = args[0].upper()
+        if command == "AUTH":
+            if args[1] != self.password:
+                raise RedisError("invalid password")
+
+            self._authenticated.add(client)
+            return OK
+
+        if self.password and client not in self._authenticated:
+            raise RedisError("NOAUTH Authentication required")
+
+        if command == "SELECT":
+            self._db[client] = int(args[1])
+            return OK
+
+        db = self.data.setdefault(self._db.get(client, 0), {})
+        return getattr(self, "_" + command.lower())(db, *args[1:])
+
+    def _get(self, db, key):
+        return self._value(db, key)
+
+    def _incr(self, db, key):
+        value = int(self._value(db, key) or 0) + 1
+        expire_at = db[key][1] if key in db else None
+        db[key] = (str(value), expire_at)
+        return value
+
+    def _expire(self, db, key, seconds):
+        if self._value(db, key) is None:
+            return 0
+
+        db[key] = (db[key][0], time.time() + int(seconds))
+        return 1
+
+    def _hmget(self, db, key, *fields):
+        value = self._value(db, key) or {}
+        return [value.get(field) for field in fields]
+
+    def _hset(self, db, key, *pairs):
+        value = self._value(db, key)
+        if value is None:
+            value = {}
+            db[key] = (value, None)
+
+        added = 0
+        for field, field_value in zip(pairs[::2], pairs[1::2]):
+            added += field not in value
+            value[field] = field_value
+
+        return added
+
+    def _eval(self, db, script, numkeys, *args):
+        func = self.scripts.get(script)
+        if func is None:
+            raise RedisError("NOSCRIPT script is not registered in the stand-in")
+
+        numkeys = int(numkeys)
+        return func(RedisCall(self, db), list(args[:numkeys]), list(args[numkeys:]))
+
+    @staticmethod
+    def _value(db, key):
+        item = db.get(key)
+        if item is None:
+            return None
+
+        value, expire_at = item
+        if expire_at is not None and expire_at <= time.time():
+            del db[key]
+            return None
+
+        return value
+
+
+class RedisCall(object):
+    """``redis.call`` for python version of lua script"""
+
+    def __init__(self, server: RedisServer, db: dict):
+        self.server = server
+        self.db = db
+
+    def __call__(self, command: str, *args):
+        return getattr(self.server, "_" + command.lower())(self.db, *[str(arg) for arg in args])
@@ -0,0 +1,189 @@
+"""In process stand-in of an S3 compatible server (MinIO), for tests
+
+Only what ``soccer.libs.storage.S3Storage`` use is implemented: path style
+object PUT, GET, HEAD, DELETE and multipart upload. Every request must be
+signed with AWS signature v4, the signature is verified like MinIO does.
+"""
+import hashlib
+import hmac
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qsl, quote, urlsplit
+from xml.etree import ElementTree
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+def signature(secret_key: str, method: str, path: str, query: str, headers: dict,
+              signed_headers: list, payload_hash: str, amz_date: str, region: str) -> str:
+    """AWS signature v4 of request, written from the AWS documentation"""
+    canonical_query = "&".join(
+        "%s=%s" % (quote(k, safe="-_.~"), quote(v, safe="-_.~"))
+        for k, v in sorted(parse_qsl(query, keep_blank_values=True))
+    )
+    canonical_headers = "".join(
+        "%s:%s\n" % (name, " ".join(headers[name].split())) for name in signed_headers
+    )
+    canonical_request = "\n".join([
+        method, path, canonical_query, canonical_headers, ";".join(signed_headers), payload_hash,
+    ])
+
+    scope = "%s/%s/s3/aws4_request" % (amz_date[:8], region)
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+    ])
+
+    key = hmac.new(("AWS4" + secret_key).encode("utf-8"), amz_date[:8].encode("utf-8"), hashlib.sha256).digest()
+    for value in (region, "s3", "aws4_request"):
+        key = hmac.new(key, value.encode("utf-8"), hashlib.sha256).digest()
+
+    return hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+class S3Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_PUT(self):
+        self._handle()
+
+    def do_GET(self):
+        self._handle()
+
+    def do_HEAD(self):
+        self._handle()
+
+    def do_DELETE(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def _handle(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        error = self._verify(url.path, url.query, body)
+        if error:
+            return self._error(403, error)
+
+        server = self.server
+        key = url.path
+        with server.lock:
+            if self.command == "POST" and "uploads" in params:
+                upload_id = "upload-%i" % len(server.uploads)
+                server.uploads[upload_id] = {}
+                return self._send(200, (
+                    "<InitiateMultipartUploadResult><UploadId>%s</UploadId></InitiateMultipartUploadResult>"
+                ) % upload_id)
+
+            if "uploadId" in params:
+                parts = server.uploads.get(params["uploadId"])
+                if parts is None:
+                    return self._error(404, "NoSuchUpload")
+
+                if self.command == "PUT":
+                    parts[int(params["partNumber"])] = body
+                    return self._send(200, headers={"ETag": '"%s"' % hashlib.md5(body).hexdigest()})
+
+                if self.command == "DELETE":
+                    del server.uploads[params["uploadId"]]
+                    return self._send(204)
+
+                # complete, parts must be listed in order
+                numbers = [int(element.text) for element in ElementTree.fromstring(body).iter("PartNumber")]
+                if numbers != sorted(parts):
+                    return self._error(400, "InvalidPart")
+
+                server.objects[key] = b"".join(parts[number] for number in numbers)
+                del server.uploads[params["uploadId"]]
+                return self._send(200, "<CompleteMultipartUploadResult></CompleteMultipartUploadResult>")
+
+            if self.command == "PUT":
+                server.objects[key] = body
+                return self._send(200, headers={"ETag": '"%s"' % hashlib.md5(body).hexdigest()})
+
+            if self.command == "DELETE":
+                server.objects.pop(key, None)
+                return self._send(204)
+
+            data = server.objects.get(key)
+            if data is None:
+                return self._error(404, "NoSuchKey")
+
+            return self._send(200, data)
+
+    def _verify(self, path: str, query: str, body: bytes) -> str:
+        authorization = self.headers.get("Authorization", "")
+        if not authorization.startswith("AWS4-HMAC-SHA256 "):
+            return "AccessDenied"
+
+        fields = dict(
+            part.strip().split("=", 1) for part in authorization[len("AWS4-HMAC-SHA256 "):].split(",")
+        )
+        access_key, _, region, _, _ = fields["Credential"].split("/")
+        if access_key != self.server.access_key:
+            return "InvalidAccessKeyId"
+
+        payload_hash = self.headers.get("X-Amz-Content-Sha256")
+        if payload_hash != hashlib.sha256(body).hexdigest():
+            return "XAmzContentSHA256Mismatch"
+
+        signed_headers = fields["SignedHeaders"].split(";")
+        headers = {name: self.headers.get(name, "") for name in signed_headers}
+        expected = signature(
+            self.server.secret_key, self.command, path, query, headers, signed_headers,
+            payload_hash, self.headers.get("X-Amz-Date", ""), region
+        )
+        if not hmac.compare_digest(expected, fields["Signature"]):
+            return "SignatureDoesNotMatch"
+
+        return None
+
+    def _error(self, status: int, code: str):
+        self._send(status, "<Error><Code>%s</Code></Error>" % code)
+
+    def _send(self, status: int, body=b"", headers: dict = None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+
+class S3Server(ThreadingMixIn, HTTPServer):
+    """S3 server on a random local port, run it with ``start``
+
+    Objects are kept in ``objects``, key is "/<bucket>/<key>".
+    """
+
+    daemon_threads = True
+
+    def __init__(self, access_key: str = "minioadmin", secret_key: str = "minioadmin"):
+        super(S3Server, self).__init__(("127.0.0.1", 0), S3Handler)
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.objects = {}
+        self.uploads = {}
+        self.lock = threading.Lock()
+
+    @property
+    def endpoint(self) -> str:
+        return "http://127.0.0.1:%i" % self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,145 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from freezegun import freeze_time
+
+from soccer.libs import cache
+from soccer.libs.cache import SharedMemoryCache
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+class SharedMemoryCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "test.cache")
+        self.cache = SharedMemoryCache(self.path, max_size=64, ttl=60, slot_size=128)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _slot(self, key: str) -> int:
+        """Offset of slot holding key"""
+        digest = self.cache._digest(key)
+        for offset in self.cache._probe(digest):
+            if cache._SLOT_HEADER.unpack_from(self.cache._mm, offset)[3] == digest:
+                return offset
+
+        self.fail("%s is not stored" % key)
+
+    def test_get_set_delete(self):
+        self.assertIsNone(self.cache.get("team:1"))
+        self.assertEqual(self.cache.get("team:1", "default"), "default")
+
+        self.assertTrue(self.cache.set("team:1", {"id": 1, "name": "Barcelona"}))
+        self.assertEqual(self.cache.get("team:1"), {"id": 1, "name": "Barcelona"})
+
+        self.cache.delete("team:1")
+        self.assertIsNone(self.cache.get("team:1"))
+
+    def test_too_big(self):
+        self.assertFalse(self.cache.set("big", "x" * 128))
+        self.assertIsNone(self.cache.get("big"))
+
+    def test_ttl(self):
+        with freeze_time() as frozen:
+            self.cache.set("short", 1, ttl=5)
+            self.cache.set("default", 2)
+
+            frozen.tick(10)
+            self.assertIsNone(self.cache.get("short"))
+            self.assertEqual(self.cache.get("default"), 2)
+
+            frozen.tick(60)
+            self.assertIsNone(self.cache.get("default"))
+
+    def test_incr_keep_ttl(self):
+        with freeze_time() as frozen:
+            self.assertEqual(self.cache.incr("hit", ttl=10), 1)
+            frozen.tick(6)
+            self.assertEqual(self.cache.incr("hit", ttl=10), 2)
+
+            # ttl dihitung dari key dibuat, bukan dari incr terakhir
+            frozen.tick(6)
+            self.assertEqual(self.cache.incr("hit", ttl=10), 1)
+
+    def test_clear(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.clear()
+
+        self.assertIsNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+
+    def test_shared_between_instance(self):
+        other = SharedMemoryCache(self.path, max_size=64, ttl=60, slot_size=128)
+        self.cache.set("team:1", "Barcelona")
+        self.assertEqual(other.get("team:1"), "Barcelona")
+
+        other.delete("team:1")
+        self.assertIsNone(self.cache.get("team:1"))
+
+    def test_other_layout_reset_file(self):
+        self.cache.set("team:1", "Barcelona")
+
+        other = SharedMemoryCache(self.path, max_size=32, ttl=60, slot_size=128)
+        self.assertIsNone(other.get("team:1"))
+
+    def test_generation_bump(self):
+        other = SharedMemoryCache(self.path, max_size=64, ttl=60, slot_size=128)
+        self.assertEqual(self.cache.generation("team"), 0)
+
+        self.assertEqual(self.cache.bump("team"), 1)
+        self.assertEqual(self.cache.bump("team"), 2)
+
+        # terlihat oleh worker lain, namespace lain tidak berubah
+        self.assertEqual(other.generation("team"), 2)
+        self.assertEqual(other.generation("player"), 0)
+
+    def test_odd_sequence_is_miss(self):
+        self.cache.set("team:1", "Barcelona")
+        offset = self._slot("team:1")
+        seq = cache._SEQ.unpack_from(self.cache._mm, offset)[0]
+
+        # writer sedang menulis slot ini
+        cache._SEQ.pack_into(self.cache._mm, offset, seq + 1)
+        self.assertIsNone(self.cache.get("team:1"))
+
+        cache._SEQ.pack_into(self.cache._mm, offset, seq + 2)
+        self.assertEqual(self.cache.get("team:1"), "Barcelona")
+
+    def test_read_while_other_process_write(self):
+        values = ["a" * 10, "b" * 90]
+        self.cache.set("key", values[0])
+
+        def write(path, deadline):
+            writer = SharedMemoryCache(path, max_size=64, ttl=60, slot_size=128)
+            index = 0
+            while time.time() < deadline:
+                writer.set("key", values[index % 2])
+                index += 1
+
+        process = multiprocessing.get_context("fork").Process(
+            target=write, args=(self.path, time.time() + 0.5)
+        )
+        process.start()
+        self.addCleanup(process.join)
+
+        # torn read tidak boleh terlihat, hanya nilai utuh atau miss
+        reads = set()
+        while process.is_alive():
+            reads.add(self.cache.get("key"))
+
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertLessEqual(reads, {values[0], values[1], None})
+        self.assertIn(self.cache.get("key"), values)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from soccer.libs import cache
+from soccer.libs.cache import SharedMemoryCache
+from soccer.models import db, entitycache
+from soccer.models import team as team_model
+from tests.app import clear_caches, create_app
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+class ConditionalTest(unittest.TestCase):
+    """ETag of GET /team/<id> from entity version"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.app = create_app(self.directory)
+        self.client = self.app.test_client()
+        clear_caches()
+
+        with self.app.app_context():
+            db.get_engine(self.app).execute(
+                "INSERT INTO team (id, shortname, fullname, liga, stadion) VALUES (1, 'FCB', 'Barcelona', 1, '')"
+            )
+
+        # versi entity di shm seperti CACHE_BACKEND shm
+        shared = SharedMemoryCache(os.path.join(self.directory, "entity_version.cache"), slot_size=64)
+        for patcher in (mock.patch.object(entitycache, "version_store", shared),
+                        mock.patch.dict(cache._caches, {"entity_version": shared})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_not_modified(self):
+        response = self.client.get("/team/1")
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+
+        response = self.client.get("/team/1", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.get_data(), b"")
+
+    def test_changed(self):
+        etag = self.client.get("/team/1").headers["ETag"]
+
+        team_model.entity_cache.invalidate(1)
+        response = self.client.get("/team/1", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_other_query_string(self):
+        etag = self.client.get("/team/1").headers["ETag"]
+        self.assertNotEqual(self.client.get("/team/1?lang=en").headers["ETag"], etag)
+
+    def test_local_versions_no_etag(self):
+        with mock.patch.dict(cache._caches, {"entity_version": cache.LocalCache()}):
+            response = self.client.get("/team/1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
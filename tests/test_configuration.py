@@ -0,0 +1,16 @@
+import unittest
+
+from configuration import boolean
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+class BooleanTest(unittest.TestCase):
+
+    def test_true(self):
+        for value in (True, "1", "true", "True", "yes", "on"):
+            self.assertTrue(boolean(value), value)
+
+    def test_false(self):
+        for value in (False, "", "0", "false", "FALSE", "no", "off"):
+            self.assertFalse(boolean(value), value)
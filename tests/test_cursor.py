@@ -0,0 +1,103 @@
+import base64
+import json
+import shutil
+import tempfile
+import unittest
+
+from soccer.exceptions import BadRequest
+from soccer.models import db, Team
+from soccer.models.base import decode_cursor, encode_cursor
+from tests.app import clear_caches, create_app
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+def raw_cursor(raw: bytes) -> str:
+    """Cursor of any bytes, like a client crafting its own"""
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+class CursorTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for values in [(10,), ("Barcelona", 7), (1.5, 3), ("ñandú/é+?", 1)]:
+            cursor = encode_cursor(*values)
+
+            # aman di query string tanpa escape
+            self.assertRegex(cursor, r"^[A-Za-z0-9_-]+$")
+            self.assertEqual(decode_cursor(cursor), list(values))
+
+    def test_round_trip_with_types(self):
+        cursor = encode_cursor("Barcelona", 7)
+        self.assertEqual(decode_cursor(cursor, (str, int)), ["Barcelona", 7])
+
+    def test_tampered(self):
+        cursors = [
+            "!!!",
+            "a",
+            raw_cursor(b"\xff\xfe"),
+            raw_cursor(b"{not json"),
+            raw_cursor(b'{"id": 1}'),
+            raw_cursor(b"[]"),
+            raw_cursor(b"1"),
+        ]
+        for cursor in cursors:
+            with self.assertRaises(BadRequest, msg=cursor):
+                decode_cursor(cursor)
+
+    def test_wrong_types(self):
+        cases = [
+            # sort lain
+            (encode_cursor("Barcelona"), (int,)),
+            (encode_cursor(1, 2), (int,)),
+            (encode_cursor(1), (str, int)),
+            # json true bukan id
+            (encode_cursor(True), (int,)),
+            (raw_cursor(json.dumps([{"$gt": 0}]).encode()), (int,)),
+        ]
+        for cursor, types in cases:
+            with self.assertRaises(BadRequest, msg=cursor):
+                decode_cursor(cursor, types)
+
+
+class PaginateCursorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.app = create_app(self.directory)
+        clear_caches()
+
+        with self.app.app_context():
+            for team_id in range(1, 8):
+                db.get_engine(self.app).execute(
+                    "INSERT INTO team (id, shortname, fullname, liga, stadion) VALUES (?, ?, ?, 1, '')",
+                    team_id, "T%i" % team_id, "Team %i" % team_id
+                )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_walk_pages(self):
+        pages = []
+        cursor = None
+        with self.app.test_request_context("/"):
+            while True:
+                page = Team.query.order_by(Team.id.desc()).paginate_cursor(cursor, per_page=3)
+                pages.append([team.id for team in page.items])
+                self.assertIsNone(page.total)
+                self.assertEqual(page.has_prev, cursor is not None)
+                if not page.has_next:
+                    break
+
+                cursor = page.next_cursor
+
+        self.assertEqual(pages, [[7, 6, 5], [4, 3, 2], [1]])
+
+    def test_cursor_of_another_sort(self):
+        with self.app.test_request_context("/"):
+            with self.assertRaises(BadRequest):
+                Team.query.order_by(Team.id.desc()).paginate_cursor(encode_cursor("T5"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import shutil
+import tempfile
+import unittest
+
+from sqlalchemy import inspect
+
+from soccer.models import db, Team
+from soccer.models import team as team_model
+from tests.app import clear_caches, create_app
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+class EntityCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.app = create_app(self.directory)
+        clear_caches()
+
+        self.cache = team_model.entity_cache
+        self._execute("INSERT INTO team (id, shortname, fullname, liga, stadion) VALUES (1, 'FCB', 'Barcelona', 1, '')")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _execute(self, sql: str):
+        """Change database without the app, cache does not know"""
+        with self.app.app_context():
+            db.get_engine(self.app).execute(sql)
+
+    def _get(self, team_id: int):
+        with self.app.test_request_context("/"):
+            team = team_model.get_by_id(team_id)
+            return team and (team.id, team.fullname)
+
+    def test_read_through(self):
+        self.assertEqual(self._get(1), (1, "Barcelona"))
+
+        self._execute("UPDATE team SET fullname = 'changed' WHERE id = 1")
+        self.assertEqual(self._get(1), (1, "Barcelona"))
+
+        self.cache.invalidate(1)
+        self.assertEqual(self._get(1), (1, "changed"))
+
+    def test_missing(self):
+        self.assertIsNone(self._get(2))
+
+        # negative cache sampai diinvalidate
+        self._execute("INSERT INTO team (id, shortname, fullname, liga, stadion) VALUES (2, 'RMA', 'Madrid', 1, '')")
+        self.assertIsNone(self._get(2))
+
+        self.cache.invalidate(2)
+        self.assertEqual(self._get(2), (2, "Madrid"))
+
+    def test_restored_in_session(self):
+        self._get(1)
+
+        with self.app.test_request_context("/"):
+            team = team_model.get_by_id(1)
+            state = inspect(team)
+
+            # seperti hasil query, tidak ada perubahan yang akan di-flush
+            self.assertTrue(state.persistent)
+            self.assertFalse(db.session.dirty)
+            self.assertIs(team, db.session.query(Team).get(1))
+
+    def test_version(self):
+        version = self.cache.version(1)
+        other = self.cache.version(2)
+        table = self.cache.table_version()
+        self.assertEqual(self.cache.version(1), version)
+
+        self.cache.invalidate(1)
+        self.assertNotEqual(self.cache.version(1), version)
+        self.assertNotEqual(self.cache.table_version(), table)
+        self.assertEqual(self.cache.version(2), other)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from freezegun import freeze_time
+
+from soccer.libs.cache import LocalCache, SharedMemoryCache
+from soccer.libs.ratelimit import ALGORITHMS, MemoryStorage, RedisStorage
+from tests.redisserver import RedisServer
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+def token_bucket(call, keys, args):
+    """Python version of RedisStorage.TOKEN_BUCKET_SCRIPT, the stand-in has no lua"""
+    state = call("HMGET", keys[0], "tokens", "ts")
+    rate, capacity, now = float(args[0]), float(args[1]), float(args[2])
+    tokens = float(state[0]) if state[0] is not None else capacity
+    ts = float(state[1]) if state[1] is not None else now
+    tokens = min(capacity, tokens + (now - ts) * rate)
+    allowed = 0
+    if tokens >= 1:
+        tokens = tokens - 1
+        allowed = 1
+
+    call("HSET", keys[0], "tokens", repr(tokens), "ts", repr(now))
+    call("EXPIRE", keys[0], args[3])
+    return [allowed, repr(tokens)]
+
+
+class AlgorithmTest(object):
+    """Limit and remaining of every algorithm, 3 request per 60 seconds
+
+    Subclass give the storage with ``storage``.
+    """
+
+    limit = 3
+    per = 60
+
+    def storage(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        # awal window, jadi bobot window sebelumnya di sliding pas
+        self.freezer = freeze_time("2024-01-01 00:00:00")
+        self.clock = self.freezer.start()
+        self.addCleanup(self.freezer.stop)
+
+    def hit(self, algorithm: str):
+        allowed, remaining, reset = ALGORITHMS[algorithm].hit(
+            self.storage(), "rl:test:" + algorithm, self.limit, self.per
+        )
+        return allowed, remaining
+
+    def assertExhausted(self, algorithm: str):
+        self.assertEqual([self.hit(algorithm) for _ in range(4)],
+                         [(True, 2), (True, 1), (True, 0), (False, 0)])
+
+    def test_fixed(self):
+        self.assertExhausted("fixed")
+
+        self.clock.tick(self.per)
+        self.assertEqual(self.hit("fixed"), (True, 2))
+
+    def test_sliding(self):
+        self.assertExhausted("sliding")
+
+        # setengah window berikutnya: 4 * 0.5 + 1 = 3, masih boleh
+        self.clock.tick(self.per * 1.5)
+        self.assertEqual(self.hit("sliding"), (True, 0))
+        self.assertEqual(self.hit("sliding"), (False, 0))
+
+        # window sebelumnya sudah lewat seluruhnya
+        self.clock.tick(self.per * 1.5)
+        self.assertEqual(self.hit("sliding"), (True, 2))
+
+    def test_token(self):
+        self.assertExhausted("token")
+
+        # satu token terisi tiap per / limit detik
+        self.clock.tick(self.per / self.limit)
+        self.assertEqual(self.hit("token"), (True, 0))
+        self.assertEqual(self.hit("token"), (False, 0))
+
+        self.clock.tick(self.per * 10)
+        self.assertEqual(self.hit("token"), (True, 2))
+
+
+class MemoryStorageTest(AlgorithmTest, unittest.TestCase):
+
+    def setUp(self):
+        super(MemoryStorageTest, self).setUp()
+        self.cache = MemoryStorage(LocalCache())
+
+    def storage(self):
+        return self.cache
+
+
+class SharedMemoryStorageTest(AlgorithmTest, unittest.TestCase):
+
+    def setUp(self):
+        super(SharedMemoryStorageTest, self).setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.cache = MemoryStorage(SharedMemoryCache(os.path.join(directory, "ratelimit")))
+
+    def storage(self):
+        return self.cache
+
+
+class RedisStorageTest(AlgorithmTest, unittest.TestCase):
+
+    def setUp(self):
+        super(RedisStorageTest, self).setUp()
+        self.server = RedisServer(password="secret")
+        self.server.scripts[RedisStorage.TOKEN_BUCKET_SCRIPT] = token_bucket
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.redis = RedisStorage(self.server.url)
+        self.addCleanup(self.redis._close)
+
+    def storage(self):
+        return self.redis
+
+    def test_select_db(self):
+        self.hit("fixed")
+        self.assertEqual(list(self.server.data), [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from freezegun import freeze_time
+
+from soccer.models import db, Team
+from soccer.models import replica
+from tests.app import clear_caches, create_app
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+class ReplicaTest(unittest.TestCase):
+    """Routing of RoutingSession on SQLite primary and two SQLite replicas
+
+    Every database has team 1 with the name of the database, the name read
+    tells which database answered.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.app = create_app(self.directory, replicas=2)
+        clear_caches()
+
+        with self.app.app_context():
+            for bind, name in ((None, "primary"), ("replica_0", "replica_0"), ("replica_1", "replica_1")):
+                db.get_engine(self.app, bind).execute(
+                    "INSERT INTO team (id, shortname, fullname, liga, stadion) VALUES (1, ?, ?, 1, '')",
+                    name, name
+                )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _read(self, method: str = "GET", ip: str = "10.0.0.1") -> str:
+        """Read name of team 1 in a new request"""
+        with self.app.test_request_context("/", method=method, environ_base={"REMOTE_ADDR": ip}):
+            return db.session.query(Team.shortname).filter(Team.id == 1).scalar()
+
+    def _write(self, ip: str = "10.0.0.1"):
+        """Update team 1 in a POST request of ip"""
+        with self.app.test_request_context("/", method="POST", environ_base={"REMOTE_ADDR": ip}):
+            team = Team.query.filter(Team.id == 1).first()
+            team.fullname = "updated"
+            db.session.commit()
+
+    def test_get_read_from_replica(self):
+        names = {self._read() for _ in range(4)}
+
+        # round robin over both replicas
+        self.assertEqual(names, {"replica_0", "replica_1"})
+
+    def test_post_read_from_primary(self):
+        self.assertEqual(self._read("POST"), "primary")
+
+    def test_sticky_after_write(self):
+        with freeze_time() as frozen:
+            self._write(ip="10.0.0.1")
+
+            self.assertEqual(self._read(ip="10.0.0.1"), "primary")
+            self.assertIn(self._read(ip="10.0.0.2"), ("replica_0", "replica_1"))
+
+            frozen.tick(SoccerConfig.REPLICA_STICKY_SECONDS + 1)
+            self.assertIn(self._read(ip="10.0.0.1"), ("replica_0", "replica_1"))
+
+    def test_eject(self):
+        db.replicas.eject("replica_0")
+
+        self.assertEqual({self._read() for _ in range(4)}, {"replica_1"})
+
+    def test_failed_replica_is_ejected(self):
+        # replica_0 can not be opened anymore
+        path = os.path.join(self.directory, "replica_0.db")
+        os.remove(path)
+        os.mkdir(path)
+
+        # failed read is retried on primary
+        names = [self._read() for _ in range(4)]
+
+        self.assertIn("primary", names)
+        self.assertNotIn("replica_0", names)
+        self.assertEqual({self._read() for _ in range(4)}, {"replica_1"})
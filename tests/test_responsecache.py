@@ -0,0 +1,142 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from flask import jsonify, request
+from freezegun import freeze_time
+
+from soccer.libs import responsecache
+from tests.app import clear_caches, create_app
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+class ResponseCacheTest(unittest.TestCase):
+    """Response cache of GET endpoint tagged "team", render count is in the body"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.app = create_app(self.directory)
+        self.client = self.app.test_client()
+        clear_caches()
+
+        self.renders = 0
+        # dipanggil di tengah render, request lain masuk saat lock dipegang
+        self.during_render = None
+
+        @responsecache.cached(tags=("team",))
+        def cached_view():
+            self.renders += 1
+            if self.during_render is not None:
+                self.during_render()
+
+            return jsonify({"render": self.renders, "q": request.args.get("q")})
+
+        self.app.add_url_rule("/cached", "cached", cached_view)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get(self, url: str = "/cached", **kwargs):
+        response = self.client.get(url, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return response.headers.get("X-Cache"), response.get_data(as_text=True)
+
+    def test_hit(self):
+        cache, body = self.get()
+        self.assertEqual(cache, "MISS")
+
+        self.assertEqual(self.get(), ("HIT", body))
+        self.assertEqual(self.renders, 1)
+
+    def test_query_args_order(self):
+        self.get("/cached?q=barca&page=1")
+        self.assertEqual(self.get("/cached?page=1&q=barca")[0], "HIT")
+        self.assertEqual(self.get("/cached?q=madrid&page=1")[0], "MISS")
+
+    def test_user_or_disabled_not_cached(self):
+        with self.app.test_request_context("/cached", headers={"Authorization": "Bearer abc"}):
+            self.assertIsNone(responsecache._rule())
+
+        with mock.patch.object(SoccerConfig, "RESPONSE_CACHE_ENABLED", False):
+            self.get()
+            self.get()
+
+        self.assertEqual(self.renders, 2)
+
+    def _render_in_thread(self):
+        """GET in another thread that holds the render lock until released
+
+        Returns:
+            tuple (thread, list of its (X-Cache, body), release event)
+        """
+        rendering = threading.Event()
+        release = threading.Event()
+
+        def block():
+            rendering.set()
+            release.wait(5)
+
+        self.during_render = block
+        result = []
+        thread = threading.Thread(target=lambda: result.append(self.get()))
+        thread.start()
+        self.assertTrue(rendering.wait(5))
+        return thread, result, release
+
+    def test_stale(self):
+        with freeze_time() as frozen:
+            _, old = self.get()
+            frozen.tick(SoccerConfig.RESPONSE_CACHE_TTL + 1)
+
+            thread, rendered, release = self._render_in_thread()
+            self.assertEqual(self.get(), ("STALE", old))
+            release.set()
+            thread.join()
+
+            cache, new = rendered[0]
+            self.assertEqual(cache, "MISS")
+            self.assertNotEqual(new, old)
+            self.assertEqual(self.renders, 2)
+
+            self.assertEqual(self.get(), ("HIT", new))
+
+    def test_expired_after_stale(self):
+        with freeze_time() as frozen:
+            self.get()
+            frozen.tick(SoccerConfig.RESPONSE_CACHE_TTL + SoccerConfig.RESPONSE_CACHE_STALE + 1)
+
+            self.assertEqual(self.get()[0], "MISS")
+            self.assertEqual(self.renders, 2)
+
+    def test_coalesced(self):
+        thread, rendered, release = self._render_in_thread()
+
+        # render pertama selesai saat request kedua sedang menunggu
+        timer = threading.Timer(SoccerConfig.RESPONSE_CACHE_WAIT / 4, release.set)
+        timer.start()
+        waited = self.get()
+        thread.join()
+        timer.join()
+
+        self.assertEqual(rendered[0][0], "MISS")
+        self.assertEqual(waited, ("COALESCED", rendered[0][1]))
+        self.assertEqual(self.renders, 1)
+
+    def test_invalidate_tag(self):
+        self.get()
+        with self.app.app_context():
+            responsecache.invalidate("player")
+        self.assertEqual(self.get()[0], "HIT")
+
+        with self.app.app_context():
+            responsecache.invalidate("team")
+        self.assertEqual(self.get()[0], "MISS")
+        self.assertEqual(self.renders, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import shutil
+import tempfile
+import unittest
+
+from soccer.controllers import search
+from soccer.libs.searchindex import (
+    PrefixIndex, TrigramIndex, RANK_CONTAINS, RANK_EXACT, RANK_PREFIX, normalize
+)
+from soccer.models import db
+from tests.app import clear_caches, create_app
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+PLAYERS = [
+    (1, "Lionel Messi", "Messi"),
+    (2, "Messias Junior", "Messias"),
+    (3, "Thiago Demessi", "Demessi"),
+    (4, "Mess", "Mess"),
+    (5, "Cristiano Ronaldo", "CR7"),
+]
+
+
+class TrigramIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TrigramIndex()
+        self.index.rebuild(PLAYERS)
+
+    def test_normalize(self):
+        self.assertEqual(normalize("  N'Golo   Kanté, Jr. "), "n golo kanté jr")
+
+    def test_rank(self):
+        self.assertEqual(dict(self.index.search("messi")), {
+            1: RANK_EXACT,
+            2: RANK_PREFIX,
+            3: RANK_CONTAINS,
+        })
+
+    def test_short_keyword(self):
+        self.assertEqual(dict(self.index.search("cr")), {5: RANK_PREFIX})
+        self.assertEqual(self.index.search("x"), [])
+        self.assertEqual(self.index.search("!!"), [])
+
+    def test_keyword_longer_than_name(self):
+        self.assertEqual(self.index.search("messi messi"), [])
+
+    def test_add_and_remove(self):
+        self.index.add(6, "Messi Rossi", "Rossi")
+        self.assertEqual(dict(self.index.search("messi"))[6], RANK_PREFIX)
+
+        # nama lama tidak tersisa di posting list
+        self.index.add(6, "Paolo Rossi", "Rossi")
+        self.assertNotIn(6, dict(self.index.search("messi")))
+
+        self.index.remove(6)
+        self.assertEqual(self.index.search("rossi"), [])
+        self.assertNotIn(6, self.index)
+
+
+class PrefixIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.rebuild(PLAYERS)
+
+    def test_exact_and_shorter_first(self):
+        self.assertEqual(self.index.suggest("mess"), [
+            (4, "Mess"),
+            (1, "Lionel Messi"),
+            (2, "Messias Junior"),
+        ])
+
+    def test_word_of_name(self):
+        self.assertEqual(self.index.suggest("ronal"), [(5, "Cristiano Ronaldo")])
+
+    def test_limit(self):
+        self.assertEqual([entity_id for entity_id, _ in self.index.suggest("mess", 2)], [4, 1])
+        self.assertEqual(self.index.suggest("mess", 0), [])
+
+    def test_add_and_remove(self):
+        self.index.add(4, "Messi Kecil", "Mess")
+        self.assertEqual(self.index.suggest("kecil"), [(4, "Messi Kecil")])
+
+        self.index.remove(4)
+        self.assertEqual(self.index.suggest("kecil"), [])
+        self.assertNotIn(4, [entity_id for entity_id, _ in self.index.suggest("mess")])
+
+
+class SearchSortTest(unittest.TestCase):
+    """Sort "match" of search controller, (rank, -id) like the previous SQL CASE"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.app = create_app(self.directory)
+        clear_caches()
+
+        teams = [
+            (1, "Madrid"),
+            (2, "Real Madrid"),
+            (3, "Atletico Madrid"),
+            (4, "Madrid City"),
+            (5, "Madrid United"),
+            (6, "Madrid"),
+        ]
+        with self.app.app_context():
+            for team_id, name in teams:
+                db.get_engine(self.app).execute(
+                    "INSERT INTO team (id, shortname, fullname, liga, stadion, is_deleted) "
+                    "VALUES (?, ?, ?, 1, '', 0)",
+                    team_id, name, name
+                )
+
+            search.load_team_index()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_match(self):
+        with self.app.test_request_context("/"):
+            result = search.search_team("madrid", count=10)
+
+            # exact, prefix lalu contains, id terbesar dulu pada rank yang sama
+            self.assertEqual([team.id for team in result.items], [6, 1, 5, 4, 3, 2])
+            self.assertEqual(result.total, 6)
+
+    def test_match_cursor(self):
+        ids = []
+        cursor = ""
+        with self.app.test_request_context("/"):
+            while cursor is not None:
+                result = search.search_team("madrid", count=4, cursor=cursor)
+                ids.append([team.id for team in result.items])
+                cursor = result.next_cursor
+
+        self.assertEqual(ids, [[6, 1, 5, 4], [3, 2]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from soccer.libs import serializer
+from soccer.libs.serializer import Fragment
+from soccer.models import team as team_model
+from tests.app import clear_caches, create_app
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+class Entity(object):
+
+    def __init__(self, entity_id: int, name: str):
+        self.id = entity_id
+        self.name = name
+
+
+class DumpsTest(unittest.TestCase):
+
+    def test_without_fragment(self):
+        obj = {"status": 200, "result": [1, "dua", None]}
+        self.assertEqual(json.loads(serializer.dumps(obj).decode("utf-8")), obj)
+
+    def test_fragment(self):
+        team = {"id": 1, "name": "Barcelona ñ"}
+        fragment = Fragment(json.dumps(team).encode("utf-8"))
+        obj = {
+            "status": 200,
+            "team": fragment,
+            "result": [fragment, {"id": 2}],
+        }
+
+        self.assertEqual(json.loads(serializer.dumps(obj).decode("utf-8")), {
+            "status": 200,
+            "team": team,
+            "result": [team, {"id": 2}],
+        })
+        self.assertEqual(serializer.dumps([fragment]), b"[" + fragment.data + b"]")
+        self.assertEqual(serializer.dumps(fragment), fragment.data)
+
+    def test_missing_encoder_fallback(self):
+        with mock.patch.object(serializer, "_encoder", None), \
+                mock.patch.object(SoccerConfig, "JSON_ENCODER", "orjson"), \
+                mock.patch.dict(serializer.ENCODERS, {"orjson": self._not_installed}):
+            self.assertEqual(serializer.get_encoder()({"a": 1}), b'{"a":1}')
+
+    def test_unknown_encoder(self):
+        with mock.patch.object(serializer, "_encoder", None), \
+                mock.patch.object(SoccerConfig, "JSON_ENCODER", "unknown"):
+            self.assertEqual(json.loads(serializer.get_encoder()([1]).decode("utf-8")), [1])
+
+    @staticmethod
+    def _not_installed():
+        raise ImportError("orjson")
+
+
+class FragmentsTest(unittest.TestCase):
+    """Fragment cache keyed by entity version of team entity cache"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.app = create_app(self.directory)
+        clear_caches()
+
+        self.versions = team_model.entity_cache
+        self.builds = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self, entity):
+        self.builds.append(entity.id)
+        return {"id": entity.id, "name": entity.name}
+
+    def encode(self, entities, loaded_version=None):
+        if loaded_version is None:
+            loaded_version = self.versions.table_version()
+
+        result = serializer.fragments("team_test", entities, self.build, self.versions, loaded_version)
+        return [fragment.load() for fragment in result]
+
+    def test_reuse(self):
+        entities = [Entity(1, "Barcelona"), Entity(2, "Madrid")]
+        expected = [{"id": 1, "name": "Barcelona"}, {"id": 2, "name": "Madrid"}]
+
+        self.assertEqual(self.encode(entities), expected)
+        self.assertEqual(self.encode(entities), expected)
+        self.assertEqual(self.builds, [1, 2])
+
+    def test_changed_entity(self):
+        self.encode([Entity(1, "Barcelona"), Entity(2, "Madrid")])
+
+        self.versions.invalidate(1)
+        result = self.encode([Entity(1, "FC Barcelona"), Entity(2, "Madrid")])
+
+        self.assertEqual(result[0]["name"], "FC Barcelona")
+        self.assertEqual(self.builds, [1, 2, 1])
+
+    def test_written_after_loaded(self):
+        loaded_version = self.versions.table_version()
+
+        # entity diubah request lain setelah dibaca, data lama tidak boleh disimpan
+        self.versions.invalidate(1)
+        self.assertEqual(self.encode([Entity(1, "old")], loaded_version), [{"id": 1, "name": "old"}])
+        self.assertEqual(self.encode([Entity(1, "new")]), [{"id": 1, "name": "new"}])
+        self.assertEqual(self.builds, [1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import io
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from tests.app import clear_caches, create_app
+from configuration import SoccerConfig
+
+__author__ = "isnanda.muhammadzain@sebangsa.com"
+
+
+class UploadTest(unittest.TestCase):
+    """Upload is rejected while it is received, with its own status code"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.app = create_app(self.directory)
+        self.client = self.app.test_client()
+        clear_caches()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _create(self, avatar: bytes):
+        return self.client.post("/player/create", data={
+            "shortname": "Messi",
+            "fullname": "Lionel Messi",
+            "backnumber": "10",
+            "player_avatar": (io.BytesIO(avatar), "messi.jpg"),
+        })
+
+    def test_not_image(self):
+        response = self._create(b"notanimage" * 10)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_too_large(self):
+        with mock.patch.object(SoccerConfig, "UPLOAD_MAX_BYTES", 64 * 1024):
+            response = self._create(b"\xff\xd8\xff" + b"\x00" * (128 * 1024))
+
+        self.assertEqual(response.status_code, 413)